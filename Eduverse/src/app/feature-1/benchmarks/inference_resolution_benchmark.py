@@ -0,0 +1,145 @@
+"""
+DrawInAir Inference Resolution Benchmark
+Runs MediaPipe hand tracking on the same frames at several input widths and
+reports latency plus landmark accuracy against full 950x550 resolution.
+Landmarks are normalized, so errors are measured in 950x550 canvas pixels.
+Accuracy needs frames with a hand in view: it is reported as n/a for frames
+without detections, and a real source in which the full resolution pass finds
+no hand is an error.
+
+Usage:
+    python benchmarks/inference_resolution_benchmark.py --recording drawing.npz   (record_landmarks.py output)
+    python benchmarks/inference_resolution_benchmark.py --video hand.mp4
+    python benchmarks/inference_resolution_benchmark.py --images frames_dir/
+    python benchmarks/inference_resolution_benchmark.py --camera 0 --frames 300
+    python benchmarks/inference_resolution_benchmark.py --synthetic   (latency only, no hands, accuracy n/a)
+Pick a size with DRAWINAIR_INFERENCE_WIDTH=<width>.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mediapipe.python.solutions import hands  # noqa: E402
+
+from drawinair_compositor import FrameCompositor  # noqa: E402
+from drawinair_recording import load_recording  # noqa: E402
+from drawinair_session import CANVAS_SHAPE, inference_size_for  # noqa: E402
+from hand_tracking_pool import TRACKER_OPTIONS  # noqa: E402
+
+DEFAULT_WIDTHS = [950, 640, 480, 320, 240]
+WARMUP_FRAMES = 5  # Excluded from latency stats (graph start-up)
+
+
+def load_frames(args):
+    """Return a list of BGR frames from the chosen source"""
+    if args.images:
+        paths = sorted(glob.glob(os.path.join(args.images, '*')))
+        frames = [cv2.imread(path) for path in paths]
+        return [frame for frame in frames if frame is not None][:args.frames]
+
+    if args.recording:
+        recording = load_recording(args.recording)
+        if not recording.has_frames:
+            sys.exit(f"{args.recording} has landmarks only; record it without --no-frames")
+        return [recording.frame(idx) for idx in range(min(len(recording), args.frames))]
+
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8) for _ in range(args.frames)]
+
+    capture = cv2.VideoCapture(args.video if args.video else args.camera)
+    frames = []
+    while len(frames) < args.frames:
+        success, frame = capture.read()
+        if not success:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def track(frames, width):
+    """Track every frame at one inference width. Returns (latencies, landmarks per frame)"""
+    compositor = FrameCompositor(CANVAS_SHAPE, inference_size=inference_size_for(width))
+    tracker = hands.Hands(**TRACKER_OPTIONS)
+    latencies, results = [], []
+    try:
+        for frame in frames:
+            started = time.perf_counter()
+            _, rgb = compositor.prepare(frame)
+            result = tracker.process(rgb)
+            latencies.append(time.perf_counter() - started)
+
+            if result.multi_hand_landmarks:
+                landmarks = result.multi_hand_landmarks[0].landmark
+                results.append(np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float32))
+            else:
+                results.append(None)
+    finally:
+        tracker.close()
+    return np.array(latencies[WARMUP_FRAMES:] or latencies), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--recording', help='Recording with frames from record_landmarks.py')
+    source.add_argument('--video', help='Video file with a hand in view')
+    source.add_argument('--images', help='Directory of frames')
+    source.add_argument('--camera', type=int, help='Webcam index')
+    source.add_argument('--synthetic', action='store_true', help='Random frames (latency only, accuracy n/a)')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--widths', type=int, nargs='+', default=DEFAULT_WIDTHS)
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    if not frames:
+        sys.exit("No frames loaded")
+
+    canvas_scale = np.array([CANVAS_SHAPE[1], CANVAS_SHAPE[0]], dtype=np.float32)
+    widths = sorted(set(args.widths) | {CANVAS_SHAPE[1]}, reverse=True)
+    reference = None
+
+    print(f"Hand tracking on {len(frames)} frames\n")
+    print(f"{'input':>10} {'mean ms':>9} {'p95 ms':>8} {'detected':>9} {'agree':>7} {'mean err px':>12} {'p95 err px':>11}")
+    for width in widths:
+        latencies, landmarks = track(frames, width)
+        if reference is None:
+            reference = landmarks  # Full resolution comes first
+
+            reference_detected = sum(item is not None for item in reference)
+            if not reference_detected and not args.synthetic:
+                sys.exit("No hand detected at full resolution: accuracy cannot be measured on these frames")
+
+        # Agreement over frames where either pass saw a hand; errors where both did
+        errors, agreements, compared = [], 0, 0
+        for ref, got in zip(reference, landmarks):
+            if ref is None and got is None:
+                continue
+            compared += 1
+            agreements += ref is not None and got is not None
+            if ref is not None and got is not None:
+                errors.append(np.linalg.norm((ref - got) * canvas_scale, axis=1))
+        agree = f"{agreements / compared:7.1%}" if compared else f"{'n/a':>7}"
+        if errors:
+            errors = np.concatenate(errors)
+            error_columns = f"{errors.mean():12.2f} {np.percentile(errors, 95):11.2f}"
+        else:
+            error_columns = f"{'n/a':>12} {'n/a':>11}"
+
+        size = inference_size_for(width) or (CANVAS_SHAPE[1], CANVAS_SHAPE[0])
+        detected = sum(item is not None for item in landmarks)
+        print(f"{size[0]:>5}x{size[1]:<4} {latencies.mean() * 1000:9.2f} {np.percentile(latencies, 95) * 1000:8.2f} "
+              f"{detected:>9} {agree} {error_columns}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Serving Mode Load Test
+Starts a backend with a stub upstream (benchmarks/stub_upstream.py of the
+service) once per serving mode - the Flask dev server the app used to run on
+and each of the service's gunicorn configs - fires the same concurrent load
+at each and prints throughput and latency side by side, plus the peak number
+of upstream calls the server had in flight at once (Magic Learn stub).
+
+Magic Learn modes: "gunicorn" is gunicorn.conf.py (gthread, one thread per
+in-flight request, GUNICORN_THREADS of them), "gunicorn-llm" is
+gunicorn_llm.conf.py (gevent, the Image Reader / Plot Crafter entry point).
+By default the load (--concurrency 200) is well above the thread cap
+(--threads 64, scaled down from the production 256 to keep the run light), so
+the gthread mode queues requests for a thread and the gevent one does not.
+
+Usage:
+    python benchmarks/load_test.py                                  (Magic Learn, Plot Crafter generate)
+    python benchmarks/load_test.py --service playground             (feature-4 /generate)
+    python benchmarks/load_test.py --requests 1000 --concurrency 500 --threads 256   (production thread cap)
+    python benchmarks/load_test.py --modes gunicorn --url http://localhost:5000   (an already running server)
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERVICES = {
+    'magic-learn': {
+        'dir': os.path.join(APP_DIR, 'feature-1'),
+        'path': '/api/plot-crafter/generate',
+        'body': lambda idx: {'theme': f'load test theme {idx}'},
+        'upstream_waits': 1.0,  # Stub latencies per request
+        'gunicorn_configs': {'gunicorn': 'gunicorn.conf.py', 'gunicorn-llm': 'gunicorn_llm.conf.py'},
+    },
+    'playground': {
+        'dir': os.path.join(APP_DIR, 'feature-4'),
+        'path': '/generate',
+        'body': lambda idx: {'url': f'https://www.youtube.com/watch?v={idx:011d}'},
+        'upstream_waits': 1.2,  # Gemini + two YouTube calls at a tenth each
+        'gunicorn_configs': {'gunicorn': 'gunicorn.conf.py'},
+    },
+}
+
+MODES = ['dev', 'gunicorn', 'gunicorn-llm']
+
+
+def server_command(service, mode, port):
+    if mode == 'dev':
+        return [sys.executable, 'benchmarks/stub_upstream.py']
+    return [sys.executable, '-m', 'gunicorn', '-c', service['gunicorn_configs'][mode],
+            '--bind', f'127.0.0.1:{port}', 'benchmarks.stub_upstream:app']
+
+
+def start_server(service, mode, port, latency, threads=None):
+    env = dict(os.environ, PORT=str(port), STUB_UPSTREAM_LATENCY=str(latency), PYTHONUNBUFFERED='1')
+    if threads:
+        env['GUNICORN_THREADS'] = str(threads)
+    process = subprocess.Popen(server_command(service, mode, port), cwd=service['dir'], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return process
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.25)
+    stop_server(process)
+    raise RuntimeError(f"{mode} server did not become healthy within 60 s")
+
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=15)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def post(url, body, timeout):
+    data = json.dumps(body).encode()
+    started = time.perf_counter()
+    try:
+        request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None  # Connection refused / reset / timed out
+    return status, time.perf_counter() - started
+
+
+def peak_in_flight(base_url, reset=False):
+    """Peak concurrent stub upstream calls since the last reset (None if the stub does not count them)"""
+    try:
+        with urllib.request.urlopen(f"{base_url}/stub/upstream{'?reset=1' if reset else ''}", timeout=5) as response:
+            return json.loads(response.read())['peak_in_flight']
+    except (urllib.error.URLError, OSError, ValueError, KeyError):
+        return None
+
+
+def run_load(base_url, service, requests, concurrency, timeout):
+    url = base_url + service['path']
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda idx: post(url, service['body'](idx), timeout), range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = np.array([seconds for status, seconds in results if status == 200])
+    return {
+        'ok': len(latencies),
+        'errors': requests - len(latencies),
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50': np.percentile(latencies, 50) if len(latencies) else float('nan'),
+        'p95': np.percentile(latencies, 95) if len(latencies) else float('nan'),
+        'max': latencies.max() if len(latencies) else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--service', choices=SERVICES, default='magic-learn')
+    parser.add_argument('--modes', nargs='+', choices=MODES, help='Default: dev and every gunicorn config of the service')
+    parser.add_argument('--requests', type=int, default=600)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=1.0, help='Stub upstream latency per Gemini call (seconds)')
+    parser.add_argument('--timeout', type=float, default=60, help='Client timeout per request (seconds)')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--threads', type=int, default=64, help='GUNICORN_THREADS for the gthread mode')
+    parser.add_argument('--url', help='Load an already running server instead of starting one (single mode)')
+    args = parser.parse_args()
+
+    service = SERVICES[args.service]
+    modes = args.modes or ['dev'] + list(service['gunicorn_configs'])
+    unknown = [mode for mode in modes if mode != 'dev' and mode not in service['gunicorn_configs']]
+    if unknown:
+        parser.error(f"{args.service} has no {', '.join(unknown)} mode")
+    print(f"{args.service}: {args.requests} requests, {args.concurrency} concurrent, "
+          f"stub upstream latency {args.latency:.2f}s, GUNICORN_THREADS={args.threads}\n")
+    print(f"{'mode':>12} {'ok':>5} {'errors':>6} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'max s':>7} {'in flight':>9}")
+
+    for mode in modes:
+        process = None if args.url else start_server(service, mode, args.port, args.latency, args.threads)
+        try:
+            base_url = args.url or f'http://127.0.0.1:{args.port}'
+            run_load(base_url, service, min(args.concurrency, args.requests), args.concurrency, args.timeout)  # Warm-up
+            peak_in_flight(base_url, reset=True)
+            result = run_load(base_url, service, args.requests, args.concurrency, args.timeout)
+            peak = peak_in_flight(base_url)
+        finally:
+            if process is not None:
+                stop_server(process)
+        print(f"{mode:>12} {result['ok']:>5} {result['errors']:>6} {result['throughput']:7.1f} "
+              f"{result['p50']:7.2f} {result['p95']:7.2f} {result['max']:7.2f} {peak if peak is not None else 'n/a':>9}")
+        if args.url:
+            break
+
+    request_latency = args.latency * service['upstream_waits']
+    print(f"\nIdeal (every request overlapped): {args.concurrency / request_latency:.1f} req/s at p50 {request_latency:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+DrawInAir Landmark Recorder
+Captures frames from a webcam or video file, runs the same hand tracking and
+gesture engine as the server and writes a recording for replay_benchmark.py
+(landmarks, handedness, raw + locked gestures and, by default, the frames).
+
+Usage:
+    python benchmarks/record_landmarks.py --camera 0 --frames 600 -o drawing.npz
+    python benchmarks/record_landmarks.py --video hand.mp4 -o drawing.npz
+    python benchmarks/record_landmarks.py --synthetic -o synthetic.npz   (scripted, no camera)
+The recorded gestures become the expected values of the replay regression check,
+so review a new recording (or re-record) after intentionally changing thresholds.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mediapipe.python.solutions import hands  # noqa: E402
+
+import gesture_engine  # noqa: E402
+from drawinair_compositor import FrameCompositor  # noqa: E402
+from drawinair_recording import LandmarkRecorder, synthetic_recording  # noqa: E402
+from drawinair_session import CANVAS_SHAPE, INFERENCE_WIDTH, inference_size_for  # noqa: E402
+from hand_tracking_pool import TRACKER_OPTIONS  # noqa: E402
+
+
+def record(capture, args):
+    compositor = FrameCompositor(CANVAS_SHAPE, inference_size=inference_size_for(INFERENCE_WIDTH))
+    tracker = hands.Hands(**TRACKER_OPTIONS)
+    lock = gesture_engine.GestureLock()
+    recorder = LandmarkRecorder(keep_frames=not args.no_frames)
+    started = time.perf_counter()
+    try:
+        while len(recorder) < args.frames:
+            success, frame = capture.read()
+            if not success or frame is None:
+                break
+            timestamp = time.perf_counter() - started
+
+            img, rgb = compositor.prepare(frame)
+            result = tracker.process(rgb)
+            landmarks, hand_label, points = None, None, None
+            if result.multi_hand_landmarks:
+                hand_lms = result.multi_hand_landmarks[0]
+                landmarks = np.array([(lm.x, lm.y) for lm in hand_lms.landmark], dtype=np.float32)
+                points = (landmarks * (img.shape[1], img.shape[0])).astype(np.int32)
+                if result.multi_handedness:
+                    hand_label = result.multi_handedness[0].classification[0].label
+            raw_gesture = gesture_engine.classify(gesture_engine.fingers_up(points, hand_label))
+            gesture = lock.update(raw_gesture)
+            if gesture in ("Clearing", "Analyzing"):
+                lock.reset()
+
+            recorder.add(landmarks, hand_label, raw_gesture, gesture, timestamp, frame)
+            if len(recorder) % 30 == 0:
+                print(f"  {len(recorder)} frames, last gesture: {gesture}")
+    except KeyboardInterrupt:
+        print("⏹️ Stopped")
+    finally:
+        tracker.close()
+    return recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--video', help='Video file with a hand in view')
+    source.add_argument('--camera', help='Webcam index or stream URL')
+    source.add_argument('--synthetic', action='store_true', help='Scripted gesture sequence (no camera)')
+    parser.add_argument('--frames', type=int, default=600, help='Max frames to record')
+    parser.add_argument('--no-frames', action='store_true', help='Store landmarks only (smaller file, no tracking replay)')
+    parser.add_argument('-o', '--output', required=True, help='Recording path (.npz)')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        recording = synthetic_recording(frames_per_gesture=max(1, args.frames // 10))
+        recording.save(args.output)
+        print(f"✅ Wrote synthetic recording ({len(recording)} frames) to {args.output}")
+        return
+
+    camera = args.video or (int(args.camera) if args.camera.isdigit() else args.camera)
+    capture = cv2.VideoCapture(camera)
+    if not capture.isOpened():
+        sys.exit(f"Could not open {camera}")
+    print(f"🎥 Recording from {camera} (Ctrl+C to stop early)")
+    try:
+        recorder = record(capture, args)
+    finally:
+        capture.release()
+    if not recorder:
+        sys.exit("No frames recorded")
+
+    recorder.save(args.output)
+    print(f"✅ Wrote {len(recorder)} frames to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+DrawInAir Replay Benchmark
+Feeds a landmark recording (record_landmarks.py) through the browser frame
+pipeline at full speed - decode, resize/mirror, gesture engine + lock, stroke
+drawing, compositing and encoding - and reports per-stage timings and fps.
+Recorded landmarks replace MediaPipe unless --track is given, so the run is
+CPU-only, deterministic and needs no webcam.
+
+Also a regression check for the gesture thresholds: replayed raw and locked
+gestures are compared with the ones stored in the recording (--check exits 1
+on any mismatch).
+
+Usage:
+    python benchmarks/replay_benchmark.py drawing.npz
+    python benchmarks/replay_benchmark.py drawing.npz --mode overlay --repeat 3
+    python benchmarks/replay_benchmark.py drawing.npz --track   (re-run MediaPipe on the frames)
+    python benchmarks/replay_benchmark.py --synthetic --check
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gesture_engine  # noqa: E402
+from drawinair_recording import load_recording, synthetic_recording  # noqa: E402
+from drawinair_session import CANVAS_SHAPE, DrawInAirSession  # noqa: E402
+
+STAGES = ('decode', 'prepare', 'track', 'classify', 'lock', 'draw', 'composite', 'encode')
+
+
+def create_tracker():
+    from mediapipe.python.solutions import hands
+    from hand_tracking_pool import TRACKER_OPTIONS
+    return hands.Hands(**TRACKER_OPTIONS)
+
+
+def replay(recording, args, timings):
+    """One pass over the recording. Returns (raw gesture codes, locked gesture codes, session)"""
+    session = DrawInAirSession('replay', create_tracker)
+    use_frames = recording.has_frames and not args.landmarks_only
+    raw_codes = np.empty(len(recording), dtype=np.int8)
+    locked_codes = np.empty(len(recording), dtype=np.int8)
+    blank = np.zeros(CANVAS_SHAPE, dtype=np.uint8)
+    clock = time.perf_counter
+
+    try:
+        for idx in range(len(recording)):
+            session.begin_frame()
+            compositor = session.get_compositor()
+
+            started = clock()
+            frame = recording.frame(idx) if use_frames else blank
+            timings['decode'].append(clock() - started)
+
+            started = clock()
+            img, rgb = compositor.prepare(frame)
+            timings['prepare'].append(clock() - started)
+
+            if args.track:
+                started = clock()
+                result = session.get_tracker().process(rgb)
+                timings['track'].append(clock() - started)
+                landmarks, hand_label = None, None
+                if result.multi_hand_landmarks:
+                    landmarks = np.array([(lm.x, lm.y) for lm in result.multi_hand_landmarks[0].landmark], dtype=np.float32)
+                    if result.multi_handedness:
+                        hand_label = result.multi_handedness[0].classification[0].label
+            else:
+                landmarks, hand_label = recording.hand(idx)
+
+            started = clock()
+            points = None if landmarks is None else (landmarks * (img.shape[1], img.shape[0])).astype(np.int32)
+            fingers = gesture_engine.fingers_up(points, hand_label)
+            raw_gesture = gesture_engine.classify(fingers)
+            timings['classify'].append(clock() - started)
+
+            started = clock()
+            session.current_gesture = session.gesture_lock.update(raw_gesture)
+            timings['lock'].append(clock() - started)
+
+            started = clock()
+            session.apply_gesture(points if fingers else None, draw_thickness=5, erase_thickness=15, dot_on_start=True)
+            timings['draw'].append(clock() - started)
+
+            if args.mode != 'landmarks':
+                started = clock()
+                if args.mode == 'overlay':
+                    output = compositor.overlay_rgba(img, session.imgCanvas)
+                else:
+                    output = compositor.composite(img, session.imgCanvas, session.ink_mask)
+                timings['composite'].append(clock() - started)
+
+                started = clock()
+                cv2.imencode('.png' if args.mode == 'overlay' else '.jpg', output)
+                timings['encode'].append(clock() - started)
+
+            raw_codes[idx] = gesture_engine.GESTURES.index(raw_gesture)
+            locked_codes[idx] = gesture_engine.GESTURES.index(session.current_gesture)
+    finally:
+        session.close()
+    return raw_codes, locked_codes, session
+
+
+def report_mismatches(name, expected, got):
+    mismatches = np.flatnonzero(expected != got)
+    print(f"{name:>16}: {len(expected) - len(mismatches)}/{len(expected)} frames match")
+    for idx in mismatches[:10]:
+        print(f"{'':>18}frame {idx}: expected {gesture_engine.GESTURES[expected[idx]]}, "
+              f"got {gesture_engine.GESTURES[got[idx]]}")
+    return len(mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', nargs='?', help='Recording from record_landmarks.py (.npz)')
+    parser.add_argument('--synthetic', action='store_true', help='Use the built-in scripted recording')
+    parser.add_argument('--mode', choices=('landmarks', 'overlay', 'camera'), default='landmarks',
+                        help='landmarks: no compositing (browser landmarks mode), overlay: RGBA + PNG, camera: blend + JPEG')
+    parser.add_argument('--track', action='store_true', help='Run MediaPipe on the recorded frames instead of recorded landmarks')
+    parser.add_argument('--landmarks-only', action='store_true', help='Skip frame decoding (blank frames)')
+    parser.add_argument('--repeat', type=int, default=1, help='Passes over the recording')
+    parser.add_argument('--check', action='store_true', help='Exit 1 if replayed gestures differ from the recording')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        recording = synthetic_recording()
+    elif args.recording:
+        recording = load_recording(args.recording)
+    else:
+        parser.error('give a recording or --synthetic')
+    if args.track and not recording.has_frames:
+        parser.error('--track needs a recording with frames')
+
+    timings = defaultdict(list)
+    started = time.perf_counter()
+    for _ in range(max(1, args.repeat)):
+        raw_codes, locked_codes, session = replay(recording, args, timings)
+    elapsed = time.perf_counter() - started
+    frames = len(recording) * max(1, args.repeat)
+
+    print(f"Replayed {len(recording)} frames x {max(1, args.repeat)} ({args.mode} mode"
+          f"{', MediaPipe' if args.track else ', recorded landmarks'})\n")
+    print(f"{'stage':>10} {'mean ms':>9} {'p95 ms':>8} {'share':>7}")
+    total = sum(sum(values) for values in timings.values()) or 1e-9
+    for stage in STAGES:
+        values = np.array(timings.get(stage, []))
+        if not len(values):
+            continue
+        print(f"{stage:>10} {values.mean() * 1000:9.3f} {np.percentile(values, 95) * 1000:8.3f} {values.sum() / total:7.1%}")
+    print(f"\n{frames / elapsed:.1f} frames/s end to end ({elapsed * 1000 / frames:.2f} ms/frame), "
+          f"{len(session.strokes)} strokes / {session.strokes.num_points} points on the canvas")
+
+    # Vectorized classification of the whole recording at once
+    has_hand = recording.labels > 0
+    points = (np.nan_to_num(recording.landmarks) * (CANVAS_SHAPE[1], CANVAS_SHAPE[0])).astype(np.int32)
+    started = time.perf_counter()
+    batch_codes = gesture_engine.classify_batch(points, recording.labels == 1)
+    batch_elapsed = time.perf_counter() - started
+    batch_codes[~has_hand] = gesture_engine.NONE
+    print(f"classify_batch: {len(recording) / max(batch_elapsed, 1e-9):,.0f} frames/s")
+    if not args.track:
+        agree = (batch_codes == raw_codes).mean()
+        print(f"classify_batch vs per-frame: {agree:.1%} agreement")
+    print()
+
+    mismatches = report_mismatches('raw gestures', recording.raw_gestures, raw_codes)
+    mismatches += report_mismatches('locked gestures', recording.gestures, locked_codes)
+    if args.check and mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
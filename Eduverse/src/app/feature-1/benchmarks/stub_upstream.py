@@ -0,0 +1,95 @@
+"""
+Magic Learn Backend With a Stub Upstream
+The real app with every Gemini call replaced by a stub that waits
+STUB_UPSTREAM_LATENCY seconds (like a network call, the wait releases the
+GIL) and returns canned text. Caches, per-key budgets and admission limits
+are off so every request goes "upstream". Used by load_test.py; can also be
+served directly:
+
+    python benchmarks/stub_upstream.py                                  (Flask dev server)
+    gunicorn -c gunicorn.conf.py benchmarks.stub_upstream:app           (production settings)
+    gunicorn -c gunicorn_llm.conf.py benchmarks.stub_upstream:app       (LLM routes, gevent)
+GET /stub/upstream reports how many stub calls overlapped (?reset=1 clears the peak).
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name in ('DRAWINAIR_API_KEY', 'IMAGE_READER_API_KEY', 'IMAGE_READER_API_KEY_2', 'IMAGE_READER_API_KEY_3',
+             'PLOT_CRAFTER_API_KEY', 'PLOT_CRAFTER_API_KEY_2', 'PLOT_CRAFTER_API_KEY_3'):
+    os.environ.setdefault(name, f'stub-{name.lower()}')
+os.environ.setdefault('GEMINI_KEY_RPM', '0')
+os.environ.setdefault('IMAGE_READER_CACHE_SIZE_MB', '0')
+os.environ.setdefault('PLOT_CRAFTER_CACHE_SIZE', '0')
+os.environ.setdefault('DRAWINAIR_ANALYSIS_CACHE_SIZE', '0')
+for feature in ('IMAGE_READER', 'PLOT_CRAFTER'):  # Measure the server, not admission control
+    os.environ.setdefault(f'{feature}_MAX_CONCURRENT', '1000')
+
+import magic_learn_backend  # noqa: E402
+
+STUB_UPSTREAM_LATENCY = float(os.getenv('STUB_UPSTREAM_LATENCY', 0.5))
+
+
+class StubPart:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [StubPart(text)]
+
+
+class UpstreamCounter:
+    """Concurrent stub calls, to show how many upstream calls the server keeps in flight"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.in_flight -= 1
+
+
+upstream = UpstreamCounter()
+
+
+class StubModel:
+    """Stands in for genai.GenerativeModel"""
+
+    def generate_content(self, contents, stream=False):
+        with upstream:
+            time.sleep(STUB_UPSTREAM_LATENCY)
+        response = StubResponse('Imagine you are pushing a shopping cart: this is exactly how the concept works.')
+        return iter([response]) if stream else response
+
+
+magic_learn_backend.gemini_clients.model = lambda api_key, model_name: StubModel()
+app = magic_learn_backend.app
+
+
+@app.route('/stub/upstream')
+def stub_upstream_stats():
+    with upstream.lock:
+        stats = {'calls': upstream.calls, 'in_flight': upstream.in_flight, 'peak_in_flight': upstream.peak_in_flight}
+        if magic_learn_backend.request.args.get('reset'):
+            upstream.peak_in_flight = upstream.in_flight
+    return magic_learn_backend.jsonify(stats)
+
+if __name__ == '__main__':
+    # Same settings as magic_learn_backend.py's __main__
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)), debug=False, threaded=True, use_reloader=False)
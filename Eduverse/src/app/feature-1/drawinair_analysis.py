@@ -0,0 +1,165 @@
+"""
+DrawInAir Analysis Helpers
+Vision input preparation: the drawing is single-colour ink on black, usually
+covering a small part of the 950x550 canvas, so the model gets only the ink
+bounding box (plus a margin), scaled to a bounded size and binarized to
+black-on-white as a 1-bit PNG.
+
+Perceptual result cache for /api/drawinair/analyze: students press Analyze
+again and again on the same drawing, so results are reused for canvases whose
+ink looks the same.
+- The hash is the ink mask (any non-black pixel) downsampled to a binary grid
+- Identical grids hit directly; otherwise the closest stored grid within
+  max_distance is a near-duplicate hit. The distance counts inked cells with
+  no inked cell within one cell in the other grid, so redraw jitter, small
+  shifts and stroke width changes cost nothing while a changed digit does
+- LRU eviction with a TTL, plus hit / miss counters
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+INK_THRESHOLD = 40  # Max channel value above which a pixel counts as ink (canvas background is black)
+HASH_GRID = (190, 110)  # (width, height) of the binary grid: 5 px cells on a 950x550 canvas
+CELL_COVERAGE = 0.02  # Fraction of a cell that must be ink for the cell to be set
+NEIGHBOURHOOD = np.ones((3, 3), dtype=np.uint8)  # Shift tolerance of the distance (one cell)
+
+
+def ink_mask(img):
+    """uint8 mask (255 = ink) of a decoded BGR canvas"""
+    mask = np.empty(img.shape[:2], dtype=np.uint8)
+    cv2.threshold(img.max(axis=2), INK_THRESHOLD, 255, cv2.THRESH_BINARY, dst=mask)
+    return mask
+
+
+def ink_grid(mask, grid=HASH_GRID):
+    """Binary (height, width) uint8 grid of an ink mask (1 = inked cell)"""
+    coverage = cv2.resize(mask, grid, interpolation=cv2.INTER_AREA)
+    return (coverage > int(255 * CELL_COVERAGE)).astype(np.uint8)
+
+
+def grid_distance(grid_a, grid_b):
+    """Inked cells of either grid with no inked cell nearby in the other one"""
+    near_a = cv2.dilate(grid_a, NEIGHBOURHOOD)
+    near_b = cv2.dilate(grid_b, NEIGHBOURHOOD)
+    return int(np.count_nonzero(grid_a > near_b) + np.count_nonzero(grid_b > near_a))
+
+
+def prepare_analysis_image(mask, margin=24, max_size=512, min_size=128):
+    """
+    Crop an ink mask to its bounding box plus margin (canvas pixels), scale the
+    long side into [min_size, max_size] and binarize to black ink on white
+    Returns (1-bit PNG bytes, (width, height) sent, (x, y, w, h) crop box)
+    """
+    x, y, w, h = cv2.boundingRect(mask)
+    if w == 0 or h == 0:
+        x, y, w, h = 0, 0, mask.shape[1], mask.shape[0]  # Blank canvas: send it whole
+    else:
+        x0, y0 = max(x - margin, 0), max(y - margin, 0)
+        x1, y1 = min(x + w + margin, mask.shape[1]), min(y + h + margin, mask.shape[0])
+        x, y, w, h = x0, y0, x1 - x0, y1 - y0
+    crop = mask[y:y + h, x:x + w]
+
+    long_side = max(w, h)
+    scale = 1.0
+    if long_side > max_size:
+        scale = max_size / long_side
+    elif long_side < min_size:
+        scale = min_size / long_side
+    if scale != 1.0:
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+    # Low threshold keeps thin strokes that area averaging has faded
+    _, paper = cv2.threshold(crop, 63, 255, cv2.THRESH_BINARY_INV)
+    _, buffer = cv2.imencode('.png', paper, [cv2.IMWRITE_PNG_BILEVEL, 1])
+    return buffer.tobytes(), (paper.shape[1], paper.shape[0]), (x, y, w, h)
+
+
+class AnalysisCache:
+    """Thread-safe LRU + TTL cache of analysis results keyed by ink grid"""
+
+    def __init__(self, max_entries=256, ttl=3600, max_distance=6):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._entries = OrderedDict()  # (namespace, packed grid) -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, grid, namespace=''):
+        """
+        Cached value for grid (or the nearest stored grid within max_distance)
+        in namespace. Returns (value, distance) or (None, None)
+        """
+        key = (namespace, np.packbits(grid).tobytes())
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], 0
+            candidates = [other for other in self._entries if other[0] == namespace] if self.max_distance > 0 else []
+
+        # Near-duplicate scan outside the lock (grids are immutable bytes)
+        best_key, best_distance = None, None
+        for other in candidates:
+            other_grid = np.unpackbits(np.frombuffer(other[1], dtype=np.uint8), count=grid.size).reshape(grid.shape)
+            distance = grid_distance(grid, other_grid)
+            if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                best_key, best_distance = other, distance
+
+        with self._lock:
+            entry = self._entries.get(best_key) if best_key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(best_key)
+            self.near_hits += 1
+            return entry[1], best_distance
+
+    def put(self, grid, value, namespace=''):
+        key = (namespace, np.packbits(grid).tobytes())
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round((self.hits + self.near_hits) / lookups, 4) if lookups else None,
+            }
+
+    def _expire(self, now):
+        # Caller holds self._lock. Entries are in LRU order, not insertion order, so check them all
+        expired = [key for key, (stored_at, _) in self._entries.items() if now - stored_at >= self.ttl]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
@@ -0,0 +1,62 @@
+"""
+DrawInAir Frame Compositor
+Preallocated per-session buffers for the frame pipeline (resize, mirror,
+RGB conversion, canvas blending, RGBA overlay). Every OpenCV call writes into
+an existing buffer through dst=, so a steady-state frame allocates no
+full-frame arrays apart from the decoded input and the encoded output.
+Hand tracking can run on a smaller RGB copy (inference_size): MediaPipe
+returns normalized landmarks, so drawing still happens at full resolution.
+"""
+
+import cv2
+import numpy as np
+
+
+class FrameCompositor:
+    """Reusable frame buffers for one DrawInAir session (use under session.lock)"""
+
+    def __init__(self, shape, inference_size=None):
+        height, width, _ = shape
+        self.size = (width, height)
+        self.inference_size = inference_size if inference_size and inference_size != self.size else None
+        inference_width, inference_height = self.inference_size or self.size
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)  # Mirrored BGR frame
+        self.small = np.empty((inference_height, inference_width, 3), dtype=np.uint8) if self.inference_size else None
+        self.rgb = np.empty((inference_height, inference_width, 3), dtype=np.uint8)  # MediaPipe input
+        self.blended = np.empty((height, width, 3), dtype=np.uint8)
+        self.overlay = np.empty((height, width, 4), dtype=np.uint8)
+
+    def prepare(self, img):
+        """
+        Resize + mirror a decoded BGR frame and build its RGB copy for MediaPipe
+        (downscaled to inference_size when set)
+        Returns (frame, rgb) - both are reused buffers, valid until the next call
+        """
+        if img.shape[1::-1] == self.size:
+            cv2.flip(img, 1, dst=self.frame)
+        else:
+            cv2.resize(img, self.size, dst=self.resized)
+            cv2.flip(self.resized, 1, dst=self.frame)
+
+        if self.inference_size:
+            cv2.resize(self.frame, self.inference_size, dst=self.small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self.small, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        else:
+            cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        return self.frame, self.rgb
+
+    def composite(self, frame, canvas, ink_mask):
+        """
+        Camera feed: dim the frame under the canvas and paint ink pixels on top
+        (same result as the addWeighted / threshold / bitwise_and / bitwise_or chain)
+        """
+        cv2.addWeighted(frame, 0.7, canvas, 1, 0, dst=self.blended)
+        cv2.copyTo(canvas, ink_mask, self.blended)
+        return self.blended
+
+    def overlay_rgba(self, frame, canvas):
+        """Browser overlay: frame blended with the canvas as an opaque 4-channel image"""
+        cv2.addWeighted(frame, 0.7, canvas, 1, 0, dst=self.blended)
+        cv2.cvtColor(self.blended, cv2.COLOR_BGR2BGRA, dst=self.overlay)
+        return self.overlay
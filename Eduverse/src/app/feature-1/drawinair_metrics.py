@@ -0,0 +1,156 @@
+"""
+DrawInAir Frame Metrics
+Per-stage latency histograms for the frame pipelines and frame counters,
+rendered in the Prometheus text exposition format for /metrics.
+- A FrameTimer lives on the request thread and only calls perf_counter
+  between stages; histograms are updated once per frame under one lock
+- Only every Nth frame is timed (sample_every), counters see every frame
+"""
+
+import bisect
+import itertools
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds (30 fps budget = 0.033)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class FrameTimer:
+    """Times consecutive stages of one frame: call mark(stage) at the end of each stage"""
+
+    __slots__ = ('_metrics', '_path', '_started', '_last', '_stages')
+
+    def __init__(self, metrics, path):
+        self._metrics = metrics
+        self._path = path
+        self._started = self._last = time.perf_counter()
+        self._stages = []
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self._stages.append((stage, now - self._last))
+        self._last = now
+
+    def skip(self):
+        """Exclude the time since the last mark (e.g. waiting for the session lock)"""
+        self._last = time.perf_counter()
+
+    def done(self):
+        """Record this frame's stages and total time"""
+        self._metrics.record(self._path, self._stages, time.perf_counter() - self._started)
+
+
+class NullTimer:
+    """Timer for frames that are not sampled"""
+
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def skip(self):
+        pass
+
+    def done(self):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class Histogram:
+    """Cumulative-bucket histogram (caller synchronizes)"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(STAGE_BUCKETS) + 1)  # Last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(STAGE_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class FrameMetrics:
+    """Stage histograms per pipeline path plus frame counters"""
+
+    def __init__(self, sample_every=1):
+        self.sample_every = max(1, int(sample_every))
+        self._frame_counter = itertools.count()
+        self._lock = threading.Lock()
+        self._histograms = {}  # (path, stage) -> Histogram
+        self.frames_processed = {}  # path -> count (all frames, sampled or not)
+        self.frames_dropped = {}  # reason -> count
+
+    def start(self, path):
+        """Timer for the next frame on path (NULL_TIMER if this frame is not sampled)"""
+        if next(self._frame_counter) % self.sample_every:
+            return NULL_TIMER
+        return FrameTimer(self, path)
+
+    def record(self, path, stages, total):
+        with self._lock:
+            for stage, seconds in stages:
+                self._histogram(path, stage).observe(seconds)
+            self._histogram(path, 'total').observe(total)
+
+    def count_processed(self, path):
+        with self._lock:
+            self.frames_processed[path] = self.frames_processed.get(path, 0) + 1
+
+    def count_dropped(self, reason):
+        with self._lock:
+            self.frames_dropped[reason] = self.frames_dropped.get(reason, 0) + 1
+
+    def summary(self):
+        """Mean milliseconds per (path, stage) for JSON stats"""
+        with self._lock:
+            return {
+                f'{path}.{stage}': round(hist.sum * 1000 / hist.count, 3)
+                for (path, stage), hist in sorted(self._histograms.items()) if hist.count
+            }
+
+    def render_prometheus(self):
+        """Stage histograms and frame counters as Prometheus text lines"""
+        with self._lock:
+            histograms = sorted((key, list(hist.counts), hist.sum, hist.count) for key, hist in self._histograms.items())
+            processed = sorted(self.frames_processed.items())
+            dropped = sorted(self.frames_dropped.items())
+
+        lines = [
+            f'# HELP drawinair_frame_stage_seconds Time spent per frame pipeline stage (every {self.sample_every} frame(s) sampled)',
+            '# TYPE drawinair_frame_stage_seconds histogram',
+        ]
+        for (path, stage), counts, total, count in histograms:
+            labels = f'path="{path}",stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip(STAGE_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'drawinair_frame_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'drawinair_frame_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'drawinair_frame_stage_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'drawinair_frame_stage_seconds_count{{{labels}}} {count}')
+
+        lines.append('# HELP drawinair_frames_processed_total Frames processed per pipeline path')
+        lines.append('# TYPE drawinair_frames_processed_total counter')
+        lines.extend(f'drawinair_frames_processed_total{{path="{path}"}} {count}' for path, count in processed)
+        lines.append('# HELP drawinair_frames_dropped_total Frames dropped without processing')
+        lines.append('# TYPE drawinair_frames_dropped_total counter')
+        lines.extend(f'drawinair_frames_dropped_total{{reason="{reason}"}} {count}' for reason, count in dropped)
+        return lines
+
+    def _histogram(self, path, stage):
+        # Caller holds self._lock
+        hist = self._histograms.get((path, stage))
+        if hist is None:
+            hist = self._histograms[(path, stage)] = Histogram()
+        return hist
+
+
+def prometheus_label(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,191 @@
+"""
+DrawInAir Landmark Recordings
+File format shared by the recorder and the replay benchmark
+(benchmarks/record_landmarks.py, benchmarks/replay_benchmark.py).
+A recording is one compressed .npz holding, per frame:
+- landmarks: (N, 21, 2) float32 normalized MediaPipe landmarks (NaN = no hand)
+- labels: MediaPipe handedness code (0 = none, 1 = "Left", 2 = "Right")
+- raw_gestures / gestures: gesture code before and after the GestureLock
+- timestamps: capture time in seconds from the first frame
+- frames (optional): the camera frames as concatenated JPEGs + offsets
+"""
+
+import cv2
+import numpy as np
+
+import gesture_engine
+from drawinair_session import CANVAS_SHAPE
+
+RECORDING_VERSION = 1
+HAND_LABELS = (None, "Left", "Right")
+
+
+class LandmarkRecorder:
+    """Collects one frame at a time and writes a recording"""
+
+    def __init__(self, keep_frames=True, jpeg_quality=90):
+        self.keep_frames = keep_frames
+        self.jpeg_quality = jpeg_quality
+        self._landmarks, self._labels = [], []
+        self._raw_gestures, self._gestures = [], []
+        self._timestamps, self._frames = [], []
+
+    def __len__(self):
+        return len(self._landmarks)
+
+    def add(self, landmarks, hand_label, raw_gesture, gesture, timestamp, frame=None):
+        """Record one frame. landmarks: (21, 2) normalized or None; frame: BGR image or None"""
+        self._landmarks.append(np.full((21, 2), np.nan, dtype=np.float32) if landmarks is None else landmarks)
+        self._labels.append(HAND_LABELS.index(hand_label))
+        self._raw_gestures.append(gesture_engine.GESTURES.index(raw_gesture))
+        self._gestures.append(gesture_engine.GESTURES.index(gesture))
+        self._timestamps.append(timestamp)
+        if self.keep_frames and frame is not None:
+            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            self._frames.append(buffer.tobytes())
+
+    def to_recording(self):
+        frames, frame_offsets = None, None
+        if self._frames and len(self._frames) == len(self):
+            frames = np.frombuffer(b''.join(self._frames), dtype=np.uint8)
+            frame_offsets = np.cumsum([0] + [len(frame) for frame in self._frames], dtype=np.int64)
+        return Recording(
+            np.array(self._landmarks, dtype=np.float32).reshape(-1, 21, 2),
+            np.array(self._labels, dtype=np.uint8),
+            np.array(self._raw_gestures, dtype=np.int8),
+            np.array(self._gestures, dtype=np.int8),
+            np.array(self._timestamps, dtype=np.float64),
+            frames, frame_offsets
+        )
+
+    def save(self, path):
+        self.to_recording().save(path)
+
+
+class Recording:
+    """A loaded recording (arrays as attributes, frames decoded on demand)"""
+
+    def __init__(self, landmarks, labels, raw_gestures, gestures, timestamps, frames=None, frame_offsets=None):
+        self.landmarks = landmarks
+        self.labels = labels
+        self.raw_gestures = raw_gestures
+        self.gestures = gestures
+        self.timestamps = timestamps
+        self._frames = frames
+        self._frame_offsets = frame_offsets
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    @property
+    def has_frames(self):
+        return self._frames is not None
+
+    def hand(self, idx):
+        """(landmarks (21, 2) normalized or None, MediaPipe hand label) for one frame"""
+        label = HAND_LABELS[self.labels[idx]]
+        if label is None or np.isnan(self.landmarks[idx, 0, 0]):
+            return None, None
+        return self.landmarks[idx], label
+
+    def encoded_frame(self, idx):
+        """JPEG bytes of one frame (as a browser would upload it)"""
+        return self._frames[self._frame_offsets[idx]:self._frame_offsets[idx + 1]]
+
+    def frame(self, idx):
+        return cv2.imdecode(self.encoded_frame(idx), cv2.IMREAD_COLOR)
+
+    def save(self, path):
+        arrays = {
+            'version': np.array(RECORDING_VERSION),
+            'landmarks': self.landmarks,
+            'labels': self.labels,
+            'raw_gestures': self.raw_gestures,
+            'gestures': self.gestures,
+            'timestamps': self.timestamps,
+        }
+        if self.has_frames:
+            arrays['frames'] = self._frames
+            arrays['frame_offsets'] = self._frame_offsets
+        np.savez_compressed(path, **arrays)
+
+
+def load_recording(path):
+    with np.load(path) as data:
+        if int(data['version']) != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version {int(data['version'])}")
+        return Recording(
+            data['landmarks'], data['labels'], data['raw_gestures'], data['gestures'], data['timestamps'],
+            data['frames'] if 'frames' in data else None,
+            data['frame_offsets'] if 'frame_offsets' in data else None
+        )
+
+
+# Finger poses for the synthetic recording: (thumb, index, middle, ring, pinky)
+SYNTHETIC_SCRIPT = [
+    ("Moving", (1, 1, 1, 0, 0)),
+    ("Drawing", (1, 1, 0, 0, 0)),
+    ("None", None),
+    ("Drawing", (1, 1, 0, 0, 0)),
+    ("Moving", (1, 1, 1, 0, 0)),
+    ("Erasing", (1, 0, 1, 0, 0)),
+    ("Analyzing", (0, 1, 1, 0, 0)),
+    ("None", (0, 0, 0, 0, 0)),
+    ("Drawing", (1, 1, 0, 0, 0)),
+    ("Clearing", (1, 0, 0, 0, 1)),
+]
+
+
+def synthetic_hand(fingers, center, hand_size=120):
+    """
+    (21, 2) normalized landmarks of a mirrored right hand (MediaPipe label "Left")
+    with the given fingers raised, wrist at center (canvas pixels)
+    """
+    height, width, _ = CANVAS_SHAPE
+    wx, wy = center
+    points = np.zeros((21, 2), dtype=np.float32)
+    points[0] = (wx, wy)
+    # Thumb (1-4) fans out to +x when raised, folds across the palm when not
+    points[1] = (wx + 0.20 * hand_size, wy - 0.25 * hand_size)
+    points[2] = (wx + 0.35 * hand_size, wy - 0.45 * hand_size)
+    thumb_dx = 0.75 if fingers[0] else 0.20
+    points[3] = (wx + (0.35 + thumb_dx) / 2 * hand_size, wy - 0.55 * hand_size)
+    points[4] = (wx + thumb_dx * hand_size, wy - 0.65 * hand_size)
+    # Fingers: mcp, pip, dip, tip columns; raised tips sit well above the pip
+    for finger, base in enumerate((5, 9, 13, 17)):
+        fx = wx + (0.25 - 0.17 * finger) * hand_size
+        raised = fingers[finger + 1]
+        points[base] = (fx, wy - 1.0 * hand_size)
+        points[base + 1] = (fx, wy - 1.3 * hand_size)
+        points[base + 2] = (fx, wy - (1.6 if raised else 1.25) * hand_size)
+        points[base + 3] = (fx, wy - (1.85 if raised else 1.15) * hand_size)
+    return points / (width, height)
+
+
+def synthetic_recording(frames_per_gesture=30, loops=1, seed=0):
+    """
+    Scripted gesture sequence (SYNTHETIC_SCRIPT) with a hand sweeping across the
+    canvas and a little landmark jitter. Needs no camera or MediaPipe; frames are
+    plain backgrounds. Expected gestures come from the script, locked through GestureLock
+    """
+    height, width, _ = CANVAS_SHAPE
+    rng = np.random.default_rng(seed)
+    recorder = LandmarkRecorder(keep_frames=True)
+    lock = gesture_engine.GestureLock()
+    background = np.full(CANVAS_SHAPE, 40, dtype=np.uint8)
+    frame_idx = 0
+    for _ in range(loops):
+        for gesture, fingers in SYNTHETIC_SCRIPT:
+            for step in range(frames_per_gesture):
+                landmarks = None
+                if fingers is not None:
+                    progress = step / max(frames_per_gesture - 1, 1)
+                    center = (250 + 400 * progress, 420 + 40 * np.sin(progress * np.pi * 2))
+                    landmarks = synthetic_hand(fingers, center)
+                    landmarks += rng.normal(0, 0.6, size=landmarks.shape).astype(np.float32) / (width, height)
+                    landmarks = landmarks.astype(np.float32)
+                recorder.add(landmarks, "Left" if fingers is not None else None,
+                             gesture, lock.update(gesture), frame_idx / 30, background)
+                frame_idx += 1
+
+    return recorder.to_recording()
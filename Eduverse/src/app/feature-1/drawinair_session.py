@@ -0,0 +1,363 @@
+"""
+DrawInAir Session Registry
+Each drawer gets their own canvas, stroke cursor, gesture lock and MediaPipe
+tracker, keyed by a session id sent by the client.
+Live sessions are bounded: idle sessions expire and the least recently used
+session is evicted when the cap is reached.
+The drawing itself is stored as vector strokes; the raster canvas is only a
+cache, dropped for sessions that stop sending frames.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from drawinair_compositor import FrameCompositor
+from gesture_engine import GestureLock
+from stroke_store import StrokeStore
+
+# Canvas size used by every DrawInAir path (height, width, channels)
+CANVAS_SHAPE = (550, 950, 3)
+
+# Session used when the client does not send a session id (old frontends)
+DEFAULT_SESSION_ID = 'default'
+
+# Registry limits (override in .env)
+MAX_SESSIONS = int(os.getenv('DRAWINAIR_MAX_SESSIONS', 32))
+SESSION_IDLE_TIMEOUT = float(os.getenv('DRAWINAIR_SESSION_IDLE_TIMEOUT', 300))  # seconds
+RASTER_IDLE_TIMEOUT = float(os.getenv('DRAWINAIR_RASTER_IDLE_TIMEOUT', 60))  # seconds before raster cache is dropped
+EVICTION_SWEEP_INTERVAL = 30  # seconds between idle sweeps
+
+# Hand tracking input width (0 = full canvas resolution). Height keeps the canvas aspect ratio
+INFERENCE_WIDTH = int(os.getenv('DRAWINAIR_INFERENCE_WIDTH', 0))
+
+
+def inference_size_for(width, shape=CANVAS_SHAPE):
+    """(width, height) of the hand tracking input for a given width, or None for full resolution"""
+    if width <= 0 or width >= shape[1]:
+        return None
+    return width, max(2, round(width * shape[0] / shape[1]))
+
+
+class SessionClosedError(Exception):
+    """The session was evicted or removed; look it up in the registry again"""
+
+
+# Stroke colours (BGR)
+DRAW_COLOR = (255, 0, 255)
+ERASE_COLOR = (0, 0, 0)
+
+
+class DrawInAirSession:
+    """All per-drawer DrawInAir state (previously module-level globals)"""
+
+    def __init__(self, session_id, tracker_factory):
+        self.session_id = session_id
+        self.lock = threading.Lock()  # Serializes frames of this session
+        self._tracker_factory = tracker_factory
+
+        self.strokes = StrokeStore()  # Source of truth for the drawing
+        self._canvas = None  # Raster cache of self.strokes (see imgCanvas)
+        self._ink_mask = None
+        self.compositor = None  # FrameCompositor, created on the first frame
+        self.mphands = None
+        self.current_gesture = "None"
+        self.analysis_result = ""
+        self.p1, self.p2 = 0, 0  # Drawing position tracker
+
+        # SMART GESTURE LOCKING state
+        self.gesture_lock = GestureLock()
+
+        # Canvas changes made by the current frame (sent in landmarks-only mode)
+        self.new_segments = []  # (x1, y1, x2, y2, thickness, is_eraser)
+        self.canvas_cleared = False
+
+        # Frame counters (exported on /metrics)
+        self.frames_processed = 0
+        self.frames_dropped = 0
+
+        self.created_at = time.monotonic()
+        self.last_seen = self.created_at
+        self.closed = False  # Set once evicted / removed; the registry hands out a fresh session instead
+
+    @property
+    def imgCanvas(self):
+        """950x550 BGR raster of the strokes (rendered on first access after a release)"""
+        if self._canvas is None:
+            self._render_raster()
+        return self._canvas
+
+    @property
+    def ink_mask(self):
+        """255 where the canvas has ink, 0 elsewhere"""
+        if self._ink_mask is None:
+            self._render_raster()
+        return self._ink_mask
+
+    @property
+    def has_raster(self):
+        return self._canvas is not None
+
+    def touch(self):
+        """Mark session as recently used"""
+        self.last_seen = time.monotonic()
+
+    def idle_seconds(self, now=None):
+        return (now if now is not None else time.monotonic()) - self.last_seen
+
+    def get_tracker(self):
+        """Return this session's MediaPipe tracker, creating it on first use (never after close)"""
+        if self.closed:
+            raise SessionClosedError(self.session_id)
+        if self.mphands is None:
+            self.mphands = self._tracker_factory()
+        return self.mphands
+
+    def get_compositor(self):
+        """Return this session's preallocated frame buffers, creating them on first use"""
+        if self.compositor is None:
+            self.compositor = FrameCompositor(CANVAS_SHAPE, inference_size=inference_size_for(INFERENCE_WIDTH))
+        return self.compositor
+
+    def begin_frame(self):
+        """Forget the canvas changes recorded for the previous frame"""
+        self.new_segments = []
+        self.canvas_cleared = False
+
+    def draw_segment(self, pt1, pt2, color, thickness):
+        """Record one stroke segment, draw it on the raster cache and queue it for the client"""
+        self.strokes.add_segment(pt1, pt2, color, thickness)
+        if self._canvas is not None:
+            cv2.line(img=self._canvas, pt1=pt1, pt2=pt2, color=color, thickness=thickness)
+            cv2.line(img=self._ink_mask, pt1=pt1, pt2=pt2, color=0 if color == ERASE_COLOR else 255, thickness=thickness)
+        self.new_segments.append((pt1[0], pt1[1], pt2[0], pt2[1], thickness, color == ERASE_COLOR))
+
+    def apply_gesture(self, points, draw_thickness, erase_thickness, dot_on_start=False):
+        """
+        Execute current_gesture for one frame: draw / erase at the fingertip,
+        clear the canvas or lift the pen. points is the (21, 2) hand or None
+        dot_on_start=True also draws the first point of a stroke (browser path)
+        """
+        gesture = self.current_gesture
+        if gesture in ("Drawing", "Erasing") and points is not None:
+            if gesture == "Drawing":
+                tip_id, color, thickness = 8, DRAW_COLOR, draw_thickness  # Index fingertip
+            else:
+                tip_id, color, thickness = 12, ERASE_COLOR, erase_thickness  # Middle fingertip
+            cx, cy = points[tip_id].tolist()
+            if self.p1 == 0 and self.p2 == 0:
+                self.p1, self.p2 = cx, cy
+                if dot_on_start:
+                    self.draw_segment((cx, cy), (cx, cy), color, thickness)
+            else:
+                self.draw_segment((self.p1, self.p2), (cx, cy), color, thickness)
+            self.p1, self.p2 = cx, cy
+        elif gesture == "Clearing":
+            self.clear_canvas()
+            self.gesture_lock.reset()  # Unlock after clearing
+        else:
+            if gesture == "Analyzing":
+                self.gesture_lock.reset()  # Unlock after analyzing
+            self.p1, self.p2 = 0, 0  # Moving / no gesture lifts the pen
+
+    def clear_canvas(self):
+        """Wipe the drawing (raster cleared in place) and reset the stroke cursor"""
+        self.strokes.clear()
+        if self._canvas is not None:
+            self._canvas.fill(0)
+            self._ink_mask.fill(0)
+        self.p1, self.p2 = 0, 0
+        self.new_segments = []
+        self.canvas_cleared = True
+
+    def undo(self):
+        """Remove the last stroke and re-render the raster. Returns False if nothing to undo"""
+        if not self.strokes.undo():
+            return False
+        if self._canvas is not None:
+            self._render_raster()
+        self.p1, self.p2 = 0, 0
+        return True
+
+    def release_raster(self):
+        """Drop the raster cache and frame buffers (strokes are kept)"""
+        self._canvas = None
+        self._ink_mask = None
+        self.compositor = None
+
+    def _render_raster(self):
+        if self._canvas is None:
+            self._canvas = np.zeros(shape=CANVAS_SHAPE, dtype=np.uint8)
+            self._ink_mask = np.zeros(shape=CANVAS_SHAPE[:2], dtype=np.uint8)
+        else:
+            self._canvas.fill(0)
+            self._ink_mask.fill(0)
+        self.strokes.render(self._canvas, self._ink_mask, erase_color=ERASE_COLOR)
+
+    def reset(self):
+        """Reset drawing and gesture state (tracker is kept)"""
+        self.clear_canvas()
+        self.current_gesture = "None"
+        self.gesture_lock.reset()
+
+    def close(self):
+        """Release the MediaPipe tracker and frame buffers; the session cannot track hands afterwards"""
+        self.closed = True
+        if self.mphands is not None:
+            self.mphands.close()
+            self.mphands = None
+        self.release_raster()
+
+
+class SessionRegistry:
+    """
+    Thread-safe LRU registry of DrawInAir sessions
+    - Sessions idle longer than idle_timeout are dropped
+    - When max_sessions is reached, the least recently used session is evicted
+    """
+
+    def __init__(self, tracker_factory, max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT, on_close=None):
+        self._tracker_factory = tracker_factory
+        self._on_close = on_close  # Called with each session that is removed or evicted
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def get(self, session_id, create=True):
+        """Return the session for session_id (creating it if allowed), or None"""
+        evicted = []
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sweep >= EVICTION_SWEEP_INTERVAL:
+                evicted.extend(self._pop_idle(now))
+                self._release_idle_rasters(now)
+                self._last_sweep = now
+
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            elif create:
+                if len(self._sessions) >= self.max_sessions:
+                    evicted.extend(self._pop_idle(now))
+                while len(self._sessions) >= self.max_sessions:
+                    _, lru_session = self._sessions.popitem(last=False)
+                    self.evicted_lru += 1
+                    evicted.append(lru_session)
+                session = DrawInAirSession(session_id, self._tracker_factory)
+                self._sessions[session_id] = session
+
+            if session is not None:
+                session.touch()
+
+        # Close trackers outside the registry lock (may wait for an in-flight frame)
+        for old_session in evicted:
+            self._close_session(old_session)
+        return session
+
+    @contextmanager
+    def locked(self, session):
+        """
+        Hold session.lock for one frame. If the session was evicted while the
+        caller waited, the live session registered under the same id (created
+        if needed) is locked and yielded instead, so no tracker is ever created
+        on a closed session
+        """
+        while True:
+            session.lock.acquire()
+            if not session.closed:
+                break
+            session.lock.release()
+            session = self.get(session.session_id)
+        try:
+            yield session
+        finally:
+            session.lock.release()
+
+    def remove(self, session_id):
+        """Drop a session and release its tracker. Returns True if it existed"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._close_session(session)
+        return True
+
+    def evict_idle(self):
+        """Drop every session idle longer than idle_timeout"""
+        with self._lock:
+            evicted = self._pop_idle(time.monotonic())
+        for session in evicted:
+            self._close_session(session)
+        return len(evicted)
+
+    def close_all(self):
+        """Release every session (used on shutdown)"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._close_session(session)
+
+    def session_ids(self):
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def sessions(self):
+        """Snapshot of the live sessions, least recently used first"""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'live_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_timeout_seconds': self.idle_timeout,
+                'evicted_idle': self.evicted_idle,
+                'evicted_lru': self.evicted_lru,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _pop_idle(self, now):
+        # Caller holds self._lock. OrderedDict is in LRU order, so stop at the first active session
+        evicted = []
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.idle_seconds(now) < self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            self.evicted_idle += 1
+            evicted.append(session)
+        return evicted
+
+    def _release_idle_rasters(self, now):
+        # Caller holds self._lock. Skip sessions that are busy with a frame right now
+        for session in self._sessions.values():
+            if not session.has_raster or session.idle_seconds(now) < RASTER_IDLE_TIMEOUT:
+                continue
+            if session.lock.acquire(blocking=False):
+                try:
+                    session.release_raster()
+                finally:
+                    session.lock.release()
+
+    def _close_session(self, session):
+        try:
+            with session.lock:
+                session.close()
+            if self._on_close is not None:
+                self._on_close(session)
+        except Exception as e:
+            print(f"⚠️ Error closing DrawInAir session {session.session_id}: {e}")
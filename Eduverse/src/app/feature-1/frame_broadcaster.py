@@ -0,0 +1,242 @@
+"""
+Frame Broadcaster
+One producer thread publishes the latest frame into a shared slot and any
+number of subscribers (MJPEG viewers) read from it.
+- The producer runs only while someone is watching (stops after idle_timeout)
+- Pacing is deadline based: processing time counts against the frame budget
+- Slow subscribers skip to the newest frame instead of queueing old ones
+- With an encoder, frames are encoded once per sequence number by the first
+  subscriber that needs them and the bytes are shared with the others
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class JpegEncoder:
+    """
+    JPEG settings for a stream: quality, chroma subsampling, optional downscale
+    and progressive / optimized Huffman output (not thread-safe: reuses its resize buffer)
+    """
+
+    SAMPLING_FACTORS = {
+        '444': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444,
+        '422': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_422,
+        '420': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+    }
+
+    def __init__(self, quality=80, width=0, progressive=False, optimize=False, subsampling='420'):
+        self.quality = min(max(int(quality), 1), 100)
+        self.width = max(int(width), 0)  # 0 = keep the frame size
+        self.progressive = bool(progressive)
+        self.optimize = bool(optimize)
+        self.subsampling = subsampling if subsampling in self.SAMPLING_FACTORS else None
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        if progressive:
+            self.params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+        if optimize:
+            self.params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        if self.subsampling:
+            self.params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, self.SAMPLING_FACTORS[self.subsampling]]
+        self._resized = None
+
+    def encode(self, frame):
+        """BGR frame -> JPEG bytes (None if encoding fails)"""
+        height, width = frame.shape[:2]
+        if self.width and self.width < width:
+            size = (self.width, max(2, round(height * self.width / width)))
+            if self._resized is None or self._resized.shape[1::-1] != size:
+                self._resized = np.empty((size[1], size[0]) + frame.shape[2:], dtype=frame.dtype)
+            cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+            frame = self._resized
+        ret, buffer = cv2.imencode('.jpg', frame, self.params)
+        return buffer.tobytes() if ret else None
+
+    def settings(self):
+        return {
+            'quality': self.quality,
+            'width': self.width or None,
+            'progressive': self.progressive,
+            'optimize': self.optimize,
+            'subsampling': self.subsampling,
+        }
+
+
+class FrameBroadcaster:
+    """Latest-frame fan-out from a single producer thread"""
+
+    def __init__(self, produce_frame, target_fps=30, idle_timeout=5.0, retry_delay=0.1, on_stop=None,
+                 encoder=None, name='frame-broadcaster'):
+        self._produce_frame = produce_frame  # () -> frame, or None if no frame is available
+        self.encoder = encoder  # Optional JpegEncoder: frames are published raw and encoded on demand
+        self.frame_interval = 1.0 / max(target_fps, 1)
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        self._on_stop = on_stop  # Called from the producer thread when it exits
+        self._name = name
+
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._restart = False  # A viewer subscribed while the producer was shutting down
+        self._epoch = 0  # Bumped by stop(): subscribers from an older epoch disconnect
+        self._subscribers = 0
+        self._frame = None
+        self._seq = 0
+        self._last_subscriber_at = time.monotonic()
+
+        # Encode-once cache: bytes of the last encoded sequence number
+        self._encode_lock = threading.Lock()
+        self._encoded_seq = 0
+        self._encoded = None
+        self.frames_encoded = 0
+        self.encode_cache_hits = 0
+        self.encode_seconds = 0.0
+
+        self.frames_published = 0
+        self.frames_failed = 0
+        self.deadline_misses = 0
+        self.last_produce_seconds = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def latest(self):
+        """(sequence number, encoded frame) of the newest frame (frame is None before the first)"""
+        with self._condition:
+            return self._seq, self._frame
+
+    def subscribe(self, wait_timeout=1.0):
+        """
+        Generator of encoded frames for one viewer. Starts the producer if needed
+        Yields each new frame at most once; stops when the producer stops
+        (frames that fail to encode are skipped)
+        """
+        with self._condition:
+            self._subscribers += 1
+            self._last_subscriber_at = time.monotonic()
+            self._ensure_running()
+            epoch = self._epoch
+            last_seq = self._seq if self._frame is None else self._seq - 1  # Send the current frame first
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._seq > last_seq or self._epoch != epoch, timeout=wait_timeout)
+                    if self._epoch != epoch:
+                        return
+                    if self._seq == last_seq:
+                        continue
+                    last_seq, frame = self._seq, self._frame
+                if self.encoder is not None:
+                    frame = self._encode(last_seq, frame)
+                    if frame is None:
+                        continue
+                yield frame
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+                self._last_subscriber_at = time.monotonic()
+
+    def stop(self, timeout=2.0):
+        """Stop the producer thread and wake every subscriber"""
+        with self._condition:
+            thread = self._thread
+            self._stopping = True
+            self._restart = False
+            self._epoch += 1
+            self._condition.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'running': self.running,
+                'subscribers': self._subscribers,
+                'sequence': self._seq,
+                'target_fps': round(1.0 / self.frame_interval, 2),
+                'frames_published': self.frames_published,
+                'frames_failed': self.frames_failed,
+                'deadline_misses': self.deadline_misses,
+                'last_produce_ms': round(self.last_produce_seconds * 1000, 2),
+                'frames_encoded': self.frames_encoded,
+                'encode_cache_hits': self.encode_cache_hits,
+                'mean_encode_ms': round(self.encode_seconds * 1000 / self.frames_encoded, 2) if self.frames_encoded else None,
+                'encoder': self.encoder.settings() if self.encoder is not None else None,
+            }
+
+    def _encode(self, seq, frame):
+        # The first subscriber to reach seq encodes it; the others wait and reuse the bytes
+        with self._encode_lock:
+            if self._encoded_seq == seq:
+                self.encode_cache_hits += 1
+                return self._encoded
+            started = time.perf_counter()
+            encoded = self.encoder.encode(frame)
+            self.encode_seconds += time.perf_counter() - started
+            self.frames_encoded += 1
+            self._encoded_seq, self._encoded = seq, encoded
+            return encoded
+
+    def _ensure_running(self):
+        # Caller holds self._condition
+        if self._thread is not None:
+            self._restart = True  # In case the producer is on its way out (idle or stopping)
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        deadline = time.monotonic()
+        try:
+            while True:
+                with self._condition:
+                    idle = self._subscribers == 0 and time.monotonic() - self._last_subscriber_at >= self.idle_timeout
+                    if self._stopping or idle:
+                        break
+
+                started = time.monotonic()
+                try:
+                    frame = self._produce_frame()
+                except Exception as e:
+                    print(f"Error producing frame: {e}")
+                    frame = None
+                self.last_produce_seconds = time.monotonic() - started
+
+                if frame is None:
+                    self.frames_failed += 1
+                    time.sleep(self.retry_delay)
+                    deadline = time.monotonic()
+                    continue
+
+                with self._condition:
+                    self._frame = frame
+                    self._seq += 1
+                    self.frames_published += 1
+                    self._condition.notify_all()
+
+                # Sleep only for what is left of this frame's budget
+                deadline += self.frame_interval
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                else:
+                    self.deadline_misses += 1
+                    deadline = time.monotonic()  # Fell behind: restart the schedule instead of bursting
+        finally:
+            if self._on_stop is not None:
+                try:
+                    self._on_stop()
+                except Exception as e:
+                    print(f"Error stopping frame producer: {e}")
+            with self._condition:
+                self._thread = None
+                self._frame = None
+                if self._restart and self._subscribers > 0:
+                    self._ensure_running()  # A viewer arrived while this producer was shutting down
+                self._restart = False
@@ -0,0 +1,82 @@
+"""
+Per-Key Gemini Clients
+genai.configure() swaps process-global SDK state and drops the cached client,
+so calling it per request both rebuilds the gRPC channel every time and lets
+one thread change the API key under another thread's call. Instead, each API
+key gets one long-lived GenerativeServiceClient (its own gRPC channel with
+keepalive pings, so idle connections stay open) and each (key, model) pair
+one GenerativeModel bound to that client. Both are safe to share across
+threads.
+"""
+
+import threading
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+from google.api_core import gapic_v1
+from google.auth import api_key as api_key_credentials
+from google.generativeai.client import USER_AGENT
+
+KEEPALIVE_OPTIONS = (
+    ('grpc.keepalive_time_ms', 30000),  # Ping idle connections every 30 s so they aren't dropped
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+)
+
+
+class GeminiClients:
+    """Thread-safe cache of per-key clients and per-(key, model) GenerativeModel instances"""
+
+    def __init__(self, keepalive=True):
+        self.keepalive = keepalive
+        self._clients = {}  # api_key -> GenerativeServiceClient
+        self._models = {}  # (api_key, model_name) -> GenerativeModel
+        self._lock = threading.Lock()
+        self.clients_created = 0
+
+    def model(self, api_key, model_name):
+        """GenerativeModel for model_name that always calls with api_key"""
+        model = self._models.get((api_key, model_name))
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get((api_key, model_name))
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                # The SDK has no public per-model client option; this is the attribute it fills lazily
+                model._client = self._client(api_key)
+                self._models[(api_key, model_name)] = model
+            return model
+
+    def warm(self, api_keys):
+        """Create clients (and their channels) up front instead of on the first request"""
+        with self._lock:
+            for api_key in api_keys:
+                self._client(api_key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'models': len(self._models),
+                'clients_created': self.clients_created,
+                'keepalive': self.keepalive,
+            }
+
+    def _client(self, api_key):
+        # Caller holds self._lock
+        client = self._clients.get(api_key)
+        if client is None:
+            transport = glm.GenerativeServiceClient.get_transport_class('grpc')
+            channel = transport.create_channel(
+                credentials=api_key_credentials.Credentials(api_key),
+                options=list(KEEPALIVE_OPTIONS) if self.keepalive else None,
+            )
+            client = glm.GenerativeServiceClient(
+                transport=transport(channel=channel),
+                client_info=gapic_v1.client_info.ClientInfo(user_agent=f'{USER_AGENT}/{genai.__version__}'),
+            )
+            self._clients[api_key] = client
+            self.clients_created += 1
+        return client
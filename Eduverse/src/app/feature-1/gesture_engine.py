@@ -0,0 +1,170 @@
+"""
+DrawInAir Gesture Engine
+One set of finger and gesture rules for every DrawInAir path, working on
+(21, 2) NumPy landmark arrays in canvas pixels:
+- Handedness-aware thumb detection (mirrored camera view)
+- Finger clearance relative to hand size
+- Lookup-table gesture classification, vectorized for batches of frames
+- GestureLock: the lock/unlock hysteresis state machine, one per session
+"""
+
+import numpy as np
+
+GESTURES = ("None", "Drawing", "Moving", "Erasing", "Clearing", "Analyzing")
+NONE, DRAWING, MOVING, ERASING, CLEARING, ANALYZING = range(len(GESTURES))
+PRIMARY_GESTURES = ("Drawing", "Moving", "Erasing")  # Gestures that can lock
+
+# SMART GESTURE LOCKING thresholds
+LOCK_THRESHOLD = 3  # Frames needed to lock into a gesture
+UNLOCK_THRESHOLD = 3  # Frames needed to unlock (REDUCED from 10 for instant response)
+INTENTIONAL_SWITCH_THRESHOLD = 2  # Quick switch for intentional gesture changes
+
+# Landmark ids
+WRIST, THUMB_MCP, THUMB_TIP, MIDDLE_MCP = 0, 2, 4, 9
+FINGER_TIPS = np.array([8, 12, 16, 20])  # Index, Middle, Ring, Pinky
+FINGER_PIPS = np.array([6, 10, 14, 18])  # Middle joints
+FINGERTIP_IDS = [4, 8, 12, 16, 20]  # Thumb, Index, Middle, Ring, Pinky
+
+THUMB_CLEARANCE = 0.15  # Fraction of |thumb base - wrist| the thumb tip must clear
+FINGER_CLEARANCE = 0.15  # Fraction of hand size a fingertip must rise above its pip
+MIN_HAND_SIZE = 50  # Hand sizes below this are unreliable...
+FALLBACK_HAND_SIZE = 100  # ...so use a reasonable default
+
+
+def _build_gesture_table():
+    """Gesture code for each of the 32 finger patterns (bit i = finger i up, thumb = bit 0)"""
+    table = np.full(32, NONE, dtype=np.int8)
+    for pattern in range(32):
+        f = [(pattern >> i) & 1 for i in range(5)]
+        total = sum(f)
+        if total == 2 and f[0] and f[1]:
+            table[pattern] = DRAWING
+        elif total == 3 and f[0] and f[1] and f[2]:
+            table[pattern] = MOVING
+        elif total == 2 and f[0] and f[2]:
+            table[pattern] = ERASING
+        elif total == 2 and f[0] and f[4]:
+            table[pattern] = CLEARING
+        elif total == 2 and not f[0] and f[1] and f[2]:
+            table[pattern] = ANALYZING
+    return table
+
+
+GESTURE_TABLE = _build_gesture_table()
+FINGER_BITS = np.array([1, 2, 4, 8, 16], dtype=np.int16)
+
+
+def is_right_hand(hand_label):
+    """
+    For the MIRRORED camera view (flipCode=1), MediaPipe labels are OPPOSITE:
+    showing your RIGHT hand, MediaPipe sees "Left", so the label is inverted
+    """
+    return hand_label == "Left"
+
+
+def fingers_up_batch(landmarks, right_hand):
+    """
+    Finger states for a batch of hands
+    landmarks: (N, 21, 2) pixel coordinates, right_hand: (N,) bool (actual hand)
+    Returns (N, 5) int8 array: thumb, index, middle, ring, pinky (1 = up)
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    right_hand = np.asarray(right_hand, dtype=bool)
+    x, y = landmarks[..., 0], landmarks[..., 1]
+
+    # INDEPENDENT THUMB LOGIC: right thumb extends to +X, left thumb to -X
+    thumb_margin = np.abs(x[:, THUMB_MCP] - x[:, WRIST]) * THUMB_CLEARANCE
+    thumb_up = np.where(
+        right_hand,
+        x[:, THUMB_TIP] > x[:, THUMB_MCP] + thumb_margin,
+        x[:, THUMB_TIP] < x[:, THUMB_MCP] - thumb_margin
+    )
+
+    # ADAPTIVE FINGER DETECTION: clearance proportional to hand size
+    hand_size = np.abs(y[:, WRIST] - y[:, MIDDLE_MCP])
+    hand_size = np.where(hand_size < MIN_HAND_SIZE, FALLBACK_HAND_SIZE, hand_size)
+    fingers = (y[:, FINGER_PIPS] - y[:, FINGER_TIPS]) > (hand_size * FINGER_CLEARANCE)[:, None]
+
+    return np.concatenate([thumb_up[:, None], fingers], axis=1).astype(np.int8)
+
+
+def classify_batch(landmarks, right_hand):
+    """Raw gesture codes (indexes into GESTURES) for a batch of hands"""
+    return GESTURE_TABLE[fingers_up_batch(landmarks, right_hand) @ FINGER_BITS]
+
+
+def fingers_up(points, hand_label):
+    """Finger states [thumb, index, middle, ring, pinky] for one (21, 2) hand, [] without a hand"""
+    if points is None or hand_label is None:
+        return []
+    return fingers_up_batch(points[None], [is_right_hand(hand_label)])[0].tolist()
+
+
+def classify(fingers):
+    """Raw gesture name for one hand's finger states ("None" without a full hand)"""
+    if len(fingers) != 5:
+        return "None"
+    pattern = sum(bit << i for i, bit in enumerate(fingers))
+    return GESTURES[GESTURE_TABLE[pattern]]
+
+
+class GestureLock:
+    """
+    INTELLIGENT GESTURE DETECTION with MODE LOCKING
+    Once you start drawing, stay locked in drawing mode unless you clearly change gesture
+    """
+
+    def __init__(self):
+        self.mode = None  # Locks to Drawing/Moving/Erasing to prevent interruption
+        self.counter = 0  # Frames spent building / leaving the lock
+
+    def reset(self):
+        self.mode = None
+        self.counter = 0
+
+    def update(self, detected):
+        """Feed one frame's raw gesture, return the gesture to act on"""
+        if self.mode is None:
+            # Not locked yet - need consistent gesture to lock
+            if detected in PRIMARY_GESTURES:
+                self.counter += 1
+                if self.counter >= LOCK_THRESHOLD:
+                    self.mode = detected
+            else:
+                self.counter = 0
+            return detected  # Use detected gesture while building lock
+
+        if detected == self.mode:
+            # Still doing the same gesture - stay locked
+            self.counter = 0
+            return self.mode
+
+        if detected in PRIMARY_GESTURES:
+            # Drawing <-> Moving, Drawing -> Erasing and any switch away from
+            # Moving/Erasing are clearly intentional, not accidental flicker
+            intentional = (self.mode in ("Moving", "Erasing") or
+                           (self.mode == "Drawing" and detected in ("Moving", "Erasing")))
+            self.counter += 1
+            threshold = INTENTIONAL_SWITCH_THRESHOLD if intentional else UNLOCK_THRESHOLD
+            if self.counter >= threshold:
+                self.mode = detected
+                self.counter = 0
+                return detected
+            # Show new gesture immediately for intentional switches, else hold the lock
+            return detected if intentional else self.mode
+
+        if detected in ("Clearing", "Analyzing"):
+            # Special gestures override lock immediately
+            self.reset()
+            return detected
+
+        if detected == "None":
+            # Hand not detected or resting - unlock after a delay
+            self.counter += 1
+            if self.counter >= UNLOCK_THRESHOLD:
+                self.reset()
+                return "None"
+            return self.mode  # Stay in locked mode briefly
+
+        # Unknown state - keep current lock
+        return self.mode
@@ -0,0 +1,43 @@
+"""
+Gunicorn settings for the Magic Learn backend (production entry point)
+
+    gunicorn -c gunicorn.conf.py magic_learn_backend:app
+
+One worker process: DrawInAir sessions, the camera feed, the hand tracking
+pool, the API key pools and the in-memory caches all live in process memory,
+so extra workers would split them (and each would open the camera). Requests
+are served by a thread pool (gthread) instead: Gemini calls, SSE streams,
+MJPEG viewers and WebSockets block in I/O that releases the GIL, and CPU-heavy
+hand tracking can move to worker processes with DRAWINAIR_HAND_WORKERS.
+
+Not a cooperative (gevent) worker: DrawInAir needs real threads. OpenCV /
+MediaPipe work in the request handlers runs in parallel only because it
+releases the GIL on native threads, and the camera capture thread and the
+hand tracking pool's multiprocessing queues block in native calls that would
+stall a gevent hub. So every request here holds one OS thread and
+GUNICORN_THREADS caps how many are in flight. Image Reader and Plot Crafter,
+which mostly wait on Gemini, are served by the gevent instance instead
+(gunicorn_llm.conf.py, magic_learn_llm.py); DrawInAir's analyze route reads
+the session canvas in this process, so it stays here behind admission
+control (DRAWINAIR_ANALYZE_MAX_CONCURRENT). benchmarks/load_test.py compares
+the two.
+"""
+
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = 1
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 256))  # Concurrent requests, long-lived streams included
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))  # gthread: restart the worker if it stops heartbeating this long
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 10))
+keepalive = 5
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')  # e.g. "-" for stdout; off by default like the dev server logs
+
+
+def worker_exit(server, worker):
+    """Release the camera, sessions and hand tracking workers when the worker stops"""
+    backend = sys.modules.get('magic_learn_backend')
+    if backend is not None:
+        backend.cleanup_resources()
@@ -0,0 +1,45 @@
+"""
+Gunicorn settings for the Magic Learn LLM routes (Image Reader, Plot Crafter)
+
+    gunicorn -c gunicorn_llm.conf.py magic_learn_llm:app
+
+Cooperative (gevent) workers, like the Playground service: each request
+waiting on Gemini (plain or streamed) is a greenlet, so one worker keeps
+GUNICORN_WORKER_CONNECTIONS of them in flight instead of one per OS thread.
+Admission control (<FEATURE>_MAX_CONCURRENT) still caps each feature.
+One worker process by default: the per-key request budgets, the theme cache
+and its single-flight live in process memory. DrawInAir stays on the
+threaded instance (gunicorn.conf.py), since OpenCV / MediaPipe work and the
+camera thread would stall a gevent hub.
+"""
+
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5002')}"
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+worker_class = 'gevent'
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))  # Concurrent requests per worker
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))  # Restart a worker that stops heartbeating this long
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))  # Let in-flight generations finish
+keepalive = 5
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+
+
+def post_fork(server, worker):
+    """
+    Make gRPC (Gemini client) cooperative before the app creates any channel
+    Same as the Playground service's gunicorn.conf.py: patch first, since
+    GeventWorker.init_process only patches after this hook runs
+    """
+    from gevent import monkey
+    monkey.patch_all()
+    from grpc.experimental import gevent as grpc_gevent
+    grpc_gevent.init_gevent()
+
+
+def worker_exit(server, worker):
+    """Shut down the Plot Crafter batch pool when the worker stops"""
+    backend = sys.modules.get('magic_learn_backend')
+    if backend is not None:
+        backend.cleanup_resources()
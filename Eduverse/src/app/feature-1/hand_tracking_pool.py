@@ -0,0 +1,259 @@
+"""
+Hand Tracking Worker Pool
+Runs MediaPipe hand tracking in separate processes so DrawInAir can use every
+CPU core instead of serializing all sessions behind the GIL.
+- Each worker pre-initializes a Hands model and keeps one tracker per session
+- Sessions are sticky to a worker (video-mode tracking is stateful)
+- Every worker has a bounded task queue; a full queue rejects instead of waiting
+- Each session registration gets a generation number that tags its tasks, so a
+  late release of an earlier session with the same id never drops a newer tracker
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# OPTIMIZED MediaPipe settings for SMOOTH tracking (shared with the inline path)
+TRACKER_OPTIONS = {
+    'static_image_mode': False,  # Video mode for better tracking
+    'max_num_hands': 1,  # Focus on one hand for better performance
+    'min_detection_confidence': 0.7,  # Balanced detection
+    'min_tracking_confidence': 0.65,  # Smoother tracking (was 0.75, lowered for less jitter)
+    'model_complexity': 0,  # Use lighter model for faster processing
+}
+
+
+class PoolBusyError(Exception):
+    """Raised when the worker owning a session has a full task queue"""
+
+
+def _hand_tracking_worker(worker_idx, task_queue, result_queue, tracker_options):
+    """Worker process loop: one MediaPipe Hands tracker per session"""
+    from mediapipe.python.solutions import hands
+
+    spare_tracker = hands.Hands(**tracker_options)  # Pre-initialized for the next new session
+    trackers = {}  # session_id -> (generation, tracker)
+    result_queue.put(('ready', worker_idx))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        kind, task_id, session_id, generation, payload = task
+        current_generation, tracker = trackers.get(session_id, (None, None))
+        if kind == 'release':
+            # Ignore releases of an earlier registration of this session id
+            if tracker is not None and current_generation <= generation:
+                del trackers[session_id]
+                tracker.close()
+            continue
+
+        started = time.perf_counter()
+        try:
+            if tracker is not None and current_generation < generation:
+                tracker.close()  # Left over from an earlier session with this id whose release is still queued
+                tracker = None
+            if tracker is None:
+                tracker = spare_tracker or hands.Hands(**tracker_options)
+                spare_tracker = None
+                trackers[session_id] = (generation, tracker)
+
+            result = tracker.process(payload)
+            landmarks, hand_label = None, None
+            if result.multi_hand_landmarks:
+                hand_lms = result.multi_hand_landmarks[0]
+                landmarks = np.array([(lm.x, lm.y) for lm in hand_lms.landmark], dtype=np.float32)
+                if result.multi_handedness:
+                    hand_label = result.multi_handedness[0].classification[0].label
+            result_queue.put(('result', task_id, (landmarks, hand_label), None, time.perf_counter() - started))
+        except Exception as e:
+            result_queue.put(('result', task_id, None, str(e), time.perf_counter() - started))
+
+        if spare_tracker is None:
+            spare_tracker = hands.Hands(**tracker_options)
+
+    for _, tracker in trackers.values():
+        tracker.close()
+    if spare_tracker is not None:
+        spare_tracker.close()
+
+
+class HandTrackingPool:
+    """Process pool of MediaPipe hand trackers with sticky session routing"""
+
+    def __init__(self, num_workers, queue_size=4, tracker_options=None):
+        # spawn: safe with the threaded server and works on Windows
+        ctx = multiprocessing.get_context('spawn')
+        self.num_workers = max(1, num_workers)
+        self.queue_size = max(1, queue_size)
+        self._result_queue = ctx.Queue()
+        self._task_queues = []
+        self._processes = []
+        self._lock = threading.Lock()
+        self._pending = {}  # task_id -> (Future, worker_idx)
+        self._task_ids = itertools.count()
+        self._generations = itertools.count()
+        self._assignments = {}  # session_id -> (worker_idx, generation)
+        self._deferred_releases = [[] for _ in range(self.num_workers)]  # Releases waiting for queue space
+        self._started = time.monotonic()
+        self._closed = False
+        self._ready_workers = 0
+        self._all_ready = threading.Event()
+        self._worker_stats = [
+            {'sessions': 0, 'in_flight': 0, 'completed': 0, 'rejected': 0, 'busy_seconds': 0.0}
+            for _ in range(self.num_workers)
+        ]
+
+        for worker_idx in range(self.num_workers):
+            task_queue = ctx.Queue(maxsize=self.queue_size)
+            process = ctx.Process(
+                target=_hand_tracking_worker,
+                args=(worker_idx, task_queue, self._result_queue, tracker_options or TRACKER_OPTIONS),
+                daemon=True
+            )
+            process.start()
+            self._task_queues.append(task_queue)
+            self._processes.append(process)
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has loaded its model. Returns True when ready"""
+        return self._all_ready.wait(timeout)
+
+    def submit(self, session_id, img_rgb):
+        """
+        Queue one RGB frame for session_id on its sticky worker
+        Returns a Future resolving to (landmarks (21, 2) normalized or None, hand_label)
+        Raises PoolBusyError if that worker's queue is full
+        """
+        future = Future()
+        with self._lock:
+            worker_idx, generation = self._assign_worker(session_id)
+            task_id = next(self._task_ids)
+            stats = self._worker_stats[worker_idx]
+            try:
+                self._task_queues[worker_idx].put_nowait(('process', task_id, session_id, generation, img_rgb))
+            except queue.Full:
+                stats['rejected'] += 1
+                raise PoolBusyError(f"Hand tracking worker {worker_idx} is busy")
+            stats['in_flight'] += 1
+            self._pending[task_id] = (future, worker_idx)
+        return future
+
+    def process(self, session_id, img_rgb, timeout=2.0):
+        """Blocking submit(): returns (landmarks, hand_label)"""
+        return self.submit(session_id, img_rgb).result(timeout=timeout)
+
+    def release(self, session_id):
+        """
+        Drop the session's tracker on its worker without blocking: when the
+        worker's queue is full the release is sent once a frame completes there
+        """
+        with self._lock:
+            worker_idx, generation = self._assignments.pop(session_id, (None, None))
+            if worker_idx is None or self._closed:
+                return
+            self._worker_stats[worker_idx]['sessions'] -= 1
+            self._deferred_releases[worker_idx].append(('release', None, session_id, generation, None))
+            self._send_deferred_releases(worker_idx)
+
+    def stats(self):
+        """Per-worker queue depth, throughput and utilization"""
+        with self._lock:
+            uptime = max(time.monotonic() - self._started, 1e-6)
+            return {
+                'workers': self.num_workers,
+                'queue_size': self.queue_size,
+                'ready': self._all_ready.is_set(),
+                'per_worker': [
+                    {
+                        'worker': idx,
+                        'alive': self._processes[idx].is_alive(),
+                        'sessions': stats['sessions'],
+                        'in_flight': stats['in_flight'],
+                        'completed': stats['completed'],
+                        'rejected': stats['rejected'],
+                        'deferred_releases': len(self._deferred_releases[idx]),
+                        'busy_seconds': round(stats['busy_seconds'], 3),
+                        'utilization': round(min(stats['busy_seconds'] / uptime, 1.0), 4),
+                    }
+                    for idx, stats in enumerate(self._worker_stats)
+                ],
+            }
+
+    def close(self):
+        """Stop all workers and fail any pending frames"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for task_queue in self._task_queues:
+            try:
+                task_queue.put(None, timeout=1)
+            except queue.Full:
+                pass
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        self._result_queue.put(None)  # Stops the collector thread
+        for future, _ in pending:
+            future.set_exception(RuntimeError("Hand tracking pool closed"))
+
+    def _assign_worker(self, session_id):
+        # Caller holds self._lock. New sessions go to the worker with the fewest sessions
+        assignment = self._assignments.get(session_id)
+        if assignment is None:
+            worker_idx = min(range(self.num_workers), key=lambda idx: self._worker_stats[idx]['sessions'])
+            assignment = self._assignments[session_id] = (worker_idx, next(self._generations))
+            self._worker_stats[worker_idx]['sessions'] += 1
+        return assignment
+
+    def _send_deferred_releases(self, worker_idx):
+        # Caller holds self._lock
+        releases = self._deferred_releases[worker_idx]
+        while releases:
+            try:
+                self._task_queues[worker_idx].put_nowait(releases[0])
+            except queue.Full:
+                return
+            releases.pop(0)
+
+    def _collect_results(self):
+        while True:
+            message = self._result_queue.get()
+            if message is None:
+                break
+            if message[0] == 'ready':
+                with self._lock:
+                    self._ready_workers += 1
+                    if self._ready_workers >= self.num_workers:
+                        self._all_ready.set()
+                continue
+
+            _, task_id, result, error, busy_seconds = message
+            with self._lock:
+                future, worker_idx = self._pending.pop(task_id, (None, None))
+                if worker_idx is not None:
+                    stats = self._worker_stats[worker_idx]
+                    stats['in_flight'] -= 1
+                    stats['completed'] += 1
+                    stats['busy_seconds'] += busy_seconds
+                    if not self._closed:
+                        self._send_deferred_releases(worker_idx)  # A queue slot just freed up
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
@@ -0,0 +1,71 @@
+"""
+Image Reader Upload Normalization
+Phone photos arrive as multi-megapixel JPEGs (often rotated via EXIF), but the
+model sees no more detail above ~1.5k px, so uploads are normalized before
+they are sent upstream:
+- EXIF orientation is applied to the pixels (the tag is dropped on re-encode)
+- The long side is limited to max_dimension (JPEG decoding is downscaled
+  with draft mode, so a 12 MP photo is never fully decoded)
+- The result is re-encoded as JPEG or WebP at the given quality
+Images that are already small, upright and in a format the model accepts
+are passed through untouched.
+"""
+
+import io
+
+from PIL import Image, ImageOps
+
+EXIF_ORIENTATION = 0x0112
+PASSTHROUGH_FORMATS = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp'}
+OUTPUT_FORMATS = {'JPEG': 'image/jpeg', 'WEBP': 'image/webp'}
+
+
+def normalize_image(image_bytes, mime_type, max_dimension=1600, quality=85, output_format='JPEG', skip_below_bytes=256 * 1024):
+    """
+    Returns (bytes, mime type, info dict). Bytes PIL cannot open are returned
+    unchanged so the model can report on them itself
+    """
+    info = {'original_bytes': len(image_bytes), 'normalized': False}
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        source_format = img.format
+        info['original_size'] = img.size
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+    except Exception as e:
+        info['error'] = str(e)
+        return image_bytes, mime_type, info
+
+    oversized = max(img.size) > max_dimension
+    if (not oversized and orientation in (0, 1) and source_format in PASSTHROUGH_FORMATS
+            and len(image_bytes) <= skip_below_bytes):
+        return image_bytes, PASSTHROUGH_FORMATS[source_format], info
+
+    if oversized and source_format == 'JPEG':
+        img.draft('RGB', (max_dimension, max_dimension))  # Decode at 1/2, 1/4 or 1/8 scale when possible
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        rgba = img.convert('RGBA')
+        img = Image.new('RGB', rgba.size, (255, 255, 255))  # Flatten transparency onto white paper
+        img.paste(rgba, mask=rgba.getchannel('A'))
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    if max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    output_format = output_format.upper() if output_format.upper() in OUTPUT_FORMATS else 'JPEG'
+    buffer = io.BytesIO()
+    if output_format == 'JPEG':
+        img.save(buffer, 'JPEG', quality=quality, optimize=True)
+    else:
+        img.save(buffer, 'WEBP', quality=quality, method=4)
+    encoded = buffer.getvalue()
+
+    # Re-encoding alone (no resize / rotation) is only worth it if it saves bytes
+    if (not oversized and orientation in (0, 1) and source_format in PASSTHROUGH_FORMATS
+            and len(encoded) >= len(image_bytes)):
+        return image_bytes, PASSTHROUGH_FORMATS[source_format], info
+
+    info.update({'normalized': True, 'size': img.size, 'bytes': len(encoded)})
+    return encoded, OUTPUT_FORMATS[output_format], info
@@ -0,0 +1,180 @@
+"""
+Gemini API Key Pool
+Spreads requests for one feature across all of its API keys instead of
+draining one key until it hits quota.
+- Each key has a token bucket (requests per minute + burst); acquire() picks
+  the key with the most tokens left, least recently used on ties
+- A quota error puts the key in a cooldown that doubles with each
+  consecutive quota error (or lasts as long as the server's retry delay)
+- Per-key usage and health counters for /health and /metrics
+All state is guarded by one lock, so the pool is safe under the threaded server.
+"""
+
+import re
+import threading
+import time
+
+RETRY_DELAY_PATTERNS = (
+    re.compile(r'retry in ([\d.]+)\s*s', re.IGNORECASE),
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE),
+)
+
+
+def retry_after_seconds(error):
+    """Server-suggested retry delay in a Gemini quota error message, or None"""
+    message = str(error)
+    for pattern in RETRY_DELAY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class KeysExhaustedError(Exception):
+    """Raised when no key of a pool is available (all cooling down or out of budget)"""
+
+
+class KeyState:
+    """Token bucket, cooldown and counters of one key (guarded by the pool lock)"""
+
+    __slots__ = ('key', 'index', 'tokens', 'refilled_at', 'cooldown_until', 'strikes', 'last_used_at',
+                 'in_flight', 'requests', 'successes', 'quota_errors', 'errors')
+
+    def __init__(self, key, index, burst):
+        self.key = key
+        self.index = index
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.cooldown_until = 0.0
+        self.strikes = 0  # Consecutive quota errors
+        self.last_used_at = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.quota_errors = 0
+        self.errors = 0
+
+
+class KeyPool:
+    """Thread-safe pool of API keys for one feature"""
+
+    def __init__(self, name, keys, requests_per_minute=15, burst=None, base_cooldown=5.0, max_cooldown=300.0):
+        if not keys:
+            raise ValueError(f"Key pool {name} needs at least one key")
+        self.name = name
+        self.rate = requests_per_minute / 60.0 if requests_per_minute > 0 else 0.0  # tokens per second, 0 = unlimited
+        self.burst = float(burst if burst is not None else max(requests_per_minute, 1))
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._keys = [KeyState(key, idx, self.burst) for idx, key in enumerate(keys)]
+        self._lock = threading.Condition()
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def acquire(self, exclude=(), timeout=0.0):
+        """
+        Take one request token from the best available key, waiting up to
+        timeout seconds for a token to refill or a cooldown to end
+        Returns (api_key, key_index), or (None, None) if no key is available
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                best, wait = None, None
+                for state in self._keys:
+                    if state.index in exclude:
+                        continue
+                    self._refill(state, now)
+                    if state.cooldown_until > now:
+                        ready_in = state.cooldown_until - now
+                    elif self.rate and state.tokens < 1:
+                        ready_in = (1 - state.tokens) / self.rate
+                    else:
+                        if best is None or (state.tokens, -state.last_used_at) > (best.tokens, -best.last_used_at):
+                            best = state
+                        continue
+                    wait = ready_in if wait is None else min(wait, ready_in)
+
+                if best is not None:
+                    if self.rate:
+                        best.tokens -= 1
+                    best.last_used_at = now
+                    best.in_flight += 1
+                    best.requests += 1
+                    return best.key, best.index
+
+                remaining = deadline - now
+                if wait is None or remaining <= 0:
+                    self.rejected += 1
+                    return None, None
+                self._lock.wait(min(wait, remaining))
+
+    def report_success(self, index):
+        with self._lock:
+            state = self._keys[index]
+            state.in_flight -= 1
+            state.successes += 1
+            state.strikes = 0
+
+    def report_quota_error(self, index, error=None):
+        """Cool the key down: server retry delay if given, else exponential backoff"""
+        with self._lock:
+            state = self._keys[index]
+            state.in_flight -= 1
+            state.quota_errors += 1
+            state.strikes += 1
+            cooldown = retry_after_seconds(error) if error is not None else None
+            if cooldown is None:
+                cooldown = self.base_cooldown * 2 ** (state.strikes - 1)
+            cooldown = min(cooldown, self.max_cooldown)
+            state.cooldown_until = time.monotonic() + cooldown
+            state.tokens = min(state.tokens, 0.0)
+        print(f"⏸️ {self.name} API key #{index + 1} cooling down for {cooldown:.0f}s")
+
+    def report_error(self, index):
+        """Any other failure: the key stays in rotation"""
+        with self._lock:
+            state = self._keys[index]
+            state.in_flight -= 1
+            state.errors += 1
+
+    def release(self, index):
+        """Give back an acquired key without a result (e.g. the client went away)"""
+        with self._lock:
+            self._keys[index].in_flight -= 1
+            self._lock.notify_all()
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            keys = []
+            for state in self._keys:
+                self._refill(state, now)
+                keys.append({
+                    'key': state.index + 1,
+                    'healthy': state.cooldown_until <= now,
+                    'cooldown_seconds': round(max(state.cooldown_until - now, 0.0), 1),
+                    'tokens': round(state.tokens, 2) if self.rate else None,
+                    'in_flight': state.in_flight,
+                    'requests': state.requests,
+                    'successes': state.successes,
+                    'quota_errors': state.quota_errors,
+                    'errors': state.errors,
+                })
+            return {
+                'keys': len(self._keys),
+                'healthy_keys': sum(key['healthy'] for key in keys),
+                'requests_per_minute': round(self.rate * 60, 2) if self.rate else None,
+                'burst': self.burst if self.rate else None,
+                'rejected': self.rejected,
+                'per_key': keys,
+            }
+
+    def _refill(self, state, now):
+        # Caller holds self._lock
+        if self.rate:
+            state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+        state.refilled_at = now
@@ -14,20 +14,36 @@ from PIL import Image
 import io
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-import google.generativeai as genai
-from mediapipe.python.solutions import hands, drawing_utils
+from flask_sock import Sock, ConnectionClosed
+from mediapipe.python.solutions import hands
 from dotenv import load_dotenv
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import math
+import json
 import signal
+import struct
 import sys
+from drawinair_session import SessionRegistry, SessionClosedError, DEFAULT_SESSION_ID, CANVAS_SHAPE
+from hand_tracking_pool import HandTrackingPool, PoolBusyError, TRACKER_OPTIONS
+from frame_broadcaster import FrameBroadcaster, JpegEncoder
+from drawinair_metrics import FrameMetrics, NULL_TIMER, prometheus_label
+from drawinair_analysis import AnalysisCache, ink_grid, ink_mask, prepare_analysis_image
+from response_cache import ResponseCache, content_key, normalize_text
+from image_normalization import normalize_image
+from key_pool import KeyPool, KeysExhaustedError
+from gemini_clients import GeminiClients
+from theme_cache import ThemeCache, FlightAbandoned, normalize_theme
+from admission import AdmissionLimiter, AdmissionRejected, admission_controlled
+import gesture_engine
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app)
 
 # API KEY CONFIGURATION - Gemini for all features
 DRAWINAIR_API_KEY = os.getenv('DRAWINAIR_API_KEY')
@@ -46,565 +62,503 @@ PLOT_CRAFTER_API_KEYS = [
 IMAGE_READER_API_KEYS = [k for k in IMAGE_READER_API_KEYS if k]
 PLOT_CRAFTER_API_KEYS = [k for k in PLOT_CRAFTER_API_KEYS if k]
 
-# Track current key index for Gemini features (Image Reader and Plot Crafter)
-current_image_reader_key_idx = 0
-current_plot_crafter_key_idx = 0
-
 if not DRAWINAIR_API_KEY or not IMAGE_READER_API_KEYS or not PLOT_CRAFTER_API_KEYS:
     raise ValueError("API keys required for all features. Add keys to .env file.")
 
+# Key pools for Gemini features (Image Reader and Plot Crafter): requests are spread over all keys
+GEMINI_KEY_RPM = float(os.getenv('GEMINI_KEY_RPM', 15))  # Request budget per key per minute (0 = unlimited)
+GEMINI_KEY_BURST = float(os.getenv('GEMINI_KEY_BURST', GEMINI_KEY_RPM))
+GEMINI_KEY_WAIT = float(os.getenv('GEMINI_KEY_WAIT', 2.0))  # seconds to wait for a key before answering 429
+GEMINI_KEY_COOLDOWN = float(os.getenv('GEMINI_KEY_COOLDOWN', 5.0))  # First cooldown after a quota error, doubles after each
+GEMINI_KEY_MAX_COOLDOWN = float(os.getenv('GEMINI_KEY_MAX_COOLDOWN', 300.0))
+key_pools = {
+    feature: KeyPool(
+        name, keys,
+        requests_per_minute=GEMINI_KEY_RPM,
+        burst=GEMINI_KEY_BURST,
+        base_cooldown=GEMINI_KEY_COOLDOWN,
+        max_cooldown=GEMINI_KEY_MAX_COOLDOWN
+    )
+    for feature, name, keys in (('image_reader', 'Image Reader', IMAGE_READER_API_KEYS),
+                                ('plot_crafter', 'Plot Crafter', PLOT_CRAFTER_API_KEYS))
+}
+
+# One long-lived Gemini client per API key (no per-request genai.configure)
+GEMINI_KEEPALIVE = os.getenv('GEMINI_KEEPALIVE', 'true').lower() == 'true'
+gemini_clients = GeminiClients(keepalive=GEMINI_KEEPALIVE)
+gemini_clients.warm([DRAWINAIR_API_KEY] + IMAGE_READER_API_KEYS + PLOT_CRAFTER_API_KEYS)
+
 print(f"✅ Loaded Gemini API key for DrawInAir")
 print(f"✅ Loaded {len(IMAGE_READER_API_KEYS)} Image Reader API keys (Gemini)")
 print(f"✅ Loaded {len(PLOT_CRAFTER_API_KEYS)} Plot Crafter API keys (Gemini)")
 
-# Global variables for DrawInAir
+# Global variables for DrawInAir (server-side camera only)
 camera = None
 camera_lock = threading.Lock()
-imgCanvas = None
-mphands = None
-current_frame = None
-analysis_result = ""
-current_gesture = "None"
-p1, p2 = 0, 0  # Drawing position tracker
+camera_session = None  # DrawInAirSession whose canvas the camera feed draws on
+# Webcam index, or a video file / stream URL to run the camera feed without a webcam
+CAMERA_SOURCE = os.getenv('DRAWINAIR_CAMERA_SOURCE', '0')
+CAMERA_FPS = float(os.getenv('DRAWINAIR_CAMERA_FPS', 30))
+CAMERA_IDLE_TIMEOUT = float(os.getenv('DRAWINAIR_CAMERA_IDLE_TIMEOUT', 5))  # seconds without viewers before the camera is released
+
+# MJPEG stream encoding (bandwidth / encode CPU vs. quality)
+JPEG_QUALITY = int(os.getenv('DRAWINAIR_JPEG_QUALITY', 80))
+JPEG_WIDTH = int(os.getenv('DRAWINAIR_JPEG_WIDTH', 0))  # Downscale the stream to this width (0 = 950, full canvas)
+JPEG_PROGRESSIVE = os.getenv('DRAWINAIR_JPEG_PROGRESSIVE', 'false').lower() == 'true'
+JPEG_OPTIMIZE = os.getenv('DRAWINAIR_JPEG_OPTIMIZE', 'false').lower() == 'true'
+JPEG_SUBSAMPLING = os.getenv('DRAWINAIR_JPEG_SUBSAMPLING', '420')  # 444, 422 or 420
+
+# Per-stage frame timing (time every Nth frame; counters always count every frame)
+METRICS_SAMPLE_EVERY = int(os.getenv('DRAWINAIR_METRICS_SAMPLE_EVERY', 1))
+frame_metrics = FrameMetrics(sample_every=METRICS_SAMPLE_EVERY)
+
+# Analyze results cache: repeated presses on the same (or nearly the same) drawing reuse the result
+DRAWINAIR_ANALYSIS_MODEL = 'gemini-2.5-flash-lite'
+ANALYSIS_CACHE_SIZE = int(os.getenv('DRAWINAIR_ANALYSIS_CACHE_SIZE', 256))  # 0 disables the cache
+ANALYSIS_CACHE_TTL = float(os.getenv('DRAWINAIR_ANALYSIS_CACHE_TTL', 3600))  # seconds
+ANALYSIS_CACHE_MAX_DISTANCE = int(os.getenv('DRAWINAIR_ANALYSIS_CACHE_MAX_DISTANCE', 6))  # differing ink cells (5 px)
+analysis_cache = AnalysisCache(
+    max_entries=ANALYSIS_CACHE_SIZE,
+    ttl=ANALYSIS_CACHE_TTL,
+    max_distance=ANALYSIS_CACHE_MAX_DISTANCE
+) if ANALYSIS_CACHE_SIZE > 0 else None
+
+# Analyze input: ink bounding box + margin, scaled into [min, max] px on the long side, 1-bit PNG
+ANALYSIS_MARGIN = int(os.getenv('DRAWINAIR_ANALYSIS_MARGIN', 24))  # canvas pixels
+ANALYSIS_MAX_SIZE = int(os.getenv('DRAWINAIR_ANALYSIS_MAX_SIZE', 512))
+ANALYSIS_MIN_SIZE = int(os.getenv('DRAWINAIR_ANALYSIS_MIN_SIZE', 128))
+
+# Gemini models for Image Reader and Plot Crafter
+IMAGE_READER_MODEL = 'gemini-2.5-flash-lite'
+PLOT_CRAFTER_MODEL = 'gemini-2.5-flash-lite'
+
+# Image Reader response cache: same image bytes + MIME type + instructions -> same answer
+IMAGE_READER_CACHE_SIZE_MB = float(os.getenv('IMAGE_READER_CACHE_SIZE_MB', 32))  # 0 disables the cache
+IMAGE_READER_CACHE_DIR = os.getenv(
+    'IMAGE_READER_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'image_reader')
+)  # Empty = memory only
+IMAGE_READER_DISK_CACHE_MB = float(os.getenv('IMAGE_READER_DISK_CACHE_MB', 256))
+image_reader_cache = ResponseCache(
+    max_memory_bytes=int(IMAGE_READER_CACHE_SIZE_MB * 1024 * 1024),
+    disk_dir=IMAGE_READER_CACHE_DIR if IMAGE_READER_DISK_CACHE_MB > 0 else None,
+    max_disk_bytes=int(IMAGE_READER_DISK_CACHE_MB * 1024 * 1024)
+) if IMAGE_READER_CACHE_SIZE_MB > 0 else None
+
+# Image Reader upload normalization: EXIF rotation, long side limit, re-encode (small images pass through)
+IMAGE_READER_MAX_DIMENSION = int(os.getenv('IMAGE_READER_MAX_DIMENSION', 1600))  # 0 disables normalization
+IMAGE_READER_QUALITY = int(os.getenv('IMAGE_READER_QUALITY', 85))
+IMAGE_READER_FORMAT = os.getenv('IMAGE_READER_FORMAT', 'JPEG')  # JPEG or WEBP
+IMAGE_READER_SKIP_BELOW_KB = int(os.getenv('IMAGE_READER_SKIP_BELOW_KB', 256))
+
+# Plot Crafter explanations cached by normalized theme; concurrent misses share one upstream call
+PLOT_CRAFTER_CACHE_SIZE = int(os.getenv('PLOT_CRAFTER_CACHE_SIZE', 512))  # 0 disables the cache
+PLOT_CRAFTER_CACHE_TTL = float(os.getenv('PLOT_CRAFTER_CACHE_TTL', 6 * 3600))  # seconds
+plot_crafter_cache = ThemeCache(
+    max_entries=PLOT_CRAFTER_CACHE_SIZE,
+    ttl=PLOT_CRAFTER_CACHE_TTL
+) if PLOT_CRAFTER_CACHE_SIZE > 0 else None
+
+# Plot Crafter batches: themes fan out over a shared worker pool, wide enough for a full batch at once so a
+# batch takes about as long as its slowest theme; per-key request budgets are enforced by the key pool
+PLOT_CRAFTER_BATCH_MAX_THEMES = int(os.getenv('PLOT_CRAFTER_BATCH_MAX_THEMES', 30))
+PLOT_CRAFTER_BATCH_CONCURRENCY = int(os.getenv('PLOT_CRAFTER_BATCH_CONCURRENCY', PLOT_CRAFTER_BATCH_MAX_THEMES))
+plot_crafter_batch_executor = ThreadPoolExecutor(max_workers=max(1, PLOT_CRAFTER_BATCH_CONCURRENCY),
+                                                 thread_name_prefix='plot-crafter-batch')
+
+# ADMISSION CONTROL: per-feature concurrency limit + short bounded queue; beyond that fast 429/503 with Retry-After
+# <FEATURE>_MAX_CONCURRENT / <FEATURE>_MAX_QUEUE / <FEATURE>_QUEUE_TIMEOUT (seconds), e.g. IMAGE_READER_MAX_CONCURRENT
+ADMISSION_DEFAULTS = {
+    # feature: (max_concurrent, max_queue, queue_timeout) - CPU-bound frames get short queues, stale frames are useless
+    'drawinair_frames': (2 * (os.cpu_count() or 1), 2 * (os.cpu_count() or 1), 0.25),
+    'drawinair_analyze': (8, 16, 5.0),
+    'image_reader': (16, 32, 5.0),
+    'plot_crafter': (16, 32, 5.0),
+}
+admission_limiters = {
+    feature: AdmissionLimiter(
+        feature,
+        max_concurrent=int(os.getenv(f'{feature.upper()}_MAX_CONCURRENT', max_concurrent)),
+        max_queue=int(os.getenv(f'{feature.upper()}_MAX_QUEUE', max_queue)),
+        queue_timeout=float(os.getenv(f'{feature.upper()}_QUEUE_TIMEOUT', queue_timeout))
+    )
+    for feature, (max_concurrent, max_queue, queue_timeout) in ADMISSION_DEFAULTS.items()
+}
+
+# SMART GESTURE LOCKING: thresholds live in gesture_engine, lock state on each DrawInAirSession
+
+# HAND TRACKING WORKER POOL: 0 = track inline in the request thread, "auto" = one worker per CPU core
+_hand_workers_setting = os.getenv('DRAWINAIR_HAND_WORKERS', '0')
+HAND_TRACKING_WORKERS = (os.cpu_count() or 1) if _hand_workers_setting == 'auto' else int(_hand_workers_setting)
+HAND_WORKER_QUEUE_SIZE = int(os.getenv('DRAWINAIR_HAND_WORKER_QUEUE', 4))  # Max queued frames per worker
+HAND_WORKER_TIMEOUT = float(os.getenv('DRAWINAIR_HAND_WORKER_TIMEOUT', 2.0))  # seconds
+hand_tracking_pool = None
+hand_tracking_pool_lock = threading.Lock()
+
+def create_hand_tracker():
+    """Create a MediaPipe hands tracker with OPTIMIZED settings for smooth tracking"""
+    return hands.Hands(**TRACKER_OPTIONS)
+
+def get_hand_tracking_pool():
+    """Start the hand tracking worker pool on first use (None when tracking inline)"""
+    global hand_tracking_pool
+    
+    if HAND_TRACKING_WORKERS <= 0:
+        return None
+    
+    if hand_tracking_pool is None:
+        with hand_tracking_pool_lock:
+            if hand_tracking_pool is None:
+                hand_tracking_pool = HandTrackingPool(HAND_TRACKING_WORKERS, queue_size=HAND_WORKER_QUEUE_SIZE)
+                # First use pays the model load once instead of timing out frames
+                if hand_tracking_pool.wait_ready(timeout=60):
+                    print(f"✅ Started {HAND_TRACKING_WORKERS} hand tracking workers")
+                else:
+                    print(f"⚠️ Hand tracking workers still loading after 60s")
+    return hand_tracking_pool
 
-# SMART GESTURE LOCKING: Once you start drawing, stay in drawing mode
-gesture_lock_mode = None  # Locks to Drawing/Moving/Erasing to prevent interruption
-gesture_lock_counter = 0  # How many frames we've been in locked mode
-LOCK_THRESHOLD = 3  # Frames needed to lock into a gesture
-UNLOCK_THRESHOLD = 3  # Frames needed to unlock (REDUCED from 10 for instant response)
-INTENTIONAL_SWITCH_THRESHOLD = 2  # Quick switch for intentional gesture changes
+def release_pooled_tracker(session):
+    """Drop a closed session's tracker on its pool worker"""
+    if hand_tracking_pool is not None:
+        hand_tracking_pool.release(session.session_id)
 
-def get_next_api_key(feature='image_reader'):
+# One DrawInAir session per drawer (canvas, stroke cursor, lock state, tracker)
+drawinair_sessions = SessionRegistry(tracker_factory=create_hand_tracker, on_close=release_pooled_tracker)
+
+def track_hand(session, imgRGB):
     """
-    Get next API key with automatic rotation on exhaustion (for Gemini features only)
-    Returns: (api_key, key_index) tuple
+    Run MediaPipe hand tracking for one session
+    Returns (landmarks, hand_label): landmarks is a (21, 2) array of normalized
+    coordinates, or None when no hand is visible
+    Uses the session's sticky pool worker when DRAWINAIR_HAND_WORKERS > 0
+    Raises PoolBusyError / FutureTimeoutError when the pool cannot take the frame
     """
-    global current_image_reader_key_idx, current_plot_crafter_key_idx
+    pool = get_hand_tracking_pool()
+    if pool is not None:
+        if session.closed:
+            raise SessionClosedError(session.session_id)  # Its pool tracker was released already
+        # Copy: imgRGB is a reused session buffer and the queue pickles it asynchronously
+        return pool.process(session.session_id, imgRGB.copy(), timeout=HAND_WORKER_TIMEOUT)
     
-    if feature == 'image_reader':
-        keys = IMAGE_READER_API_KEYS
-        idx = current_image_reader_key_idx
-    elif feature == 'plot_crafter':
-        keys = PLOT_CRAFTER_API_KEYS
-        idx = current_plot_crafter_key_idx
-    else:
-        raise ValueError(f"Unknown feature: {feature}")
+    result = session.get_tracker().process(image=imgRGB)
+    if not result.multi_hand_landmarks:
+        return None, None
     
-    return keys[idx % len(keys)], idx
+    hand_lms = result.multi_hand_landmarks[0]
+    landmarks = np.array([(lm.x, lm.y) for lm in hand_lms.landmark], dtype=np.float32)
+    hand_label = result.multi_handedness[0].classification[0].label if result.multi_handedness else None
+    return landmarks, hand_label
+
+def draw_hand_landmarks(img, points):
+    """Draw the hand skeleton for (21, 2) pixel points (same style as MediaPipe drawing_utils)"""
+    for start_idx, end_idx in hands.HAND_CONNECTIONS:
+        cv2.line(img, tuple(points[start_idx]), tuple(points[end_idx]), (224, 224, 224), 2)
+    for point in points:
+        center = tuple(point)
+        cv2.circle(img, center, 3, (224, 224, 224), 2)  # White border
+        cv2.circle(img, center, 2, (0, 0, 255), 2)
+
+def landmarks_to_points(landmarks, img):
+    """Convert normalized landmarks to a (21, 2) array of pixel coordinates of img (None without a hand)"""
+    if landmarks is None:
+        return None
+    h, w, c = img.shape
+    return (landmarks * (w, h)).astype(np.int32)
+
+MAX_SESSION_ID_LENGTH = 128
+
+def normalize_session_id(session_id):
+    """Client-supplied session id as a bounded registry key (default session when missing)"""
+    return str(session_id)[:MAX_SESSION_ID_LENGTH] if session_id else DEFAULT_SESSION_ID
 
-def rotate_api_key(feature='image_reader'):
+def get_session_id():
     """
-    Rotate to next API key when current one is exhausted (for Gemini features only)
+    Resolve the DrawInAir session id for the current request
+    Order: X-DrawInAir-Session header, ?session_id= query, "session_id" JSON/form field
     """
-    global current_image_reader_key_idx, current_plot_crafter_key_idx
-    
-    if feature == 'image_reader':
-        current_image_reader_key_idx = (current_image_reader_key_idx + 1) % len(IMAGE_READER_API_KEYS)
-        print(f"🔄 Rotated Image Reader API key to index {current_image_reader_key_idx}")
-    elif feature == 'plot_crafter':
-        current_plot_crafter_key_idx = (current_plot_crafter_key_idx + 1) % len(PLOT_CRAFTER_API_KEYS)
-        print(f"🔄 Rotated Plot Crafter API key to index {current_plot_crafter_key_idx}")
+    session_id = request.headers.get('X-DrawInAir-Session') or request.args.get('session_id')
+    if not session_id and request.is_json:
+        data = request.get_json(silent=True) or {}
+        session_id = data.get('session_id')
+    elif not session_id and request.mimetype == 'multipart/form-data':
+        session_id = request.form.get('session_id')
+    return normalize_session_id(session_id)
+
+def get_drawinair_session(create=True):
+    """Get (or create) the DrawInAir session for the current request"""
+    return drawinair_sessions.get(get_session_id(), create=create)
 
 def initialize_camera():
-    """Initialize camera and MediaPipe hands with OPTIMIZED settings for smooth tracking"""
-    global camera, imgCanvas, mphands
+    """Initialize camera with OPTIMIZED settings for smooth tracking"""
+    global camera
     
-    camera = cv2.VideoCapture(0)
+    camera = cv2.VideoCapture(int(CAMERA_SOURCE) if CAMERA_SOURCE.isdigit() else CAMERA_SOURCE)
     if not camera.isOpened():
+        camera.release()
+        camera = None
         return False
     
     # Optimize camera settings for better performance
     camera.set(cv2.CAP_PROP_FRAME_WIDTH, 950)
     camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 550)
     camera.set(cv2.CAP_PROP_BRIGHTNESS, 130)
-    camera.set(cv2.CAP_PROP_FPS, 30)  # Set to 30 FPS for smooth tracking
-    
-    imgCanvas = np.zeros(shape=(550, 950, 3), dtype=np.uint8)
-    
-    # OPTIMIZED MediaPipe settings for SMOOTH tracking
-    mphands = hands.Hands(
-        static_image_mode=False,  # Video mode for better tracking
-        max_num_hands=1,  # Focus on one hand for better performance
-        min_detection_confidence=0.7,  # Balanced detection
-        min_tracking_confidence=0.65,  # Smoother tracking (was 0.75, lowered for less jitter)
-        model_complexity=0  # Use lighter model for faster processing
-    )
+    camera.set(cv2.CAP_PROP_FPS, CAMERA_FPS)  # 30 FPS by default for smooth tracking
     
     return True
 
-def process_frame_with_hands():
+def release_camera():
+    """Release the server-side camera (called when the capture thread stops)"""
+    global camera
+    with camera_lock:
+        if camera is not None:
+            camera.release()
+            camera = None
+
+def process_frame_with_hands(session, timer=NULL_TIMER):
     """
     Process frame with hand tracking (OPTIMIZED for smooth left/right hand support)
+    Draws on the given session's canvas
     Returns the processed frame with drawing overlay
     """
-    global camera, imgCanvas, mphands, current_gesture, p1, p2
-    
     if camera is None or not camera.isOpened():
         return None
     
     success, img = camera.read()
     if not success or img is None:
         return None
+    timer.mark('capture')
+    
+    session.begin_frame()
+    compositor = session.get_compositor()
     
-    # Resize and flip for mirror effect
-    img = cv2.resize(src=img, dsize=(950, 550))
-    img = cv2.flip(src=img, flipCode=1)
-    imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    # Resize and flip for mirror effect (into the session's preallocated buffers)
+    img, imgRGB = compositor.prepare(img)
+    timer.mark('prepare')
     
     # Process hands with MediaPipe - configured for better tracking
-    result = mphands.process(image=imgRGB)
-    landmark_list = []
-    hand_label = None  # Will be "Left" or "Right"
-    
-    if result.multi_hand_landmarks and result.multi_handedness:
-        for idx, hand_lms in enumerate(result.multi_hand_landmarks):
-            # Get hand label (Left/Right) from MediaPipe
-            hand_label = result.multi_handedness[idx].classification[0].label
-            
-            # Draw hand landmarks smoothly
-            drawing_utils.draw_landmarks(
-                image=img,
-                landmark_list=hand_lms,
-                connections=hands.HAND_CONNECTIONS
-            )
-            
-            # Get landmark coordinates
-            for id, lm in enumerate(hand_lms.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                landmark_list.append([id, cx, cy])
+    landmarks, hand_label = track_hand(session, imgRGB)  # hand_label will be "Left" or "Right"
+    points = landmarks_to_points(landmarks, img)
+    timer.mark('track')
     
     # UNIVERSAL FINGER DETECTION: Works perfectly for BOTH left and right hands
-    fingers = []
-    if landmark_list and hand_label:
-        # SMART THUMB DETECTION: Independent logic for left vs right hand
-        thumb_tip_x = landmark_list[4][1]
-        thumb_ip_x = landmark_list[3][1]   # Thumb IP joint
-        thumb_mcp_x = landmark_list[2][1]  # Thumb base
-        wrist_x = landmark_list[0][1]
-        
-        # For MIRRORED camera view (flipCode=1), MediaPipe labels are OPPOSITE
-        # When you show your RIGHT hand, MediaPipe sees "Left" (because of mirror)
-        # So we need to INVERT the label
-        actual_hand = "Right" if hand_label == "Left" else "Left"
-        
-        # INDEPENDENT THUMB LOGIC for each hand
-        if actual_hand == "Right":
-            # Right hand: Thumb extends to the RIGHT (positive X direction)
-            # Thumb is UP if tip is farther RIGHT than base
-            thumb_extended = thumb_tip_x > thumb_mcp_x + abs(thumb_mcp_x - wrist_x) * 0.15
-        else:
-            # Left hand: Thumb extends to the LEFT (negative X direction)  
-            # Thumb is UP if tip is farther LEFT than base
-            thumb_extended = thumb_tip_x < thumb_mcp_x - abs(thumb_mcp_x - wrist_x) * 0.15
-        
-        fingers.append(1 if thumb_extended else 0)
-        
-        # ADAPTIVE FINGER DETECTION: Uses proportional measurements
-        # Calculate hand size for scale-independent detection
-        wrist_y = landmark_list[0][2]
-        middle_base_y = landmark_list[9][2]
-        hand_size = abs(wrist_y - middle_base_y)
-        
-        # If hand is too close or detection failed, use fallback
-        if hand_size < 50:
-            hand_size = 100  # Reasonable default
-        
-        # Index, Middle, Ring, Pinky
-        finger_landmarks = [
-            [8, 6],    # Index: tip, pip (middle joint)
-            [12, 10],  # Middle: tip, pip
-            [16, 14],  # Ring: tip, pip
-            [20, 18]   # Pinky: tip, pip
-        ]
-        
-        for tip_id, pip_id in finger_landmarks:
-            tip_y = landmark_list[tip_id][2]
-            pip_y = landmark_list[pip_id][2]
-            
-            # Finger is "up" if tip is above pip by at least 15% of hand size
-            # This adapts to different hand sizes and camera distances
-            clearance_needed = hand_size * 0.15  # 15% of hand height
-            
-            if (pip_y - tip_y) > clearance_needed:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-        
-        # Visual feedback
-        for i in range(0, 5):
-            if fingers[i] == 1:
-                cx, cy = landmark_list[(i + 1) * 4][1], landmark_list[(i + 1) * 4][2]
-                cv2.circle(img=img, center=(cx, cy), radius=7, color=(0, 255, 0), thickness=-1)
-                cv2.circle(img=img, center=(cx, cy), radius=8, color=(255, 255, 255), thickness=2)
+    fingers = gesture_engine.fingers_up(points, hand_label)
     
     # INTELLIGENT GESTURE DETECTION with MODE LOCKING
-    # Once you start drawing, stay locked in drawing mode unless you clearly change gesture
-    global gesture_lock_mode, gesture_lock_counter
-    
-    detected_gesture = "None"
-    
-    if len(fingers) == 5:
-        # Detect what gesture the raw finger data suggests
-        if sum(fingers) == 2 and fingers[0] == 1 and fingers[1] == 1:
-            detected_gesture = "Drawing"
-        elif sum(fingers) == 3 and fingers[0] == 1 and fingers[1] == 1 and fingers[2] == 1:
-            detected_gesture = "Moving"
-        elif sum(fingers) == 2 and fingers[0] == 1 and fingers[2] == 1:
-            detected_gesture = "Erasing"
-        elif sum(fingers) == 2 and fingers[0] == 1 and fingers[4] == 1:
-            detected_gesture = "Clearing"
-        elif sum(fingers) == 2 and fingers[0] == 0 and fingers[1] == 1 and fingers[2] == 1:
-            detected_gesture = "Analyzing"
-    
-    # SMART MODE LOCKING LOGIC with INSTANT intentional switching
-    if gesture_lock_mode is None:
-        # Not locked yet - need consistent gesture to lock
-        if detected_gesture in ["Drawing", "Moving", "Erasing"]:
-            gesture_lock_counter += 1
-            if gesture_lock_counter >= LOCK_THRESHOLD:
-                gesture_lock_mode = detected_gesture
-                current_gesture = detected_gesture
-            else:
-                current_gesture = detected_gesture  # Use detected gesture while building lock
-        else:
-            gesture_lock_counter = 0
-            current_gesture = detected_gesture
-    else:
-        # Already locked to a mode
-        if detected_gesture == gesture_lock_mode:
-            # Still doing the same gesture - stay locked
-            gesture_lock_counter = 0  # Reset unlock counter
-            current_gesture = gesture_lock_mode
-        
-        elif detected_gesture in ["Drawing", "Moving", "Erasing"] and detected_gesture != gesture_lock_mode:
-            # User is trying to switch to a different primary gesture
-            # CRITICAL: Distinguish between accidental flicker vs intentional change
-            
-            # Check if this is a "clear" gesture change (e.g., Drawing → Moving)
-            # Drawing has 2 fingers (thumb+index)
-            # Moving has 3 fingers (thumb+index+middle)
-            # This is CLEARLY intentional, not accidental
-            
-            is_clear_intentional_switch = False
-            
-            # Drawing (2 fingers) → Moving (3 fingers) = INTENTIONAL
-            if gesture_lock_mode == "Drawing" and detected_gesture == "Moving":
-                is_clear_intentional_switch = True
-            
-            # Moving (3 fingers) → Drawing (2 fingers) = INTENTIONAL  
-            elif gesture_lock_mode == "Moving" and detected_gesture == "Drawing":
-                is_clear_intentional_switch = True
-            
-            # Drawing (2) → Erasing (2 different) = INTENTIONAL
-            elif gesture_lock_mode == "Drawing" and detected_gesture == "Erasing":
-                is_clear_intentional_switch = True
-            
-            # Any other switch between these modes
-            elif gesture_lock_mode in ["Moving", "Erasing"]:
-                is_clear_intentional_switch = True
-            
-            if is_clear_intentional_switch:
-                # INSTANT SWITCH for clear intentional changes (just 2 frames confirmation)
-                gesture_lock_counter += 1
-                if gesture_lock_counter >= INTENTIONAL_SWITCH_THRESHOLD:
-                    gesture_lock_mode = detected_gesture
-                    gesture_lock_counter = 0
-                    current_gesture = detected_gesture
-                else:
-                    # Show new gesture immediately even before lock confirms
-                    current_gesture = detected_gesture
-            else:
-                # Unclear change - use normal unlock threshold
-                gesture_lock_counter += 1
-                if gesture_lock_counter >= UNLOCK_THRESHOLD:
-                    gesture_lock_mode = detected_gesture
-                    gesture_lock_counter = 0
-                    current_gesture = detected_gesture
-                else:
-                    current_gesture = gesture_lock_mode
-        
-        elif detected_gesture in ["Clearing", "Analyzing"]:
-            # Special gestures override lock immediately
-            gesture_lock_mode = None
-            gesture_lock_counter = 0
-            current_gesture = detected_gesture
-        
-        elif detected_gesture == "None":
-            # Hand not detected or resting - unlock after a delay
-            gesture_lock_counter += 1
-            if gesture_lock_counter >= UNLOCK_THRESHOLD:
-                gesture_lock_mode = None
-                gesture_lock_counter = 0
-                current_gesture = "None"
-            else:
-                # Stay in locked mode briefly
-                current_gesture = gesture_lock_mode
-        else:
-            # Unknown state - keep current lock
-            current_gesture = gesture_lock_mode
+    session.current_gesture = session.gesture_lock.update(gesture_engine.classify(fingers))
     
     # EXECUTE CONFIRMED GESTURES
-    if current_gesture == "Drawing" and len(fingers) == 5:
-        cx, cy = landmark_list[8][1], landmark_list[8][2]
-        
-        if p1 == 0 and p2 == 0:
-            p1, p2 = cx, cy
-        else:
-            cv2.line(img=imgCanvas, pt1=(p1, p2), pt2=(cx, cy), color=(255, 0, 255), thickness=6)
-        p1, p2 = cx, cy
+    session.apply_gesture(points if fingers else None, draw_thickness=6, erase_thickness=20)
+    timer.mark('gesture')
     
-    elif current_gesture == "Moving" and len(fingers) == 5:
-        cx, cy = landmark_list[8][1], landmark_list[8][2]
-        cv2.circle(img=img, center=(cx, cy), radius=10, color=(0, 255, 0), thickness=2)
-        p1, p2 = 0, 0
+    if points is not None and hand_label:
+        # Draw hand landmarks smoothly
+        draw_hand_landmarks(img, points)
     
-    elif current_gesture == "Erasing" and len(fingers) == 5:
-        cx, cy = landmark_list[12][1], landmark_list[12][2]
-        
-        if p1 == 0 and p2 == 0:
-            p1, p2 = cx, cy
-        else:
-            cv2.line(img=imgCanvas, pt1=(p1, p2), pt2=(cx, cy), color=(0, 0, 0), thickness=20)
-        p1, p2 = cx, cy
-    
-    elif current_gesture == "Clearing":
-        imgCanvas = np.zeros(shape=(550, 950, 3), dtype=np.uint8)
-        gesture_lock_mode = None  # Unlock after clearing
-        gesture_lock_counter = 0
-        p1, p2 = 0, 0
+    # Visual feedback
+    for i, finger_up in enumerate(fingers):
+        if finger_up:
+            cx, cy = points[gesture_engine.FINGERTIP_IDS[i]].tolist()
+            cv2.circle(img=img, center=(cx, cy), radius=7, color=(0, 255, 0), thickness=-1)
+            cv2.circle(img=img, center=(cx, cy), radius=8, color=(255, 255, 255), thickness=2)
     
-    elif current_gesture == "Analyzing":
-        gesture_lock_mode = None  # Unlock after analyzing
-        gesture_lock_counter = 0
-        p1, p2 = 0, 0
-    
-    else:
-        p1, p2 = 0, 0
+    if session.current_gesture == "Moving" and fingers:
+        cx, cy = points[8].tolist()
+        cv2.circle(img=img, center=(cx, cy), radius=10, color=(0, 255, 0), thickness=2)
+    timer.mark('render')
     
-    # Blend canvas with video feed smoothly
-    blended = cv2.addWeighted(src1=img, alpha=0.7, src2=imgCanvas, beta=1, gamma=0)
-    imgGray = cv2.cvtColor(imgCanvas, cv2.COLOR_BGR2GRAY)
-    _, imgInv = cv2.threshold(src=imgGray, thresh=50, maxval=255, type=cv2.THRESH_BINARY_INV)
-    imgInv = cv2.cvtColor(imgInv, cv2.COLOR_GRAY2BGR)
-    blended = cv2.bitwise_and(src1=blended, src2=imgInv)
-    final_img = cv2.bitwise_or(src1=blended, src2=imgCanvas)
+    # Blend canvas with video feed smoothly (ink mask is kept up to date by draw_segment)
+    frame = compositor.composite(img, session.imgCanvas, session.ink_mask)
+    timer.mark('composite')
+    session.frames_processed += 1
+    return frame
+
+def capture_camera_frame():
+    """
+    One tick of the shared capture thread: read and process a camera frame for
+    camera_session. Returns a BGR frame, or None if no frame is available
+    (viewers encode it once per frame through camera_broadcaster's encoder)
+    """
+    global camera_session
     
-    return final_img
+    with camera_lock:
+        if camera is None and not initialize_camera():
+            return None
+        session = camera_session
+        if session is None:
+            return None
+        timer = frame_metrics.start('camera')
+        with drawinair_sessions.locked(session) as session:
+            camera_session = session  # Follows the session if it was evicted and re-registered
+            frame = process_frame_with_hands(session, timer)
+            if frame is None:
+                return None
+            # Copy out of the session's reused compositing buffer
+            frame = frame.copy()
+    timer.done()
+    frame_metrics.count_processed('camera')
+    return frame
+
+# One capture + processing thread for every /video-feed viewer (started by the first one)
+camera_broadcaster = FrameBroadcaster(
+    capture_camera_frame,
+    target_fps=CAMERA_FPS,
+    idle_timeout=CAMERA_IDLE_TIMEOUT,
+    on_stop=release_camera,
+    encoder=JpegEncoder(
+        quality=JPEG_QUALITY,
+        width=JPEG_WIDTH,
+        progressive=JPEG_PROGRESSIVE,
+        optimize=JPEG_OPTIMIZE,
+        subsampling=JPEG_SUBSAMPLING
+    ),
+    name='drawinair-camera'
+)
 
 def generate_frames():
-    """Generate video frames with hand tracking"""
-    global current_frame
-    
-    while True:
-        try:
-            # Check if camera is still active
-            if camera is None:
-                print("Camera is None, stopping frame generation")
-                break
-                
-            with camera_lock:
-                frame = process_frame_with_hands()
-                
-                if frame is not None:
-                    # Frame is already in BGR format from OpenCV
-                    # Just encode it as JPEG for streaming
-                    ret, buffer = cv2.imencode('.jpg', frame)
-                    if ret:
-                        frame_bytes = buffer.tobytes()
-                        current_frame = frame
-                        
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                else:
-                    # If frame processing fails, wait a bit before retrying
-                    time.sleep(0.1)
-            
-            time.sleep(0.033)  # ~30 FPS
-        except Exception as e:
-            print(f"Error in generate_frames: {e}")
-            # If camera is stopped or error occurs, exit gracefully
-            if camera is None:
-                break
-            time.sleep(0.1)
+    """MJPEG stream for one viewer, read from the shared latest-frame slot"""
+    for frame_bytes in camera_broadcaster.subscribe():
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
 
 @app.route('/api/drawinair/start', methods=['POST'])
 def start_drawinair():
-    """Start DrawInAir - Initialize MediaPipe only (browser handles camera)"""
+    """Start DrawInAir - Initialize this session's MediaPipe tracker only (browser handles camera)"""
     try:
-        global mphands, imgCanvas
-        
-        if imgCanvas is None:
-            imgCanvas = np.zeros(shape=(550, 950, 3), dtype=np.uint8)
+        session = get_drawinair_session()
         
-        if mphands is None:
-            mphands = hands.Hands(
-                static_image_mode=False,
-                max_num_hands=1,
-                min_detection_confidence=0.7,
-                min_tracking_confidence=0.65,
-                model_complexity=0
-            )
+        if get_hand_tracking_pool() is None:
+            with drawinair_sessions.locked(session) as session:
+                session.get_tracker()
         
         return jsonify({
             'success': True, 
-            'message': 'DrawInAir initialized (browser-based camera)'
+            'message': 'DrawInAir initialized (browser-based camera)',
+            'session_id': session.session_id
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Content types accepted as a raw (non-base64) frame request body
+RAW_FRAME_MIMETYPES = {'image/jpeg', 'image/webp', 'image/png', 'application/octet-stream'}
+
+def read_request_frame_buffer():
+    """
+    Return the encoded frame of the current request as a uint8 array, or None
+    Supports three ingest formats:
+    1. Raw body with Content-Type image/jpeg, image/webp or application/octet-stream (fastest)
+    2. multipart/form-data with a 'frame' file part
+    3. JSON {"frame": "data:image/...;base64,..."} (legacy, kept for compatibility)
+    """
+    if request.mimetype in RAW_FRAME_MIMETYPES:
+        # Decode straight from the request body without base64 or extra copies
+        frame_bytes = request.get_data(cache=False)
+        return np.frombuffer(frame_bytes, np.uint8) if frame_bytes else None
+    
+    if request.mimetype == 'multipart/form-data':
+        frame_part = request.files.get('frame')
+        if frame_part is None:
+            return None
+        frame_bytes = frame_part.read()
+        return np.frombuffer(frame_bytes, np.uint8) if frame_bytes else None
+    
+    data = request.get_json(silent=True)
+    if not data or not data.get('frame'):
+        return None
+    
+    # Decode base64 frame
+    frame_data = data['frame']
+    if ',' in frame_data:
+        frame_data = frame_data.split(',', 1)[1]
+    
+    return np.frombuffer(base64.b64decode(frame_data), np.uint8)
+
+def decode_browser_frame(nparr):
+    """Decode an encoded browser frame into a BGR image (None if undecodable)"""
+    if nparr.size == 0:
+        return None  # imdecode asserts on an empty buffer
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+# Gesture codes used by the binary landmarks response
+GESTURE_CODES = {"None": 0, "Drawing": 1, "Moving": 2, "Erasing": 3, "Clearing": 4, "Analyzing": 5}
+
+def wants_landmarks_only():
+    """Landmarks-only mode: ?mode=landmarks, X-DrawInAir-Mode header or "mode" JSON field"""
+    mode = request.args.get('mode') or request.headers.get('X-DrawInAir-Mode')
+    if not mode and request.is_json:
+        mode = (request.get_json(silent=True) or {}).get('mode')
+    return mode == 'landmarks'
+
+def wants_binary_response():
+    """Binary landmarks response: ?format=binary or Accept: application/octet-stream"""
+    return (request.args.get('format') == 'binary' or
+            request.accept_mimetypes.best == 'application/octet-stream')
+
+def pack_landmarks_response(frame_result):
+    """
+    Pack a landmarks-only frame result into a compact little-endian binary message
+    Header (6 bytes): version u8, gesture code u8, flags u8, landmark count u8, segment count u16
+      flags: 1 = hand detected, 2 = canvas cleared, 4 = MediaPipe label "Right"
+    Landmarks: count x (x i16, y i16) in 950x550 canvas pixels
+    Segments: count x (x1 i16, y1 i16, x2 i16, y2 i16, thickness u8, is_eraser u8)
+    """
+    landmarks = frame_result['landmarks'] or []
+    segments = frame_result['segments']
+    flags = ((1 if landmarks else 0) |
+             (2 if frame_result['cleared'] else 0) |
+             (4 if frame_result['handedness'] == "Right" else 0))
+    
+    header = struct.pack('<BBBBH', 1, GESTURE_CODES.get(frame_result['gesture'], 0),
+                         flags, len(landmarks), len(segments))
+    landmark_bytes = np.asarray(landmarks, dtype='<i2').tobytes()
+    segment_bytes = b''.join(struct.pack('<hhhhBB', *segment) for segment in segments)
+    return header + landmark_bytes + segment_bytes
+
 @app.route('/api/drawinair/process-frame', methods=['POST'])
+@admission_controlled(admission_limiters['drawinair_frames'], on_reject=lambda rejection: frame_metrics.count_dropped('admission'))
 def process_browser_frame():
-    """Process video frame with FULL hand gesture detection (like original)"""
-    global imgCanvas, mphands, current_gesture, p1, p2
-    
+    """
+    Process video frame with FULL hand gesture detection (like original)
+    Accepts a raw JPEG/WebP body, a multipart 'frame' part or legacy base64 JSON
+    With ?mode=landmarks the response carries landmarks, gesture and new stroke
+    segments only (JSON, or binary with ?format=binary) instead of a PNG overlay
+    """
+    session = None
+    timer = frame_metrics.start('browser')
     try:
-        data = request.json
-        if not data or 'frame' not in data:
+        nparr = read_request_frame_buffer()
+        if nparr is None:
             return jsonify({'success': False, 'error': 'No frame data provided'}), 400
+        timer.mark('read')
         
-        # Decode base64 frame
-        frame_data = data['frame']
-        if ',' in frame_data:
-            frame_data = frame_data.split(',')[1]
-        
-        img_bytes = base64.b64decode(frame_data)
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        img = decode_browser_frame(nparr)
         
         if img is None:
             return jsonify({'success': False, 'error': 'Failed to decode frame'}), 400
+        timer.mark('decode')
         
-        img = cv2.resize(img, (950, 550))
-        
-        # Mirror image horizontally (flip left-right for natural drawing)
-        img = cv2.flip(img, 1)
+        session = get_drawinair_session()
+        landmarks_only = wants_landmarks_only()
         
-        if imgCanvas is None:
-            imgCanvas = np.zeros((550, 950, 3), dtype=np.uint8)
+        with drawinair_sessions.locked(session) as session:
+            timer.skip()  # Waiting for this session's previous frame is not a stage
+            frame_result = process_session_frame(session, img, 'browser', landmarks_only=landmarks_only, timer=timer)
         
-        # Process with MediaPipe
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        result = mphands.process(imgRGB)
-        
-        landmark_list = []
-        hand_label = None
-        
-        if result.multi_hand_landmarks:
-            if result.multi_handedness:
-                hand_label = result.multi_handedness[0].classification[0].label
-            
-            for hand_lms in result.multi_hand_landmarks:
-                # Draw landmarks on image
-                drawing_utils.draw_landmarks(
-                    image=img,
-                    landmark_list=hand_lms,
-                    connections=hands.HAND_CONNECTIONS
-                )
-                
-                # Get landmark coordinates
-                for id, lm in enumerate(hand_lms.landmark):
-                    h, w, c = img.shape
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    landmark_list.append([id, cx, cy])
-        
-        # FULL GESTURE DETECTION (from original)
-        fingers = []
-        if landmark_list:
-            # Thumb detection (different for left/right hand)
-            if hand_label == "Right":
-                if landmark_list[4][1] < landmark_list[3][1]:
-                    fingers.append(1)
-                else:
-                    fingers.append(0)
-            else:  # Left hand
-                if landmark_list[4][1] > landmark_list[3][1]:
-                    fingers.append(1)
-                else:
-                    fingers.append(0)
-            
-            # Other fingers
-            for id in [8, 12, 16, 20]:
-                if landmark_list[id][2] < landmark_list[id - 2][2]:
-                    fingers.append(1)
-                else:
-                    fingers.append(0)
-            
-            # Draw yellow circles on ALL fingertips (whether up or down)
-            fingertip_ids = [4, 8, 12, 16, 20]  # Thumb, Index, Middle, Ring, Pinky
-            for tip_id in fingertip_ids:
-                cx, cy = landmark_list[tip_id][1], landmark_list[tip_id][2]
-                # Yellow circle with slight transparency effect
-                cv2.circle(img, (cx, cy), 12, (0, 200, 255), 2)  # Yellow outer ring
-                cv2.circle(img, (cx, cy), 8, (0, 220, 255), -1)  # Yellow filled center
-        
-        # GESTURE HANDLING
-        if len(fingers) == 5:
-            # Thumb + Index = Draw
-            if sum(fingers) == 2 and fingers[0] == fingers[1] == 1:
-                current_gesture = "Drawing"
-                cx, cy = landmark_list[8][1], landmark_list[8][2]
-                if p1 == 0 and p2 == 0:
-                    p1, p2 = cx, cy
-                cv2.line(imgCanvas, (p1, p2), (cx, cy), (255, 0, 255), 5)
-                p1, p2 = cx, cy
-            
-            # Thumb + Index + Middle = Move
-            elif sum(fingers) == 3 and fingers[0] == fingers[1] == fingers[2] == 1:
-                current_gesture = "Moving"
-                p1, p2 = 0, 0
-            
-            # Thumb + Middle = Erase
-            elif sum(fingers) == 2 and fingers[0] == fingers[2] == 1:
-                current_gesture = "Erasing"
-                cx, cy = landmark_list[12][1], landmark_list[12][2]
-                if p1 == 0 and p2 == 0:
-                    p1, p2 = cx, cy
-                cv2.line(imgCanvas, (p1, p2), (cx, cy), (0, 0, 0), 15)
-                p1, p2 = cx, cy
-            
-            # Thumb + Pinky = Clear
-            elif sum(fingers) == 2 and fingers[0] == fingers[4] == 1:
-                current_gesture = "Clearing"
-                imgCanvas = np.zeros((550, 950, 3), dtype=np.uint8)
-                p1, p2 = 0, 0
-            
-            # Index + Middle = Analyze
-            elif sum(fingers) == 2 and fingers[1] == fingers[2] == 1:
-                current_gesture = "Analyzing"
-                p1, p2 = 0, 0
-            
-            else:
-                current_gesture = "None"
-                p1, p2 = 0, 0
+        if landmarks_only and wants_binary_response():
+            response = Response(pack_landmarks_response(frame_result), mimetype='application/octet-stream')
         else:
-            current_gesture = "None"
-            p1, p2 = 0, 0
-        
-        # Create transparent overlay with hand tracking + drawings
-        overlay = np.zeros((550, 950, 4), dtype=np.uint8)  # RGBA
-        
-        # Add hand landmarks to overlay
-        overlay[:, :, :3] = img  # Copy RGB channels
-        overlay[:, :, 3] = 255  # Fully opaque for hand tracking
-        
-        # Blend canvas drawings
-        canvas_gray = cv2.cvtColor(imgCanvas, cv2.COLOR_BGR2GRAY)
-        _, canvas_mask = cv2.threshold(canvas_gray, 1, 255, cv2.THRESH_BINARY)
-        
-        # Apply canvas to overlay
-        overlay[:, :, :3] = cv2.addWeighted(overlay[:, :, :3], 0.7, imgCanvas, 1, 0)
-        overlay[:, :, 3] = np.maximum(overlay[:, :, 3], canvas_mask)  # Combine alphas
-        
-        # Encode as PNG to preserve transparency
-        _, buffer = cv2.imencode('.png', overlay)
-        frame_base64 = base64.b64encode(buffer).decode('utf-8')
-        
-        return jsonify({
-            'success': True,
-            'frame': f'data:image/png;base64,{frame_base64}',
-            'gesture': current_gesture
-        })
+            response = jsonify({'success': True, **frame_result})
+        timer.mark('respond')
+        timer.done()
+        return response
+    
+    except (PoolBusyError, FutureTimeoutError):
+        # Hand tracking workers are saturated - tell the client to drop this frame
+        frame_metrics.count_dropped('tracking_busy')
+        if session is not None:
+            session.frames_dropped += 1
+        response = jsonify({'success': False, 'error': 'Hand tracking busy, frame dropped'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
         
     except Exception as e:
         print(f"Error processing frame: {e}")
@@ -612,28 +566,204 @@ def process_browser_frame():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def process_session_frame(session, img, path, landmarks_only=False, timer=NULL_TIMER):
+    """
+    Run hand tracking, gestures and compositing for one decoded browser frame
+    Caller must hold session.lock. Returns the response fields as a dict
+    path is the metrics label the frame is counted under ('browser' or 'websocket'),
+    the same one its timer records latency under
+    landmarks_only=True skips the overlay render + PNG encode and returns
+    landmarks, gesture and this frame's new stroke segments instead
+    """
+    session.begin_frame()
+    compositor = session.get_compositor()
+    
+    # Resize to 950x550 and mirror horizontally (flip left-right for natural drawing)
+    img, imgRGB = compositor.prepare(img)
+    timer.mark('prepare')
+    
+    # Process with MediaPipe
+    landmarks, hand_label = track_hand(session, imgRGB)
+    points = landmarks_to_points(landmarks, img)
+    timer.mark('track')
+    
+    # FULL GESTURE DETECTION (same engine and lock as the camera path)
+    fingers = gesture_engine.fingers_up(points, hand_label)
+    session.current_gesture = session.gesture_lock.update(gesture_engine.classify(fingers))
+    
+    # GESTURE HANDLING (Thumb + Index = Draw, Thumb + Middle = Erase, Thumb + Pinky = Clear)
+    session.apply_gesture(points if fingers else None, draw_thickness=5, erase_thickness=15, dot_on_start=True)
+    timer.mark('gesture')
+    session.frames_processed += 1
+    frame_metrics.count_processed(path)
+    
+    if landmarks_only:
+        # Browser renders the overlay itself from these fields
+        return {
+            'gesture': session.current_gesture,
+            'handedness': hand_label,
+            'landmarks': points.tolist() if points is not None else None,
+            'segments': [list(segment) for segment in session.new_segments],
+            'cleared': session.canvas_cleared
+        }
+    
+    # Draw landmarks on image
+    if points is not None:
+        draw_hand_landmarks(img, points)
+    
+    if fingers:
+        # Draw yellow circles on ALL fingertips (whether up or down)
+        for tip_id in gesture_engine.FINGERTIP_IDS:
+            cx, cy = points[tip_id].tolist()
+            # Yellow circle with slight transparency effect
+            cv2.circle(img, (cx, cy), 12, (0, 200, 255), 2)  # Yellow outer ring
+            cv2.circle(img, (cx, cy), 8, (0, 220, 255), -1)  # Yellow filled center
+    
+    # Overlay with hand tracking + blended canvas drawings (fully opaque RGBA)
+    overlay = compositor.overlay_rgba(img, session.imgCanvas)
+    timer.mark('render')
+    
+    # Encode as PNG to preserve transparency
+    _, buffer = cv2.imencode('.png', overlay)
+    timer.mark('encode')
+    frame_base64 = base64.b64encode(buffer).decode('utf-8')
+    timer.mark('base64')
+    
+    return {
+        'frame': f'data:image/png;base64,{frame_base64}',
+        'gesture': session.current_gesture
+    }
+
+@sock.route('/api/drawinair/ws')
+def drawinair_stream(ws):
+    """
+    Persistent DrawInAir channel (one connection per session, ?session_id=...)
+    Client -> server:
+      - binary message: one encoded JPEG/WebP frame
+      - text JSON: {"type": "frame", "frame": "<base64 data URL>"}
+                   {"type": "config", "mode": "landmarks"|"overlay", "format": "json"|"binary"}
+                   {"type": "clear"} / {"type": "undo"} (answered with the full stroke list)
+    Server -> client: one update per processed frame with gesture, landmarks and
+    stroke segments (JSON text, or the packed binary layout of process-frame)
+    Latest frame wins: frames that queue up while one is processed are dropped,
+    and so are frames the drawinair_frames admission limit rejects
+    """
+    session_id = normalize_session_id(request.args.get('session_id'))
+    landmarks_only = request.args.get('mode', 'landmarks') == 'landmarks'
+    binary = request.args.get('format') == 'binary'
+    frames_dropped = 0
+    session_dropped = 0  # Part of frames_dropped already added to the session counter
+    frame_limiter = admission_limiters['drawinair_frames']
+    
+    try:
+        while True:
+            # Block for the next message, then drain everything already buffered
+            message = ws.receive()
+            latest_frame = None
+            
+            while message is not None:
+                if isinstance(message, (bytes, bytearray)):
+                    frame_buffer = np.frombuffer(message, np.uint8)
+                else:
+                    frame_buffer = None
+                    try:
+                        command = json.loads(message)
+                        if not isinstance(command, dict):
+                            raise ValueError('expected a JSON object')
+                        command_type = command.get('type')
+                        if command_type == 'frame' and command.get('frame'):
+                            frame_data = str(command['frame'])
+                            if ',' in frame_data:
+                                frame_data = frame_data.split(',', 1)[1]
+                            frame_buffer = np.frombuffer(base64.b64decode(frame_data), np.uint8)
+                    except ValueError as e:
+                        # Malformed message: report it and keep the connection open
+                        ws.send(json.dumps({'type': 'error', 'error': f'Invalid message: {e}'}))
+                        message = ws.receive(timeout=0)
+                        continue
+                    
+                    if command_type == 'config':
+                        landmarks_only = command.get('mode', 'landmarks' if landmarks_only else 'overlay') == 'landmarks'
+                        binary = command.get('format', 'binary' if binary else 'json') == 'binary'
+                    elif command_type == 'clear':
+                        session = drawinair_sessions.get(session_id)
+                        with session.lock:
+                            session.clear_canvas()
+                        ws.send(json.dumps({'type': 'cleared', 'session_id': session_id}))
+                    elif command_type == 'undo':
+                        session = drawinair_sessions.get(session_id)
+                        with session.lock:
+                            undone = session.undo()
+                            strokes = session.strokes.to_list()
+                        ws.send(json.dumps({'type': 'strokes', 'undone': undone, 'strokes': strokes}))
+                
+                if frame_buffer is not None:
+                    if latest_frame is not None:
+                        frames_dropped += 1  # Superseded by a newer frame
+                        frame_metrics.count_dropped('superseded')
+                    latest_frame = frame_buffer
+                
+                message = ws.receive(timeout=0)
+            
+            if latest_frame is None:
+                continue
+            
+            # Same admission limit as POST /process-frame, so switching transport does not skip load shedding
+            try:
+                admitted_at = frame_limiter.acquire()
+            except AdmissionRejected:
+                frames_dropped += 1
+                frame_metrics.count_dropped('admission')
+                continue
+            try:
+                timer = frame_metrics.start('websocket')
+                img = decode_browser_frame(latest_frame)
+                if img is None:
+                    ws.send(json.dumps({'type': 'error', 'error': 'Failed to decode frame'}))
+                    continue
+                timer.mark('decode')
+                
+                # Re-resolve each frame so the session stays fresh in the registry
+                session = drawinair_sessions.get(session_id)
+                session.frames_dropped += frames_dropped - session_dropped
+                session_dropped = frames_dropped
+                try:
+                    with drawinair_sessions.locked(session) as session:
+                        timer.skip()
+                        frame_result = process_session_frame(session, img, 'websocket', landmarks_only=landmarks_only, timer=timer)
+                except (PoolBusyError, FutureTimeoutError):
+                    frames_dropped += 1  # Hand tracking workers saturated
+                    frame_metrics.count_dropped('tracking_busy')
+                    continue
+                
+                if landmarks_only and binary:
+                    ws.send(pack_landmarks_response(frame_result))
+                else:
+                    ws.send(json.dumps({'type': 'frame', 'dropped': frames_dropped, **frame_result}))
+                timer.mark('respond')
+                timer.done()
+            finally:
+                frame_limiter.release(admitted_at)
+    
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        print(f"Error in DrawInAir stream ({session_id}): {e}")
+
 @app.route('/api/drawinair/stop', methods=['POST'])
 def stop_drawinair():
-    """Stop DrawInAir camera and reset ALL global state"""
-    global camera, imgCanvas, current_gesture, p1, p2, gesture_lock_mode, gesture_lock_counter, mphands
+    """Stop DrawInAir camera and drop this session (canvas, lock state, tracker)"""
+    global camera_session
     
     try:
+        # Stops the capture thread (disconnecting viewers), which releases the camera
+        camera_broadcaster.stop()
+        release_camera()
         with camera_lock:
-            if camera is not None:
-                camera.release()
-                camera = None
-            
-            # Close MediaPipe hands
-            if mphands is not None:
-                mphands.close()
-                mphands = None
-            
-            # Reset ALL state variables
-            imgCanvas = np.zeros(shape=(550, 950, 3), dtype=np.uint8)
-            current_gesture = "None"
-            p1, p2 = 0, 0
-            gesture_lock_mode = None
-            gesture_lock_counter = 0
+            camera_session = None
+        
+        # Closes the session's MediaPipe hands and discards its state
+        drawinair_sessions.remove(get_session_id())
         
         # Give camera time to fully release
         import time
@@ -645,26 +775,34 @@ def stop_drawinair():
 
 @app.route('/api/drawinair/video-feed')
 def video_feed():
-    """Video streaming route"""
+    """
+    Video streaming route. Every viewer shares one capture thread; the camera
+    draws on the canvas of the session that started the feed
+    """
+    global camera_session
+    session = get_drawinair_session()
+    with camera_lock:
+        if camera_session is None or not camera_broadcaster.running:
+            camera_session = session
     return Response(generate_frames(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/api/drawinair/gesture', methods=['GET'])
 def get_current_gesture():
     """Get current hand gesture"""
+    session = get_drawinair_session(create=False)
     return jsonify({
         'success': True,
-        'gesture': current_gesture
+        'gesture': session.current_gesture if session else "None"
     })
 
 @app.route('/api/drawinair/analyze', methods=['POST'])
+@admission_controlled(admission_limiters['drawinair_analyze'])
 def analyze_drawing():
     """
     Analyze drawn content with Gemini AI with automatic API key rotation
     Now accepts image from frontend (client-side drawing canvas)
     """
-    global analysis_result
-    
     try:
         data = request.get_json()
         
@@ -683,18 +821,35 @@ def analyze_drawing():
         if img is None:
             return jsonify({'success': False, 'error': 'Failed to decode image'}), 400
         
-        # Convert to PIL Image
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(img_rgb)
+        session = get_drawinair_session(create=False)
+        
+        # Same drawing analyzed before? (perceptual hash: downsampled ink grid)
+        mask = ink_mask(img)
+        image_grid = ink_grid(mask)
+        if analysis_cache is not None:
+            cached, distance = analysis_cache.get(image_grid, namespace=DRAWINAIR_ANALYSIS_MODEL)
+            if cached is not None:
+                print(f"♻️ DrawInAir analysis cache hit (hash distance {distance})")
+                if session is not None:
+                    session.analysis_result = cached
+                return jsonify({
+                    'success': True,
+                    'result': cached,
+                    'model_used': 'Gemini 2.5 Flash Lite',
+                    'cached': True
+                })
+        
+        # Only the inked area, binarized (far fewer upload bytes and vision tokens than the full canvas)
+        png_bytes, sent_size, crop_box = prepare_analysis_image(
+            mask, margin=ANALYSIS_MARGIN, max_size=ANALYSIS_MAX_SIZE, min_size=ANALYSIS_MIN_SIZE
+        )
+        print(f"📐 DrawInAir analysis input: crop {crop_box[2]}x{crop_box[3]} -> {sent_size[0]}x{sent_size[1]}, {len(png_bytes)} bytes")
         
         try:
-            # Configure Gemini API
-            genai.configure(api_key=DRAWINAIR_API_KEY)
-            
             print(f"🔑 Using Gemini 2.5 Flash Lite for DrawInAir vision analysis")
             
             # Analyze with Gemini 2.5 Flash Lite
-            model = genai.GenerativeModel(model_name='gemini-2.5-flash-lite')
+            model = gemini_clients.model(DRAWINAIR_API_KEY, DRAWINAIR_ANALYSIS_MODEL)
             prompt = """Analyze the image and provide the following:
 * If a mathematical equation is present:
    - The equation represented in the image.
@@ -704,13 +859,19 @@ def analyze_drawing():
    - A brief description of the drawn image in simple terms.
 * If only a single text is present in the image, then just return the text only show the text only."""
             
-            response = model.generate_content([prompt, pil_image])
+            response = model.generate_content([prompt, {'mime_type': 'image/png', 'data': png_bytes}])
             analysis_result = response.text
             
+            if analysis_cache is not None:
+                analysis_cache.put(image_grid, analysis_result, namespace=DRAWINAIR_ANALYSIS_MODEL)
+            if session is not None:
+                session.analysis_result = analysis_result
+            
             return jsonify({
                 'success': True,
                 'result': analysis_result,
-                'model_used': 'Gemini 2.5 Flash Lite'
+                'model_used': 'Gemini 2.5 Flash Lite',
+                'cached': False
             })
             
         except Exception as e:
@@ -730,17 +891,182 @@ def analyze_drawing():
 @app.route('/api/drawinair/clear', methods=['POST'])
 def clear_canvas():
     """Clear drawing canvas"""
-    global imgCanvas
-    
     try:
-        imgCanvas = np.zeros(shape=(550, 950, 3), dtype=np.uint8)
+        session = get_drawinair_session(create=False)
+        if session is not None:
+            with session.lock:
+                session.clear_canvas()
         return jsonify({'success': True, 'message': 'Canvas cleared'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/drawinair/undo', methods=['POST'])
+def undo_stroke():
+    """Remove the last stroke from this session's drawing"""
+    try:
+        session = get_drawinair_session(create=False)
+        if session is None:
+            return jsonify({'success': True, 'undone': False, 'strokes': []})
+        
+        with session.lock:
+            undone = session.undo()
+            strokes = session.strokes.to_list()
+        
+        return jsonify({'success': True, 'undone': undone, 'strokes': strokes})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/drawinair/strokes', methods=['GET'])
+def get_strokes():
+    """
+    Vector strokes of this session's drawing (for replay / client-side rendering)
+    ?since=N returns only strokes from index N onwards
+    """
+    try:
+        since = max(request.args.get('since', 0, type=int), 0)
+        session = get_drawinair_session(create=False)
+        if session is None:
+            return jsonify({'success': True, 'count': 0, 'strokes': []})
+        
+        with session.lock:
+            strokes = session.strokes.to_list(since=since)
+            count = len(session.strokes)
+        
+        return jsonify({'success': True, 'count': count, 'strokes': strokes})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ==================== IMAGE READER ====================
 
+def is_quota_error(error):
+    """True for Gemini quota / rate limit errors (rotate to the next key)"""
+    error_msg = str(error).lower()
+    return any(word in error_msg for word in ['quota', 'rate', 'limit', 'exhausted'])
+
+def image_reader_prompt(instructions):
+    return f"Analyze the image and provide details. {instructions if instructions else 'Provide a comprehensive analysis of what you see in the image.'}"
+
+def image_reader_cache_key(image_bytes, mime_type, instructions):
+    """Same image, MIME type and instructions as an earlier request -> same answer"""
+    return content_key(
+        IMAGE_READER_MODEL, mime_type, normalize_text(instructions), image_bytes,
+        f'{IMAGE_READER_MAX_DIMENSION}/{IMAGE_READER_QUALITY}/{IMAGE_READER_FORMAT}'
+    )
+
+def normalize_upload(image_bytes, mime_type):
+    """Shrink large / rotated uploads before they go upstream. Returns (bytes, mime type)"""
+    if IMAGE_READER_MAX_DIMENSION <= 0:
+        return image_bytes, mime_type
+    started = time.perf_counter()
+    image_bytes, mime_type, image_info = normalize_image(
+        image_bytes, mime_type,
+        max_dimension=IMAGE_READER_MAX_DIMENSION,
+        quality=IMAGE_READER_QUALITY,
+        output_format=IMAGE_READER_FORMAT,
+        skip_below_bytes=IMAGE_READER_SKIP_BELOW_KB * 1024
+    )
+    if image_info['normalized']:
+        print(f"🖼️ Image Reader upload {image_info['original_size']} {image_info['original_bytes'] // 1024} KB -> "
+              f"{image_info['size']} {image_info['bytes'] // 1024} KB in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return image_bytes, mime_type
+
+def open_generation_stream(feature, model_name, contents):
+    """
+    Start a streaming generation, rotating API keys on quota errors
+    The SDK fetches the first chunk before returning, so quota errors surface
+    here - before anything has been sent to the client
+    Returns (response, key_idx), or (None, None) if every key is exhausted
+    """
+    pool = key_pools[feature]
+    tried = set()
+    while True:
+        api_key, key_idx = pool.acquire(exclude=tried, timeout=GEMINI_KEY_WAIT)
+        if api_key is None:
+            return None, None
+        tried.add(key_idx)
+        try:
+            print(f"🔑 Streaming {feature} with API key #{key_idx + 1}")
+            model = gemini_clients.model(api_key, model_name)
+            return model.generate_content(contents, stream=True), key_idx
+        except Exception as e:
+            if not is_quota_error(e):
+                pool.report_error(key_idx)
+                raise
+            print(f"⚠️ {feature} API key #{key_idx + 1} exhausted: {e}")
+            pool.report_quota_error(key_idx, e)
+
+def chunk_text(chunk):
+    """Text of one streamed chunk ('' for chunks without parts, e.g. the final safety / finish chunk)"""
+    try:
+        return ''.join(part.text for part in chunk.parts)
+    except ValueError:
+        return ''
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def sse_response(feature, response, key_idx, on_complete=None):
+    """
+    Forward a streaming generation as Server-Sent Events:
+    start (key used), chunk (text) ..., then done (full text) or error
+    The key is reported exactly once: by the stream's outcome, or released
+    when the response closes first (client gone, possibly before the stream started)
+    """
+    pool = key_pools[feature]
+    settle_lock = threading.Lock()
+    settled = False
+    
+    def settle(report, *args):
+        nonlocal settled
+        with settle_lock:
+            if settled:
+                return
+            settled = True
+        report(key_idx, *args)
+    
+    def events():
+        parts = []
+        try:
+            yield sse_event('start', {'api_key_used': key_idx + 1, 'cached': False})
+            for chunk in response:
+                text = chunk_text(chunk)
+                if text:
+                    parts.append(text)
+                    yield sse_event('chunk', {'text': text})
+            settle(pool.report_success)
+        except Exception as e:
+            print(f"❌ Stream failed after {len(parts)} chunk(s): {e}")
+            if is_quota_error(e):
+                settle(pool.report_quota_error, e)
+            else:
+                settle(pool.report_error)
+            yield sse_event('error', {'error': str(e)})
+            return
+        result = ''.join(parts)
+        if on_complete is not None:
+            on_complete(result)
+        yield sse_event('done', {'result': result})
+    
+    stream = sse_stream(events())
+    stream.call_on_close(lambda: settle(pool.release))
+    return stream
+
+def sse_cached(result):
+    """A cached result as a one-chunk event stream"""
+    return sse_stream(iter([
+        sse_event('start', {'api_key_used': None, 'cached': True}),
+        sse_event('chunk', {'text': result}),
+        sse_event('done', {'result': result})
+    ]))
+
+def sse_stream(events):
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let a proxy buffer the stream
+    })
+
 @app.route('/api/image-reader/analyze', methods=['POST'])
+@admission_controlled(admission_limiters['image_reader'])
 def analyze_image():
     """
     Analyze uploaded image (EXACTLY like app.py)
@@ -758,87 +1084,123 @@ def analyze_image():
         # Decode base64 image
         image_bytes = base64.b64decode(image_data)
         
+        # Same image, MIME type and instructions as an earlier request: reuse its answer
+        cache_key = image_reader_cache_key(image_bytes, mime_type, instructions)
+        if image_reader_cache is not None:
+            cached = image_reader_cache.get(cache_key)
+            if cached is not None:
+                print(f"♻️ Image Reader cache hit ({cache_key[:12]})")
+                return jsonify({
+                    'success': True,
+                    'result': cached['result'],
+                    'cached': True
+                })
+        
+        image_bytes, mime_type = normalize_upload(image_bytes, mime_type)
+        
         # Create image parts for Gemini
         image_parts = [{
             "mime_type": mime_type,
             "data": image_bytes
         }]
         
-        # Try with current API key, rotate on failure
-        max_retries = len(IMAGE_READER_API_KEYS)
-        for attempt in range(max_retries):
+        # Take the least loaded healthy key; on quota errors cool it down and try another
+        pool = key_pools['image_reader']
+        tried = set()
+        while True:
+            api_key, key_idx = pool.acquire(exclude=tried, timeout=GEMINI_KEY_WAIT)
+            if api_key is None:
+                return jsonify({
+                    'success': False,
+                    'error': 'All API keys exhausted. Please try again later.'
+                }), 429
+            tried.add(key_idx)
+            
             try:
-                api_key, key_idx = get_next_api_key('image_reader')
-                genai.configure(api_key=api_key)
-                
                 print(f"🔑 Using Image Reader API key #{key_idx + 1}")
                 
                 # Analyze with Gemini 2.5 Flash Lite
-                model = genai.GenerativeModel('gemini-2.5-flash-lite')
-                prompt = f"Analyze the image and provide details. {instructions if instructions else 'Provide a comprehensive analysis of what you see in the image.'}"
+                model = gemini_clients.model(api_key, IMAGE_READER_MODEL)
+                prompt = image_reader_prompt(instructions)
                 
                 response = model.generate_content([prompt, image_parts[0]])
-                
-                return jsonify({
-                    'success': True,
-                    'result': response.text,
-                    'api_key_used': key_idx + 1
-                })
+                result = response.text
                 
             except Exception as e:
-                error_msg = str(e).lower()
-                
                 # Check if it's a quota/rate limit error
-                if 'quota' in error_msg or 'rate' in error_msg or 'limit' in error_msg or 'exhausted' in error_msg:
+                if is_quota_error(e):
                     print(f"⚠️ Image Reader API key #{key_idx + 1} exhausted: {e}")
-                    rotate_api_key('image_reader')
-                    
-                    if attempt < max_retries - 1:
-                        print(f"🔄 Retrying with next API key...")
-                        continue
-                    else:
-                        return jsonify({
-                            'success': False,
-                            'error': 'All API keys exhausted. Please try again later.'
-                        }), 429
-                else:
-                    # Not a quota error, return immediately
-                    raise e
+                    pool.report_quota_error(key_idx, e)
+                    print(f"🔄 Retrying with next API key...")
+                    continue
+                # Not a quota error, return immediately
+                pool.report_error(key_idx)
+                raise e
+            
+            pool.report_success(key_idx)
+            if image_reader_cache is not None:
+                image_reader_cache.put(cache_key, {'result': result})
+            
+            return jsonify({
+                'success': True,
+                'result': result,
+                'api_key_used': key_idx + 1,
+                'cached': False
+            })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
-# ==================== PLOT CRAFTER ====================
-
-@app.route('/api/plot-crafter/generate', methods=['POST'])
-def generate_plot():
+@app.route('/api/image-reader/analyze/stream', methods=['POST'])
+@admission_controlled(admission_limiters['image_reader'])
+def analyze_image_stream():
     """
-    Generate concise real-life example explanation (Updated approach)
-    Uses gemini-2.5-flash-lite for better performance and higher limits
-    Explains concepts through short, interactive real-life examples (max 1 paragraph)
+    Streaming variant of /api/image-reader/analyze (same JSON body)
+    Responds with Server-Sent Events as the model generates; errors before
+    the first chunk (including all keys exhausted) are plain JSON responses
     """
     try:
         data = request.json
-        theme = data.get('theme')
+        image_data = data.get('imageData')
+        mime_type = data.get('mimeType', 'image/jpeg')
+        instructions = data.get('instructions', '')
         
-        if not theme:
-            return jsonify({'error': 'No theme provided'}), 400
+        if not image_data:
+            return jsonify({'error': 'No image data provided'}), 400
         
-        # Try with current API key, rotate on failure
-        max_retries = len(PLOT_CRAFTER_API_KEYS)
-        for attempt in range(max_retries):
-            try:
-                api_key, key_idx = get_next_api_key('plot_crafter')
-                genai.configure(api_key=api_key)
-                
-                print(f"🔑 Using Plot Crafter API key #{key_idx + 1}")
-                
-                # Generate concise explanation with Gemini 2.5 Flash Lite
-                model = genai.GenerativeModel('gemini-2.5-flash-lite')
-                prompt = f"""Explain the concept "{theme}" using a SINGLE real-life example in simple, interactive language.
+        image_bytes = base64.b64decode(image_data)
+        
+        cache_key = image_reader_cache_key(image_bytes, mime_type, instructions)
+        if image_reader_cache is not None:
+            cached = image_reader_cache.get(cache_key)
+            if cached is not None:
+                print(f"♻️ Image Reader cache hit ({cache_key[:12]})")
+                return sse_cached(cached['result'])
+        
+        image_bytes, mime_type = normalize_upload(image_bytes, mime_type)
+        response, key_idx = open_generation_stream(
+            'image_reader', IMAGE_READER_MODEL,
+            [image_reader_prompt(instructions), {'mime_type': mime_type, 'data': image_bytes}]
+        )
+        if response is None:
+            return jsonify({
+                'success': False,
+                'error': 'All API keys exhausted. Please try again later.'
+            }), 429
+        
+        def remember(result):
+            if image_reader_cache is not None and result:
+                image_reader_cache.put(cache_key, {'result': result})
+        
+        return sse_response('image_reader', response, key_idx, on_complete=remember)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== PLOT CRAFTER ====================
+
+def plot_crafter_prompt(theme):
+    return f"""Explain the concept "{theme}" using a SINGLE real-life example in simple, interactive language.
 
 CRITICAL REQUIREMENTS:
 - Use ONLY ONE PARAGRAPH (maximum 4-5 sentences)
@@ -853,36 +1215,195 @@ Example format: "Imagine you're [everyday scenario]. This is exactly how [concep
 Topic: {theme}
 
 Provide your ONE PARAGRAPH real-life example explanation:"""
+
+def plot_crafter_cache_key(theme):
+    return f"{PLOT_CRAFTER_MODEL}:{normalize_theme(theme) or theme.strip()}"
+
+def generate_plot_text(theme):
+    """
+    One Plot Crafter generation on the least loaded healthy key; quota errors
+    cool the key down and move on to the next one
+    Returns (text, key_idx). Raises KeysExhaustedError when no key is left
+    """
+    pool = key_pools['plot_crafter']
+    tried = set()
+    while True:
+        api_key, key_idx = pool.acquire(exclude=tried, timeout=GEMINI_KEY_WAIT)
+        if api_key is None:
+            print("❌ All Plot Crafter API keys exhausted!")
+            raise KeysExhaustedError('All API keys exhausted. Please try again later.')
+        tried.add(key_idx)
         
-                response = model.generate_content([prompt])
+        try:
+            print(f"🔑 Using Plot Crafter API key #{key_idx + 1}")
+            
+            # Generate concise explanation with Gemini 2.5 Flash Lite
+            model = gemini_clients.model(api_key, PLOT_CRAFTER_MODEL)
+            response = model.generate_content([plot_crafter_prompt(theme)])
+            result = response.text
+            
+        except Exception as e:
+            # Check if this is a quota/rate limit error
+            if is_quota_error(e):
+                print(f"⚠️ Plot Crafter API key #{key_idx + 1} exhausted: {e}")
+                pool.report_quota_error(key_idx, e)
+                print(f"🔄 Retrying with next Plot Crafter API key...")
+                continue
+            # Non-quota error, don't rotate
+            pool.report_error(key_idx)
+            raise e
         
-                return jsonify({
-                    'success': True,
-                    'result': response.text,
-                    'api_key_used': f"PLOT_CRAFTER_API_KEY_{key_idx + 1 if key_idx > 0 else ''}"
-                })
-                
+        pool.report_success(key_idx)
+        return result, key_idx
+
+@app.route('/api/plot-crafter/generate', methods=['POST'])
+@admission_controlled(admission_limiters['plot_crafter'])
+def generate_plot():
+    """
+    Generate concise real-life example explanation (Updated approach)
+    Uses gemini-2.5-flash-lite for better performance and higher limits
+    Explains concepts through short, interactive real-life examples (max 1 paragraph)
+    Repeated themes are served from the theme cache
+    """
+    try:
+        data = request.json
+        theme = data.get('theme')
+        
+        if theme is not None and not isinstance(theme, str):
+            return jsonify({'error': 'Theme must be a string'}), 400
+        if not theme:
+            return jsonify({'error': 'No theme provided'}), 400
+        
+        result, key_idx, source = generate_plot_cached(theme)
+        
+        return jsonify({
+            'success': True,
+            'result': result,
+            'api_key_used': f"PLOT_CRAFTER_API_KEY_{key_idx + 1 if key_idx > 0 else ''}" if key_idx is not None else None,
+            'cached': source != 'miss'
+        })
+        
+    except KeysExhaustedError as e:
+        return jsonify({'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def generate_plot_cached(theme):
+    """Theme cache lookup / single-flight generation. Returns (text, key_idx or None, source)"""
+    if plot_crafter_cache is None:
+        result, key_idx = generate_plot_text(theme)
+        return result, key_idx, 'miss'
+    
+    used_key = []
+    
+    def compute():
+        text, idx = generate_plot_text(theme)
+        used_key.append(idx)
+        return text
+    
+    result, source = plot_crafter_cache.get_or_compute(plot_crafter_cache_key(theme), compute)
+    if source != 'miss':
+        print(f"♻️ Plot Crafter cache {source} for '{theme}'")
+    return result, used_key[0] if used_key else None, source
+
+@app.route('/api/plot-crafter/generate-batch', methods=['POST'])
+@admission_controlled(admission_limiters['plot_crafter'])
+def generate_plot_batch():
+    """
+    Generate explanations for a list of themes in one request
+    Themes run concurrently (bounded by PLOT_CRAFTER_BATCH_CONCURRENCY across
+    all batches) and share the theme cache, so duplicates cost one call
+    Results come back in request order, each with its own success / error
+    """
+    try:
+        data = request.json
+        themes = data.get('themes')
+        
+        if not isinstance(themes, list) or not themes:
+            return jsonify({'error': 'No themes provided'}), 400
+        if len(themes) > PLOT_CRAFTER_BATCH_MAX_THEMES:
+            return jsonify({'error': f'Too many themes (max {PLOT_CRAFTER_BATCH_MAX_THEMES} per batch)'}), 400
+        
+        def run(theme):
+            if not isinstance(theme, str) or not theme.strip():
+                return {'theme': theme, 'success': False, 'error': 'No theme provided', 'status': 400}
+            try:
+                result, _, source = generate_plot_cached(theme)
+                return {'theme': theme, 'success': True, 'result': result, 'cached': source != 'miss'}
+            except KeysExhaustedError as e:
+                return {'theme': theme, 'success': False, 'error': str(e), 'status': 429}
             except Exception as e:
-                error_msg = str(e).lower()
-                # Check if this is a quota/rate limit error
-                if any(word in error_msg for word in ['quota', 'rate', 'limit', 'exhausted']):
-                    print(f"⚠️ Plot Crafter API key #{key_idx + 1} exhausted: {e}")
-                    rotate_api_key('plot_crafter')
-                    if attempt < max_retries - 1:
-                        print(f"🔄 Retrying with next Plot Crafter API key...")
-                        continue
-                    else:
-                        print("❌ All Plot Crafter API keys exhausted!")
-                        return jsonify({'error': 'All API keys exhausted. Please try again later.'}), 429
-                else:
-                    # Non-quota error, don't rotate
-                    raise e
+                return {'theme': theme, 'success': False, 'error': str(e), 'status': 500}
+        
+        started = time.perf_counter()
+        results = list(plot_crafter_batch_executor.map(run, themes))
+        succeeded = sum(item['success'] for item in results)
+        print(f"📚 Plot Crafter batch: {succeeded}/{len(results)} themes in {time.perf_counter() - started:.1f}s")
         
-        return jsonify({'error': 'Failed to generate content'}), 500
+        return jsonify({
+            'success': succeeded == len(results),
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/plot-crafter/generate/stream', methods=['POST'])
+@admission_controlled(admission_limiters['plot_crafter'])
+def generate_plot_stream():
+    """
+    Streaming variant of /api/plot-crafter/generate (same JSON body)
+    Responds with Server-Sent Events; errors before the first chunk are plain JSON
+    Shares the theme cache's single-flight: a stream for a theme that is already
+    being generated (streamed or not) waits for it and gets the whole text at once
+    """
+    try:
+        data = request.json
+        theme = data.get('theme')
+        
+        if theme is not None and not isinstance(theme, str):
+            return jsonify({'error': 'Theme must be a string'}), 400
+        if not theme:
+            return jsonify({'error': 'No theme provided'}), 400
+        
+        cache_key = plot_crafter_cache_key(theme)
+        flight = None
+        if plot_crafter_cache is not None:
+            value, source = plot_crafter_cache.begin(cache_key)
+            if source != 'lead':
+                print(f"♻️ Plot Crafter cache {source} for '{theme}'")
+                return sse_cached(value)
+            flight = value
+        
+        def finish(result=None, error=None):
+            if flight is not None:
+                plot_crafter_cache.finish(cache_key, flight, value=result, error=error)
+        
+        try:
+            response, key_idx = open_generation_stream('plot_crafter', PLOT_CRAFTER_MODEL, [plot_crafter_prompt(theme)])
+        except BaseException as e:
+            finish(error=e)
+            raise
+        if response is None:
+            print("❌ All Plot Crafter API keys exhausted!")
+            finish(error=KeysExhaustedError('All API keys exhausted. Please try again later.'))
+            return jsonify({'error': 'All API keys exhausted. Please try again later.'}), 429
+        
+        def remember(result):
+            if result:
+                finish(result)
+        
+        stream = sse_response('plot_crafter', response, key_idx, on_complete=remember)
+        stream.call_on_close(lambda: finish(error=FlightAbandoned(theme)))  # No-op once finished
+        return stream
+        
+    except KeysExhaustedError as e:
+        return jsonify({'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== HEALTH CHECK ====================
 
 @app.route('/api/health', methods=['GET'])
@@ -896,19 +1417,27 @@ def root():
         'features': ['DrawInAir', 'Image Reader', 'Plot Crafter'],
         'endpoints': {
             'health': '/health',
+            'metrics': '/metrics',
             'drawinair': {
                 'start': 'POST /api/drawinair/start',
                 'stop': 'POST /api/drawinair/stop',
+                'process_frame': 'POST /api/drawinair/process-frame (image/jpeg, image/webp, multipart or JSON body)',
+                'stream': 'WS /api/drawinair/ws?session_id=...',
                 'video_feed': 'GET /api/drawinair/video-feed',
                 'gesture': 'GET /api/drawinair/gesture',
                 'analyze': 'POST /api/drawinair/analyze',
-                'clear': 'POST /api/drawinair/clear'
+                'clear': 'POST /api/drawinair/clear',
+                'undo': 'POST /api/drawinair/undo',
+                'strokes': 'GET /api/drawinair/strokes'
             },
             'image_reader': {
-                'analyze': 'POST /api/image-reader/analyze'
+                'analyze': 'POST /api/image-reader/analyze',
+                'analyze_stream': 'POST /api/image-reader/analyze/stream (Server-Sent Events)'
             },
             'plot_crafter': {
-                'generate': 'POST /api/plot-crafter/generate'
+                'generate': 'POST /api/plot-crafter/generate',
+                'generate_stream': 'POST /api/plot-crafter/generate/stream (Server-Sent Events)',
+                'generate_batch': 'POST /api/plot-crafter/generate-batch'
             }
         }
     })
@@ -919,20 +1448,140 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'Magic Learn Backend',
-        'features': ['DrawInAir', 'Image Reader', 'Plot Crafter']
+        'features': ['DrawInAir', 'Image Reader', 'Plot Crafter'],
+        'drawinair_sessions': drawinair_sessions.stats(),
+        'hand_tracking_pool': hand_tracking_pool.stats() if hand_tracking_pool is not None else None,
+        'camera_feed': camera_broadcaster.stats(),
+        'frame_stage_mean_ms': frame_metrics.summary(),
+        'analysis_cache': analysis_cache.stats() if analysis_cache is not None else None,
+        'image_reader_cache': image_reader_cache.stats() if image_reader_cache is not None else None,
+        'gemini_key_pools': {feature: pool.stats() for feature, pool in key_pools.items()},
+        'gemini_clients': gemini_clients.stats(),
+        'plot_crafter_cache': plot_crafter_cache.stats() if plot_crafter_cache is not None else None,
+        'admission': {feature: limiter.stats() for feature, limiter in admission_limiters.items()}
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """DrawInAir frame stage histograms and counters in the Prometheus text format"""
+    lines = frame_metrics.render_prometheus()
+    
+    sessions = drawinair_sessions.sessions()
+    lines.append('# HELP drawinair_session_frames_processed_total Frames processed per live session')
+    lines.append('# TYPE drawinair_session_frames_processed_total counter')
+    lines.extend(f'drawinair_session_frames_processed_total{{session_id="{prometheus_label(session.session_id)}"}} {session.frames_processed}'
+                 for session in sessions)
+    lines.append('# HELP drawinair_session_frames_dropped_total Frames dropped per live session')
+    lines.append('# TYPE drawinair_session_frames_dropped_total counter')
+    lines.extend(f'drawinair_session_frames_dropped_total{{session_id="{prometheus_label(session.session_id)}"}} {session.frames_dropped}'
+                 for session in sessions)
+    
+    registry_stats = drawinair_sessions.stats()
+    lines.append('# TYPE drawinair_live_sessions gauge')
+    lines.append(f'drawinair_live_sessions {registry_stats["live_sessions"]}')
+    lines.append('# TYPE drawinair_sessions_evicted_total counter')
+    lines.append(f'drawinair_sessions_evicted_total{{reason="idle"}} {registry_stats["evicted_idle"]}')
+    lines.append(f'drawinair_sessions_evicted_total{{reason="lru"}} {registry_stats["evicted_lru"]}')
+    
+    if hand_tracking_pool is not None:
+        workers = hand_tracking_pool.stats()['per_worker']
+        for name, metric_type, key in (('drawinair_hand_worker_in_flight', 'gauge', 'in_flight'),
+                                       ('drawinair_hand_worker_rejected_total', 'counter', 'rejected'),
+                                       ('drawinair_hand_worker_utilization', 'gauge', 'utilization')):
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.extend(f'{name}{{worker="{worker["worker"]}"}} {worker[key]}' for worker in workers)
+    
+    feed_stats = camera_broadcaster.stats()
+    lines.append('# TYPE drawinair_camera_feed_subscribers gauge')
+    lines.append(f'drawinair_camera_feed_subscribers {feed_stats["subscribers"]}')
+    lines.append('# TYPE drawinair_camera_feed_frames_total counter')
+    lines.append(f'drawinair_camera_feed_frames_total{{result="published"}} {feed_stats["frames_published"]}')
+    lines.append(f'drawinair_camera_feed_frames_total{{result="failed"}} {feed_stats["frames_failed"]}')
+    lines.append(f'drawinair_camera_feed_frames_total{{result="encoded"}} {feed_stats["frames_encoded"]}')
+    lines.append('# TYPE drawinair_camera_feed_deadline_misses_total counter')
+    lines.append(f'drawinair_camera_feed_deadline_misses_total {feed_stats["deadline_misses"]}')
+    
+    if analysis_cache is not None:
+        cache_stats = analysis_cache.stats()
+        lines.append('# TYPE drawinair_analysis_cache_lookups_total counter')
+        lines.append(f'drawinair_analysis_cache_lookups_total{{result="hit"}} {cache_stats["hits"]}')
+        lines.append(f'drawinair_analysis_cache_lookups_total{{result="near_hit"}} {cache_stats["near_hits"]}')
+        lines.append(f'drawinair_analysis_cache_lookups_total{{result="miss"}} {cache_stats["misses"]}')
+        lines.append('# TYPE drawinair_analysis_cache_entries gauge')
+        lines.append(f'drawinair_analysis_cache_entries {cache_stats["entries"]}')
+    
+    if image_reader_cache is not None:
+        cache_stats = image_reader_cache.stats()
+        lines.append('# HELP image_reader_cache_lookups_total Image Reader response cache lookups by result')
+        lines.append('# TYPE image_reader_cache_lookups_total counter')
+        lines.append(f'image_reader_cache_lookups_total{{result="memory_hit"}} {cache_stats["memory_hits"]}')
+        lines.append(f'image_reader_cache_lookups_total{{result="disk_hit"}} {cache_stats["disk_hits"]}')
+        lines.append(f'image_reader_cache_lookups_total{{result="miss"}} {cache_stats["misses"]}')
+        lines.append('# TYPE image_reader_cache_evictions_total counter')
+        lines.append(f'image_reader_cache_evictions_total{{tier="memory"}} {cache_stats["memory_evictions"]}')
+        lines.append(f'image_reader_cache_evictions_total{{tier="disk"}} {cache_stats["disk_evictions"]}')
+        lines.append('# TYPE image_reader_cache_entries gauge')
+        lines.append(f'image_reader_cache_entries{{tier="memory"}} {cache_stats["memory_entries"]}')
+        lines.append(f'image_reader_cache_entries{{tier="disk"}} {cache_stats["disk_entries"]}')
+        lines.append('# TYPE image_reader_cache_bytes gauge')
+        lines.append(f'image_reader_cache_bytes{{tier="memory"}} {cache_stats["memory_bytes"]}')
+        lines.append(f'image_reader_cache_bytes{{tier="disk"}} {cache_stats["disk_bytes"]}')
+    
+    if plot_crafter_cache is not None:
+        cache_stats = plot_crafter_cache.stats()
+        lines.append('# HELP plot_crafter_cache_lookups_total Plot Crafter theme cache lookups by result')
+        lines.append('# TYPE plot_crafter_cache_lookups_total counter')
+        lines.append(f'plot_crafter_cache_lookups_total{{result="hit"}} {cache_stats["hits"]}')
+        lines.append(f'plot_crafter_cache_lookups_total{{result="coalesced"}} {cache_stats["coalesced"]}')
+        lines.append(f'plot_crafter_cache_lookups_total{{result="miss"}} {cache_stats["misses"]}')
+        lines.append('# TYPE plot_crafter_cache_entries gauge')
+        lines.append(f'plot_crafter_cache_entries {cache_stats["entries"]}')
+        lines.append('# TYPE plot_crafter_cache_in_flight gauge')
+        lines.append(f'plot_crafter_cache_in_flight {cache_stats["in_flight"]}')
+    
+    pool_stats = {feature: pool.stats() for feature, pool in key_pools.items()}
+    lines.append('# HELP gemini_key_requests_total Gemini requests per feature and API key by outcome')
+    lines.append('# TYPE gemini_key_requests_total counter')
+    for feature, stats in pool_stats.items():
+        for key in stats['per_key']:
+            for result in ('successes', 'quota_errors', 'errors'):
+                lines.append(f'gemini_key_requests_total{{feature="{feature}",key="{key["key"]}",result="{result}"}} {key[result]}')
+    lines.append('# TYPE gemini_key_healthy gauge')
+    for feature, stats in pool_stats.items():
+        lines.extend(f'gemini_key_healthy{{feature="{feature}",key="{key["key"]}"}} {int(key["healthy"])}' for key in stats['per_key'])
+    lines.append('# TYPE gemini_key_in_flight gauge')
+    for feature, stats in pool_stats.items():
+        lines.extend(f'gemini_key_in_flight{{feature="{feature}",key="{key["key"]}"}} {key["in_flight"]}' for key in stats['per_key'])
+    lines.append('# TYPE gemini_key_pool_rejected_total counter')
+    lines.extend(f'gemini_key_pool_rejected_total{{feature="{feature}"}} {stats["rejected"]}' for feature, stats in pool_stats.items())
+    
+    admission_stats = {feature: limiter.stats() for feature, limiter in admission_limiters.items()}
+    lines.append('# HELP admission_active_requests Requests holding a concurrency slot per feature')
+    lines.append('# TYPE admission_active_requests gauge')
+    lines.extend(f'admission_active_requests{{feature="{feature}"}} {stats["active"]}' for feature, stats in admission_stats.items())
+    lines.append('# HELP admission_queue_depth Requests waiting for a concurrency slot per feature')
+    lines.append('# TYPE admission_queue_depth gauge')
+    lines.extend(f'admission_queue_depth{{feature="{feature}"}} {stats["waiting"]}' for feature, stats in admission_stats.items())
+    lines.append('# TYPE admission_requests_total counter')
+    for feature, stats in admission_stats.items():
+        lines.append(f'admission_requests_total{{feature="{feature}",result="admitted"}} {stats["admitted"]}')
+        lines.append(f'admission_requests_total{{feature="{feature}",result="queue_full"}} {stats["rejected_queue_full"]}')
+        lines.append(f'admission_requests_total{{feature="{feature}",result="queue_timeout"}} {stats["rejected_timeout"]}')
+    
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
 # ==================== CLEANUP HANDLER ====================
 
 def cleanup_resources():
     """Clean up camera and MediaPipe resources on shutdown"""
-    global camera, mphands
     print("\\n🧹 Cleaning up resources...")
     try:
-        if camera is not None:
-            camera.release()
-        if mphands is not None:
-            mphands.close()
+        camera_broadcaster.stop()
+        release_camera()
+        drawinair_sessions.close_all()
+        if hand_tracking_pool is not None:
+            hand_tracking_pool.close()
+        plot_crafter_batch_executor.shutdown(wait=False, cancel_futures=True)
         print("✅ Resources cleaned up successfully")
     except Exception as e:
         print(f"⚠️ Error during cleanup: {e}")
@@ -943,11 +1592,11 @@ def signal_handler(sig, frame):
     cleanup_resources()
     sys.exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
-
 if __name__ == '__main__':
+    # Register signal handlers (under gunicorn the worker_exit hook cleans up instead)
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
     print("=" * 70)
     print("🚀 Magic Learn Backend API - Complete Implementation")
     print("=" * 70)
@@ -957,19 +1606,27 @@ if __name__ == '__main__':
     print("📊 DrawInAir Endpoints:")
     print("   - POST /api/drawinair/start        - Start camera")
     print("   - POST /api/drawinair/stop         - Stop camera")
+    print("   - POST /api/drawinair/process-frame - Process browser frame")
+    print("   - WS   /api/drawinair/ws           - Frame/gesture stream")
     print("   - GET  /api/drawinair/video-feed   - Video stream")
     print("   - GET  /api/drawinair/gesture      - Current gesture")
     print("   - POST /api/drawinair/analyze      - Analyze drawing")
     print("   - POST /api/drawinair/clear        - Clear canvas")
+    print("   - POST /api/drawinair/undo         - Undo last stroke")
+    print("   - GET  /api/drawinair/strokes      - Vector strokes")
     print("-" * 70)
     print("📊 Image Reader Endpoints:")
     print("   - POST /api/image-reader/analyze   - Analyze image")
+    print("   - POST /api/image-reader/analyze/stream - Analyze image (SSE)")
     print("-" * 70)
     print("📊 Plot Crafter Endpoints:")
     print("   - POST /api/plot-crafter/generate  - Generate plot")
+    print("   - POST /api/plot-crafter/generate/stream - Generate plot (SSE)")
+    print("   - POST /api/plot-crafter/generate-batch - Generate plots for a list of themes")
     print("-" * 70)
     print("📊 General:")
     print("   - GET  /health                     - Health check")
+    print("   - GET  /metrics                    - Prometheus metrics")
     print("=" * 70)
     
     # Get port from environment variable (Railway sets PORT automatically)
@@ -0,0 +1,28 @@
+"""
+Magic Learn LLM Entry Point
+Image Reader and Plot Crafter requests spend nearly all their time waiting on
+Gemini, so they are served by their own gunicorn instance with cooperative
+(gevent) workers, see gunicorn_llm.conf.py: a request waiting on Gemini is a
+greenlet, not an OS thread.
+
+    gunicorn -c gunicorn_llm.conf.py magic_learn_llm:app
+
+Same Flask app as magic_learn_backend, limited to the LLM routes. DrawInAir
+(camera, sessions, hand tracking, and its analyze route, which reads the
+session canvas) stays on the threaded instance (gunicorn.conf.py).
+"""
+
+from werkzeug.exceptions import NotFound
+
+import magic_learn_backend
+
+LLM_ROUTE_PREFIXES = ('/api/image-reader/', '/api/plot-crafter/')
+SHARED_PATHS = {'/health', '/metrics'}
+
+
+def app(environ, start_response):
+    """WSGI app answering 404 for everything but the LLM routes"""
+    path = environ.get('PATH_INFO', '')
+    if path in SHARED_PATHS or path.startswith(LLM_ROUTE_PREFIXES):
+        return magic_learn_backend.app(environ, start_response)
+    return NotFound()(environ, start_response)
@@ -0,0 +1,113 @@
+"""
+DrawInAir Stroke Store
+Vector record of everything drawn on a DrawInAir canvas. Strokes are
+polylines kept in two growable NumPy buffers (points + stroke table), so
+memory grows with the amount of ink instead of the canvas resolution, and
+undo, replay and stroke transmission do not need the raster.
+"""
+
+import cv2
+import numpy as np
+
+# One row per stroke: slice of the points buffer plus its pen
+STROKE_DTYPE = np.dtype([
+    ('start', '<u4'),       # First point index in the points buffer
+    ('count', '<u4'),       # Number of points
+    ('color', 'u1', (3,)),  # BGR
+    ('thickness', 'u1'),
+])
+
+
+class StrokeStore:
+    """Append-only polyline store with undo (not thread-safe: use under session.lock)"""
+
+    def __init__(self, point_capacity=256, stroke_capacity=16):
+        self._points = np.empty((point_capacity, 2), dtype=np.int16)
+        self._strokes = np.empty(stroke_capacity, dtype=STROKE_DTYPE)
+        self._num_points = 0
+        self._num_strokes = 0
+
+    def __len__(self):
+        return self._num_strokes
+
+    @property
+    def num_points(self):
+        return self._num_points
+
+    @property
+    def nbytes(self):
+        """Memory held by the vector buffers"""
+        return self._points.nbytes + self._strokes.nbytes
+
+    def add_segment(self, pt1, pt2, color, thickness):
+        """
+        Record one drawn segment. Extends the last stroke when the segment
+        continues it with the same pen, otherwise starts a new stroke
+        """
+        if self._num_strokes:
+            last = self._strokes[self._num_strokes - 1]
+            end = self._points[last['start'] + last['count'] - 1]
+            if (last['start'] + last['count'] == self._num_points and
+                    end[0] == pt1[0] and end[1] == pt1[1] and
+                    last['thickness'] == thickness and tuple(last['color']) == tuple(color)):
+                self._append_point(pt2)
+                last['count'] += 1
+                return
+
+        self._grow_strokes()
+        stroke = self._strokes[self._num_strokes]
+        stroke['start'] = self._num_points
+        stroke['count'] = 2
+        stroke['color'] = color
+        stroke['thickness'] = thickness
+        self._num_strokes += 1
+        self._append_point(pt1)
+        self._append_point(pt2)
+
+    def undo(self):
+        """Remove the most recent stroke. Returns False if there was nothing to undo"""
+        if not self._num_strokes:
+            return False
+        self._num_strokes -= 1
+        self._num_points = int(self._strokes[self._num_strokes]['start'])
+        return True
+
+    def clear(self):
+        """Forget every stroke (buffers are kept for reuse)"""
+        self._num_points = 0
+        self._num_strokes = 0
+
+    def strokes(self, since=0):
+        """Yield (points (n, 2) view, color, thickness) for strokes[since:]"""
+        for stroke in self._strokes[since:self._num_strokes]:
+            start, count = int(stroke['start']), int(stroke['count'])
+            yield self._points[start:start + count], tuple(int(c) for c in stroke['color']), int(stroke['thickness'])
+
+    def to_list(self, since=0):
+        """JSON-friendly strokes for replay / transmission"""
+        return [
+            {'color': list(color), 'thickness': thickness, 'points': points.tolist()}
+            for points, color, thickness in self.strokes(since)
+        ]
+
+    def render(self, canvas, ink_mask=None, erase_color=(0, 0, 0)):
+        """Draw every stroke, in order, onto canvas (and ink_mask: 255 ink / 0 erased)"""
+        for points, color, thickness in self.strokes():
+            polyline = [points.astype(np.int32)]
+            cv2.polylines(canvas, polyline, False, color, thickness)
+            if ink_mask is not None:
+                cv2.polylines(ink_mask, polyline, False, 0 if color == erase_color else 255, thickness)
+
+    def _append_point(self, point):
+        if self._num_points == len(self._points):
+            grown = np.empty((len(self._points) * 2, 2), dtype=np.int16)
+            grown[:self._num_points] = self._points[:self._num_points]
+            self._points = grown
+        self._points[self._num_points] = point
+        self._num_points += 1
+
+    def _grow_strokes(self):
+        if self._num_strokes == len(self._strokes):
+            grown = np.empty(len(self._strokes) * 2, dtype=STROKE_DTYPE)
+            grown[:self._num_strokes] = self._strokes[:self._num_strokes]
+            self._strokes = grown
@@ -0,0 +1,161 @@
+"""
+Plot Crafter Theme Cache
+Whole classes ask for the same theme within minutes, so explanations are
+cached by normalized theme ("Newton's third law!" == "newtons  Third Law").
+- LRU eviction with a TTL, plus hit / miss counters
+- Single-flight: concurrent misses for the same key wait for the first
+  request's upstream call and share its result (errors are shared too, and
+  never cached). begin() / finish() let a caller that streams the value
+  lead a flight itself; if it gives up, waiters retry (one becomes leader)
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize_theme(theme):
+    """Case-, accent-form-, punctuation- and whitespace-insensitive form of a theme"""
+    text = unicodedata.normalize('NFKC', theme or '').casefold()
+    text = PUNCTUATION.sub('', text)  # "newton's" -> "newtons", "f=ma" -> "fma"
+    return ' '.join(text.replace('_', ' ').split())
+
+
+class FlightAbandoned(Exception):
+    """A flight's leader stopped before producing a value (e.g. its client disconnected)"""
+
+
+class Flight:
+    """One in-progress upstream call that other requests can wait on"""
+
+    __slots__ = ('done', 'value', 'error', 'waiters', 'finished')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+        self.finished = False
+
+
+class ThemeCache:
+    """Thread-safe LRU + TTL cache with single-flight computation of misses"""
+
+    def __init__(self, max_entries=512, ttl=6 * 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._flights = {}  # key -> Flight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Cached value for key, or None (does not count as a lookup)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached value for key, or compute() it - at most once at a time per key
+        Returns (value, source) with source 'hit', 'miss' (this call computed it)
+        or 'shared' (waited for a concurrent call)
+        """
+        value, source = self.begin(key)
+        if source != 'lead':
+            return value, source
+
+        flight = value
+        try:
+            value = compute()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, value=value)
+        return value, 'miss'
+
+    def begin(self, key):
+        """
+        Look key up for a caller that may compute the value itself
+        Returns (value, 'hit'), (value, 'shared') after waiting for a concurrent
+        computation, or (flight, 'lead'): the caller computes the value and must
+        call finish(key, flight, ...) whatever happens
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], 'hit'
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = Flight()
+                    self.misses += 1
+                    return flight, 'lead'
+                flight.waiters += 1
+                self.coalesced += 1
+
+            flight.done.wait()
+            if isinstance(flight.error, FlightAbandoned):
+                continue  # Nothing to share: look again (and lead if nobody else does)
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, 'shared'
+
+    def finish(self, key, flight, value=None, error=None):
+        """Complete a flight from begin(): cache value (unless error) and wake waiters. Later calls are no-ops"""
+        with self._lock:
+            if flight.finished:
+                return
+            flight.finished = True
+        flight.value = value
+        flight.error = error
+        if error is None:
+            self.put(key, value)  # Before the flight ends, so no new leader starts in between
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    def put(self, key, value):
+        with self._lock:
+            self._expire(time.monotonic())
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'in_flight': len(self._flights),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+    def _expire(self, now):
+        # Caller holds self._lock
+        expired = [key for key, (stored_at, _) in self._entries.items() if now - stored_at >= self.ttl]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
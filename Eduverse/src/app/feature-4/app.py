@@ -15,6 +15,9 @@ from dotenv import load_dotenv
 import yt_dlp
 import requests
 import xml.etree.ElementTree as ET
+import json
+from admission import AdmissionLimiter, admission_controlled
+from response_cache import ResponseCache, content_key
 
 # Load environment variables
 load_dotenv()
@@ -37,6 +40,8 @@ if not YOUTUBE_API_KEY:
 youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
 
 # Use gemini-2.5-flash model with proper configuration
+PLAYGROUND_MODEL = 'gemini-2.5-flash-lite'
+PLAYGROUND_PROMPT_VERSION = '1'  # Bump when the /generate prompt changes so cached playgrounds regenerate
 generation_config = {
     "temperature": 0.7,
     "top_p": 0.95,
@@ -44,7 +49,29 @@ generation_config = {
     "max_output_tokens": 8192,
 }
 
-model = genai.GenerativeModel('gemini-2.5-flash-lite', generation_config=generation_config)
+model = genai.GenerativeModel(PLAYGROUND_MODEL, generation_config=generation_config)
+
+# Generated playgrounds cached per video ID + prompt/model version (memory LRU + disk store shared by workers)
+PLAYGROUND_CACHE_SIZE_MB = float(os.getenv('PLAYGROUND_CACHE_SIZE_MB', 64))  # 0 disables the cache
+PLAYGROUND_CACHE_DIR = os.getenv(
+    'PLAYGROUND_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'playground')
+)  # Empty = memory only
+PLAYGROUND_DISK_CACHE_MB = float(os.getenv('PLAYGROUND_DISK_CACHE_MB', 512))
+playground_cache = ResponseCache(
+    max_memory_bytes=int(PLAYGROUND_CACHE_SIZE_MB * 1024 * 1024),
+    disk_dir=PLAYGROUND_CACHE_DIR if PLAYGROUND_DISK_CACHE_MB > 0 else None,
+    max_disk_bytes=int(PLAYGROUND_DISK_CACHE_MB * 1024 * 1024)
+) if PLAYGROUND_CACHE_SIZE_MB > 0 else None
+
+# Admission control for /generate: a concurrency limit with a short bounded queue, beyond that
+# fast 429/503 with Retry-After instead of piling up requests (per gunicorn worker)
+generate_limiter = AdmissionLimiter(
+    'generate',
+    max_concurrent=int(os.getenv('PLAYGROUND_MAX_CONCURRENT', 32)),
+    max_queue=int(os.getenv('PLAYGROUND_MAX_QUEUE', 32)),
+    queue_timeout=float(os.getenv('PLAYGROUND_QUEUE_TIMEOUT', 10))  # seconds
+)
 
 def clean_transcript_text(text):
     """Strips music cues and filler words, then truncates."""
@@ -108,6 +135,21 @@ def get_video_id(url):
     match = re.search(regex, url)
     return match.group(1) if match else None
 
+def playground_cache_key(video_id):
+    """Everything besides the video that decides the generated HTML"""
+    return content_key(video_id, PLAYGROUND_MODEL, PLAYGROUND_PROMPT_VERSION, json.dumps(generation_config, sort_keys=True))
+
+def wants_regeneration(data):
+    """True for {"force": true} in the body or ?force=1 / ?force=true"""
+    return data.get('force') is True or request.args.get('force', '').lower() in ('1', 'true')
+
+def playground_response(result, cached):
+    """Playground JSON with its ETag; GET /playground/<video_id> serves the same entry conditionally"""
+    response = jsonify({"html": result['html'], "video_id": result['video_id'], "cached": cached})
+    response.set_etag(result['etag'])
+    response.headers['Content-Location'] = f"/playground/{result['video_id']}"
+    return response
+
 @app.route('/')
 def root():
     """Root endpoint"""
@@ -116,20 +158,49 @@ def root():
         "status": "running",
         "endpoints": {
             "/health": "GET - Health check",
-            "/generate": "POST - Generate playground from YouTube URL"
+            "/generate": "POST - Generate playground from YouTube URL",
+            "/playground/<video_id>": "GET - Cached playground (ETag / If-None-Match)"
         }
     })
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "model": "gemini-2.5-flash-lite"})
+    return jsonify({
+        "status": "healthy",
+        "model": PLAYGROUND_MODEL,
+        "admission": generate_limiter.stats(),
+        "playground_cache": playground_cache.stats() if playground_cache is not None else None
+    })
+
+@app.route('/playground/<video_id>')
+def cached_playground(video_id):
+    """
+    Cached playground for a video, as returned by /generate
+    Conditional GET: If-None-Match with the ETag answers 304. Clients may keep
+    the copy but must revalidate, since a forced /generate replaces it
+    """
+    if not re.fullmatch(r"[0-9A-Za-z_-]{11}", video_id):
+        return jsonify({"error": "Invalid YouTube video ID"}), 400
+    cached = playground_cache.get(playground_cache_key(video_id)) if playground_cache is not None else None
+    if cached is None:
+        return jsonify({"error": "No cached playground for this video, POST /generate first"}), 404
+    response = playground_response(cached, cached=True)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/generate', methods=['POST'])
+@admission_controlled(generate_limiter)
 def generate():
-    """Generate interactive playground from YouTube URL"""
+    """
+    Generate interactive playground from YouTube URL
+    Playgrounds are cached per video and served with an ETag; revalidate through
+    GET /playground/<video_id>. {"force": true} (or ?force=1) regenerates and replaces the entry
+    """
     data = request.json
     video_url = data.get('url')
+    force = wants_regeneration(data)
     
     print(f"\n[REQUEST] Received URL: {video_url}")
     
@@ -140,6 +211,13 @@ def generate():
         return jsonify({"error": "Invalid YouTube URL"}), 400
     
     print(f"[INFO] Extracted video ID: {video_id}")
+    
+    cache_key = playground_cache_key(video_id)
+    if playground_cache is not None and not force:
+        cached = playground_cache.get(cache_key)
+        if cached is not None:
+            print(f"[CACHE] Serving cached playground for video ID: {video_id}")
+            return playground_response(cached, cached=True)
 
     try:
         # Use YouTube Data API v3 to get video information
@@ -290,7 +368,10 @@ Focus on creating visual, hands-on learning experiences that directly relate to
         clean_html = response.text.replace("```html", "").replace("```", "").strip()
         print(f"[INFO] Generated HTML length: {len(clean_html)} characters")
         
-        return jsonify({"html": clean_html, "video_id": video_id})
+        result = {"html": clean_html, "video_id": video_id, "etag": content_key(clean_html)[:32]}
+        if playground_cache is not None:
+            playground_cache.put(cache_key, result)
+        return playground_response(result, cached=False)
 
     except Exception as e:
         import traceback
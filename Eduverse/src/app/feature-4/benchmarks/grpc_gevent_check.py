@@ -0,0 +1,149 @@
+"""
+gRPC Under gevent Check
+Starts a local fake Gemini GenerativeService (real gRPC server, each call
+waits --latency seconds), serves benchmarks/grpc_upstream.py with
+gunicorn.conf.py in ONE worker and fires concurrent /generate requests, so
+every request makes a real gRPC call through the Gemini SDK client.
+
+With gRPC set up correctly for gevent, all calls are in flight at once and
+the batch takes about one --latency. If gRPC runs on an unpatched stdlib it
+blocks the worker's hub: calls serialize or hang, and the check fails.
+
+Usage:
+    python benchmarks/grpc_gevent_check.py
+    python benchmarks/grpc_gevent_check.py --concurrency 50 --latency 2
+    python benchmarks/grpc_gevent_check.py --worker-class gthread
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import google.ai.generativelanguage as glm
+import grpc
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE_NAME = 'google.ai.generativelanguage.v1beta.GenerativeService'
+PLAYGROUND_HTML = '<!DOCTYPE html><html><body><h1>gRPC playground</h1></body></html>'
+
+
+class FakeGenerativeService:
+    """GenerateContent that waits like the real model and counts overlapping calls"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+
+    def generate_content(self, request, context):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return glm.GenerateContentResponse(candidates=[{'content': {'parts': [{'text': PLAYGROUND_HTML}]}}])
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def start_grpc_server(service, max_workers):
+    server = grpc.server(ThreadPoolExecutor(max_workers=max_workers))
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(SERVICE_NAME, {
+        'GenerateContent': grpc.unary_unary_rpc_method_handler(
+            service.generate_content,
+            request_deserializer=glm.GenerateContentRequest.deserialize,
+            response_serializer=glm.GenerateContentResponse.serialize,
+        ),
+    }),))
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    return server, port
+
+
+def start_gunicorn(port, grpc_port, worker_class):
+    env = dict(os.environ, GRPC_UPSTREAM_ADDRESS=f'127.0.0.1:{grpc_port}', GUNICORN_WORKER_CLASS=worker_class,
+               PYTHONUNBUFFERED='1')
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', '1',
+               '--bind', f'127.0.0.1:{port}', 'benchmarks.grpc_upstream:app']
+    process = subprocess.Popen(command, cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return process
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.25)
+    stop_gunicorn(process)
+    raise RuntimeError("gunicorn did not become healthy within 60 s")
+
+
+def stop_gunicorn(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=15)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def generate(port, idx, timeout):
+    body = json.dumps({'url': f'https://www.youtube.com/watch?v={idx:011d}'}).encode()
+    request = urllib.request.Request(f'http://127.0.0.1:{port}/generate', data=body,
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status == 200 and 'gRPC playground' in json.loads(response.read())['html']
+    except Exception:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=1.0, help='Fake Gemini latency per call (seconds)')
+    parser.add_argument('--worker-class', default='gevent')
+    parser.add_argument('--port', type=int, default=5056)
+    args = parser.parse_args()
+
+    service = FakeGenerativeService(args.latency)
+    server, grpc_port = start_grpc_server(service, max_workers=args.concurrency + 4)
+    process = None
+    try:
+        process = start_gunicorn(args.port, grpc_port, args.worker_class)
+        generate(args.port, 0, timeout=30)  # Warm-up: channel connect, first request
+        service.peak_in_flight = 0
+        timeout = args.latency * args.concurrency + 10  # Long enough to tell "serialized" from "hung"
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(lambda idx: generate(args.port, idx, timeout), range(1, args.concurrency + 1)))
+        elapsed = time.perf_counter() - started
+    finally:
+        if process is not None:
+            stop_gunicorn(process)
+        server.stop(grace=None)
+
+    ok = sum(results)
+    print(f"{args.worker_class}: {ok}/{args.concurrency} ok in {elapsed:.2f}s, "
+          f"peak {service.peak_in_flight} gRPC calls in flight (latency {args.latency:.2f}s)")
+    overlapped = service.peak_in_flight == args.concurrency and elapsed < 2 * args.latency + 1
+    if ok != args.concurrency or not overlapped:
+        sys.exit("FAIL: gRPC calls did not all run concurrently in one worker")
+    print("OK: every /generate made a real gRPC call and they all overlapped")
+
+
+if __name__ == '__main__':
+    main()
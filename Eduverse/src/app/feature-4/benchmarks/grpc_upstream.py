@@ -0,0 +1,31 @@
+"""
+Playground Backend With a Local gRPC Gemini Server
+Like stub_upstream.py (stub YouTube APIs, no cache or admission limits), but
+the Gemini model is the real SDK GenerativeModel whose client talks gRPC to a
+local fake GenerativeService at GRPC_UPSTREAM_ADDRESS, so every /generate
+makes a real gRPC call. Served by grpc_gevent_check.py under gunicorn:
+
+    gunicorn -c gunicorn.conf.py benchmarks.grpc_upstream:app
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('STUB_UPSTREAM_LATENCY', '0.05')  # YouTube stubs only
+
+import google.ai.generativelanguage as glm  # noqa: E402
+import grpc  # noqa: E402
+
+import stub_upstream  # noqa: E402
+
+GRPC_UPSTREAM_ADDRESS = os.getenv('GRPC_UPSTREAM_ADDRESS', '127.0.0.1:50551')
+
+transport = glm.GenerativeServiceClient.get_transport_class('grpc')
+client = glm.GenerativeServiceClient(transport=transport(channel=grpc.insecure_channel(GRPC_UPSTREAM_ADDRESS)))
+
+playground = stub_upstream.playground
+playground.model = playground.genai.GenerativeModel(playground.PLAYGROUND_MODEL, generation_config=playground.generation_config)
+playground.model._client = client  # The attribute the SDK fills lazily with its own (TLS, API key) client
+app = playground.app
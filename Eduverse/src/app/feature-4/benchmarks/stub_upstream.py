@@ -0,0 +1,87 @@
+"""
+Playground Backend With a Stub Upstream
+The real app with the YouTube Data API, the transcript API and Gemini
+replaced by stubs that wait like the network would (STUB_UPSTREAM_LATENCY
+seconds for Gemini, a tenth of it for each YouTube call) and return canned
+data. The playground cache and admission limits are off. Used by
+feature-1/benchmarks/load_test.py; can also be served directly:
+
+    python benchmarks/stub_upstream.py                                  (Flask dev server)
+    gunicorn -c gunicorn.conf.py benchmarks.stub_upstream:app           (production settings)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('PLAYGROUND_API_KEY', 'stub-playground-key')
+os.environ.setdefault('YOUTUBE_DATA_API_KEY', 'stub-youtube-key')
+os.environ.setdefault('PLAYGROUND_MAX_CONCURRENT', '1000')  # Measure the server, not admission control
+os.environ.setdefault('PLAYGROUND_CACHE_SIZE_MB', '0')
+
+import app as playground  # noqa: E402
+
+STUB_UPSTREAM_LATENCY = float(os.getenv('STUB_UPSTREAM_LATENCY', 0.5))
+
+
+class StubRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        time.sleep(STUB_UPSTREAM_LATENCY / 10)
+        return self.result
+
+
+class StubYouTube:
+    """Stands in for the googleapiclient YouTube resource"""
+
+    def videos(self):
+        return self
+
+    def list(self, part, id):
+        return StubRequest({'items': [{'snippet': {'title': f'Stub lecture {id}', 'description': 'Forces and motion.'}}]})
+
+
+class StubTranscript:
+    language = 'English'
+
+    def fetch(self):
+        time.sleep(STUB_UPSTREAM_LATENCY / 10)
+        return [{'text': 'every action has an equal and opposite reaction'}] * 50
+
+
+class StubTranscriptList:
+    def find_transcript(self, languages):
+        return StubTranscript()
+
+
+class StubTranscriptApi:
+    """Stands in for YouTubeTranscriptApi"""
+
+    def list(self, video_id):
+        return StubTranscriptList()
+
+
+class StubResponse:
+    text = '<!DOCTYPE html><html><body><h1>Stub playground</h1></body></html>'
+
+
+class StubModel:
+    """Stands in for genai.GenerativeModel"""
+
+    def generate_content(self, prompt):
+        time.sleep(STUB_UPSTREAM_LATENCY)
+        return StubResponse()
+
+
+playground.youtube = StubYouTube()
+playground.YouTubeTranscriptApi = StubTranscriptApi
+playground.model = StubModel()
+app = playground.app
+
+if __name__ == '__main__':
+    # Same settings as app.py's __main__
+    app.run(debug=False, host='0.0.0.0', port=int(os.environ.get('PORT', 8080)))
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for the Playground backend (production entry point)
+
+    gunicorn -c gunicorn.conf.py app:app
+
+A /generate request spends nearly all of its time waiting on the YouTube
+APIs and Gemini, so workers are gevent-based: each waiting request is a
+greenlet rather than an OS thread, and one worker holds hundreds of them.
+The service keeps no state between requests, so it also runs several
+worker processes for the CPU-side work (transcript cleanup, JSON).
+GUNICORN_WORKER_CLASS=gthread falls back to thread pools.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 500))  # gevent: concurrent requests per worker
+threads = int(os.getenv('GUNICORN_THREADS', 16))  # gthread only
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))  # Restart a worker that stops heartbeating this long
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))  # Let in-flight generations (10-30 s) finish
+keepalive = 5
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+
+
+def post_fork(server, worker):
+    """
+    Make gRPC (Gemini client) cooperative before the app creates any channel
+    gRPC must see an already patched stdlib, but GeventWorker.init_process only
+    patches after this hook runs, so patch here first (patching again is a no-op)
+    Checked with a real gRPC call by benchmarks/grpc_gevent_check.py
+    """
+    if worker_class == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
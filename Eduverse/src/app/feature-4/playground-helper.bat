@@ -30,7 +30,7 @@ if "%choice%"=="6" goto EXIT
 echo.
 echo Starting Playground Backend...
 echo.
-start cmd /k "cd /d %~dp0 && call ..\..\..\..\venv\Scripts\activate.bat && python app.py"
+start cmd /k "call "%~dp0start-playground-backend.bat""
 timeout /t 3
 goto MENU
 
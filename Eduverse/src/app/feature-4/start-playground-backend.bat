@@ -16,15 +16,23 @@ echo.
 echo [2/3] Installing Python dependencies...
 pip install -r requirements.txt
 
-REM Start Flask backend
+REM Start the backend with gunicorn (gunicorn.conf.py: gevent workers), as in production
 echo.
-echo [3/3] Starting Playground Flask backend on port 5001...
+echo [3/3] Starting Playground backend on port 5001...
 echo Backend will be available at: http://localhost:5001
 echo.
 echo Press Ctrl+C to stop the server
 echo ========================================
 echo.
 
-python app.py
+REM gunicorn needs a POSIX system (Linux, macOS, WSL); plain Windows falls back to the dev server
+set PORT=5001
+python -c "import gunicorn.util" >nul 2>&1
+if errorlevel 1 (
+    echo WARNING: gunicorn is not available on this system, falling back to the Flask dev server
+    python app.py
+) else (
+    gunicorn -c gunicorn.conf.py app:app
+)
 
 pause
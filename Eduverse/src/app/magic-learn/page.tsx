@@ -13,6 +13,8 @@ import { HAND_CONNECTIONS } from '@mediapipe/hands'
 
 // Render backend URL
 const BACKEND_URL = process.env.NEXT_PUBLIC_PYTHON_BACKEND_URL || 'https://magic-learn-backend.onrender.com';
+// Image Reader / Plot Crafter service (gevent workers); the main backend serves them too
+const LLM_BACKEND_URL = process.env.NEXT_PUBLIC_MAGIC_LEARN_LLM_URL || BACKEND_URL;
 
 export default function MagicLearnPage() {
   const [activeTab, setActiveTab] = useState<'about' | 'drawinair' | 'imagereader' | 'plotcrafter'>('about')
@@ -2006,7 +2008,7 @@ function ImageReaderTab({ theme }: { theme: 'light' | 'dark' }) {
       const base64Data = uploadedImage.split(',')[1]
       const mimeType = uploadedImage.split(':')[1].split(';')[0]
 
-      const response = await fetch(`${BACKEND_URL}/api/image-reader/analyze`, {
+      const response = await fetch(`${LLM_BACKEND_URL}/api/image-reader/analyze`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
@@ -2605,7 +2607,7 @@ function PlotCrafterTab({ theme }: { theme: 'light' | 'dark' }) {
         const controller = new AbortController()
         const timeoutId = setTimeout(() => controller.abort(), 60000) // 60 second timeout
         
-        const response = await fetch(`${BACKEND_URL}/api/plot-crafter/generate`, {
+        const response = await fetch(`${LLM_BACKEND_URL}/api/plot-crafter/generate`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({ theme: educationalTopic, educational: true }),
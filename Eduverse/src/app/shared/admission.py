@@ -0,0 +1,139 @@
+"""
+Admission Control
+Per-feature concurrency limits with a short bounded queue in front, so a
+burst sheds load quickly instead of piling up threads until every request
+times out.
+- Up to max_concurrent requests run; up to max_queue more wait (at most
+  queue_timeout seconds) for a slot
+- Queue full -> 429, queue wait timed out -> 503, both with Retry-After
+  estimated from the recent service time
+- The slot is held until the response is closed, so streamed responses
+  (SSE, MJPEG) count for as long as they stream
+"""
+
+import functools
+import math
+import threading
+import time
+
+from flask import jsonify, make_response
+
+
+class AdmissionRejected(Exception):
+    """Raised by acquire() when a request is not admitted"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Thread-safe concurrency limit + bounded wait queue for one feature"""
+
+    def __init__(self, name, max_concurrent, max_queue=0, queue_timeout=1.0):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.queue_wait_seconds = 0.0
+        self.peak_active = 0
+        self.peak_waiting = 0
+        self._service_seconds = None  # EWMA of how long a slot is held
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed. Raises AdmissionRejected"""
+        with self._condition:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                return self._admit(time.monotonic(), 0.0)
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise AdmissionRejected(429, f'{self.name} is at capacity', self._retry_after())
+
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            started = time.monotonic()
+            try:
+                admitted = self._condition.wait_for(lambda: self.active < self.max_concurrent, timeout=self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                self.rejected_timeout += 1
+                raise AdmissionRejected(503, f'{self.name} is busy', self._retry_after())
+            now = time.monotonic()
+            return self._admit(now, now - started)
+
+    def release(self, admitted_at):
+        with self._condition:
+            self.active -= 1
+            held = time.monotonic() - admitted_at
+            self._service_seconds = held if self._service_seconds is None else 0.8 * self._service_seconds + 0.2 * held
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_timeout_seconds': self.queue_timeout,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout': self.rejected_timeout,
+                'mean_queue_wait_ms': round(self.queue_wait_seconds * 1000 / self.admitted, 2) if self.admitted else None,
+                'service_time_ms': round(self._service_seconds * 1000, 1) if self._service_seconds is not None else None,
+                'peak_active': self.peak_active,
+                'peak_waiting': self.peak_waiting,
+            }
+
+    def _admit(self, now, waited):
+        # Caller holds self._condition
+        self.active += 1
+        self.admitted += 1
+        self.queue_wait_seconds += waited
+        self.peak_active = max(self.peak_active, self.active)
+        return now
+
+    def _retry_after(self):
+        # Caller holds self._condition. Time for the queue ahead to drain, at least 1 s
+        service = self._service_seconds if self._service_seconds is not None else 1.0
+        return max(1, math.ceil(service * (self.waiting + 1) / self.max_concurrent))
+
+
+def admission_controlled(limiter, on_reject=None):
+    """
+    Route decorator: admit through limiter or answer 429/503 with Retry-After
+    on_reject(AdmissionRejected) is called for every rejected request
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                admitted_at = limiter.acquire()
+            except AdmissionRejected as e:
+                if on_reject is not None:
+                    on_reject(e)
+                response = make_response(jsonify({
+                    'success': False,
+                    'error': f'{e.reason}, please retry shortly',
+                    'retry_after': e.retry_after
+                }), e.status)
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                limiter.release(admitted_at)
+                raise
+            response.call_on_close(lambda: limiter.release(admitted_at))
+            return response
+        return wrapper
+    return decorator
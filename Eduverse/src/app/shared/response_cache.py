@@ -0,0 +1,210 @@
+"""
+Two-Tier Response Cache
+Content-addressed cache for model responses (Image Reader, Playground): the
+key is a SHA-256 of everything that determines the answer, values are JSON-able.
+- Memory tier: LRU bounded by total value size
+- Disk tier: one JSON file per key, bounded by total size (least recently
+  used files are deleted first), so hits survive restarts; files written by
+  another process sharing the directory (gunicorn workers) are found too
+- Hit / miss counters per tier
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace so trivially different prompts share a key"""
+    return ' '.join((text or '').lower().split())
+
+
+def content_key(*parts):
+    """SHA-256 hex digest of bytes / str parts (length-prefixed so boundaries cannot collide)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, (bytes, bytearray, memoryview)) else str(part).encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Memory LRU in front of a size-bounded on-disk store"""
+
+    def __init__(self, max_memory_bytes=32 * 1024 * 1024, disk_dir=None, max_disk_bytes=256 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir or None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (size, value)
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+
+        if self.disk_dir:
+            self._load_disk_index()
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+
+        found = self._read_disk(key) if self.disk_dir else None
+        evicted = []
+        with self._lock:
+            if found is None:
+                self.misses += 1
+                return None
+            value, size = found
+            self.disk_hits += 1
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            else:
+                self._disk[key] = size  # Written by another process
+                self._disk_bytes += size
+                evicted = self._trim_disk()
+            self._remember(key, value, size)
+        self._remove_files(evicted)
+        return value
+
+    def put(self, key, value):
+        data = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            self._remember(key, value, len(data))
+        if self.disk_dir:
+            self._write_disk(key, data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes if self.disk_dir else None,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_evictions': self.memory_evictions,
+                'disk_evictions': self.disk_evictions,
+                'disk_errors': self.disk_errors,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None,
+            }
+
+    def _remember(self, key, value, size=None):
+        # Caller holds self._lock
+        if size is None:
+            size = len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        if size > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[0]
+        self._memory[key] = (size, value)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (old_size, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+            self.memory_evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f'{key}.json')
+
+    def _load_disk_index(self):
+        """Index existing cache files, oldest access first"""
+        files = []
+        try:
+            for subdir in os.scandir(self.disk_dir):
+                if not subdir.is_dir():
+                    continue
+                for entry in os.scandir(subdir.path):
+                    if entry.name.endswith('.json'):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        except FileNotFoundError:
+            return
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._remove_files(self._trim_disk())  # The limit may have been lowered since the last run
+        print(f"✅ Response cache: {len(self._disk)} entries ({self._disk_bytes // 1024} KB) on disk in {self.disk_dir}")
+
+    def _read_disk(self, key):
+        """(value, file size) or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            value = json.loads(data)
+            os.utime(path)  # mtime = last use, so restarts keep the LRU order
+            return value, len(data)
+        except FileNotFoundError:
+            self._forget_disk(key)  # Never written, or evicted by another process
+            return None
+        except (OSError, ValueError):
+            self._forget_disk(key)
+            with self._lock:
+                self.disk_errors += 1
+            return None
+
+    def _forget_disk(self, key):
+        with self._lock:
+            size = self._disk.pop(key, None)
+            if size is not None:
+                self._disk_bytes -= size
+
+    def _write_disk(self, key, data):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # Atomic: readers never see a partial file
+        except OSError as e:
+            print(f"⚠️ Response cache write failed: {e}")
+            with self._lock:
+                self.disk_errors += 1
+            return
+
+        with self._lock:
+            old_size = self._disk.pop(key, None)
+            if old_size is not None:
+                self._disk_bytes -= old_size
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            evicted = self._trim_disk()
+        self._remove_files(evicted)
+
+    def _trim_disk(self):
+        # Caller holds self._lock (or is __init__). Returns the evicted keys
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            evicted.append(old_key)
+        return evicted
+
+    def _remove_files(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
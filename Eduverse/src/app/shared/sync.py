@@ -0,0 +1,66 @@
+"""
+Shared Backend Modules
+The Python services deploy from their own directories (Render rootDir,
+Docker build context), so they cannot import from a common package. Modules
+both need live here and each service gets a vendored copy, marked with a
+header pointing back. Edit the file here, then re-sync.
+
+Usage:
+    python src/app/shared/sync.py           (rewrite the vendored copies)
+    python src/app/shared/sync.py --check   (exit 1 if a copy drifted; run by CI)
+"""
+
+import argparse
+import os
+import sys
+
+SHARED_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(SHARED_DIR)
+
+# Shared module -> services that vendor it
+SHARED_MODULES = {
+    'admission.py': ['feature-1', 'feature-4'],
+    'response_cache.py': ['feature-1', 'feature-4'],
+}
+
+HEADER = '# Vendored from src/app/shared/{name} - edit it there and run src/app/shared/sync.py\n'
+
+
+def vendored_source(name):
+    with open(os.path.join(SHARED_DIR, name), encoding='utf-8') as f:
+        return HEADER.format(name=name) + f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='Only report drifted copies')
+    args = parser.parse_args()
+
+    drifted = []
+    for name, services in SHARED_MODULES.items():
+        expected = vendored_source(name)
+        for service in services:
+            path = os.path.join(APP_DIR, service, name)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    current = f.read()
+            except FileNotFoundError:
+                current = None
+            if current == expected:
+                continue
+            relative = os.path.relpath(path, APP_DIR)
+            if args.check:
+                drifted.append(relative)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(expected)
+                print(f"✅ Updated {relative}")
+
+    if drifted:
+        sys.exit("❌ Out of sync with src/app/shared (run src/app/shared/sync.py): " + ', '.join(drifted))
+    if args.check:
+        print("✅ Vendored shared modules are in sync")
+
+
+if __name__ == '__main__':
+    main()